@@ -1,12 +1,23 @@
-import subprocess
 import time
 import os
 from log_utils import LogManager
 from languages.language_config import LanguageManager
 from config.timeout_config import TimeoutConfig
+from config.command_config import CommandConfig
+from commands.powershell import configure_powershell_pool, run_powershell
+from commands.parsers import THREAT_DETECTION_SCRIPT, parse_threat_detections
 
 logger = LogManager().get_logger(__name__)
 
+# Defender cmdlet在常驻的PowerShell进程中执行，预先导入Defender模块
+configure_powershell_pool(
+    max_hosts=CommandConfig.POWERSHELL_MAX_HOSTS,
+    max_commands=CommandConfig.POWERSHELL_MAX_COMMANDS,
+    idle_timeout=CommandConfig.POWERSHELL_IDLE_TIMEOUT,
+    preload=[f"Import-Module {module} -ErrorAction SilentlyContinue"
+             for module in CommandConfig.POWERSHELL_PRELOAD_MODULES]
+)
+
 class AntivirusScan:
     """系统病毒扫描和查杀功能"""
     
@@ -18,16 +29,18 @@ class AntivirusScan:
             print(LanguageManager.get_string("virus_scan_starting"))
             print(LanguageManager.get_string("quick_scan_info"))
             
-            process = subprocess.run(
-                ['powershell', '-Command', 'Start-MpScan -ScanType QuickScan'],
-                shell=False, 
-                capture_output=True,
-                encoding='cp936',
-                errors='replace',
-                timeout=TimeoutConfig.get_timeout('quick_scan')
+            process = run_powershell(
+                'Start-MpScan -ScanType QuickScan',
+                timeout=TimeoutConfig.get_timeout('quick_scan'),
+                operation='quick_scan'
             )
             
-            if process.returncode == 0:
+            if process.timed_out:
+                logger.error("Quick scan timed out")
+                print(LanguageManager.get_string("scan_timeout"))
+            elif process.cancelled:
+                print(LanguageManager.get_string("operation_cancelled"))
+            elif process.returncode == 0:
                 logger.info("Quick scan completed successfully")
                 print(LanguageManager.get_string("quick_scan_completed"))
                 AntivirusScan._show_scan_results()
@@ -35,9 +48,6 @@ class AntivirusScan:
                 logger.error(f"Quick scan failed: {process.stderr}")
                 print(f"{LanguageManager.get_string('scan_failed')}: {process.stderr}")
                 
-        except subprocess.TimeoutExpired:
-            logger.error("Quick scan timed out")
-            print(LanguageManager.get_string("scan_timeout"))
         except FileNotFoundError:
             logger.error("Windows Defender PowerShell commands not found")
             print(LanguageManager.get_string("defender_not_found"))
@@ -57,16 +67,18 @@ class AntivirusScan:
             print(LanguageManager.get_string("full_scan_info"))
             print(LanguageManager.get_string("full_scan_warning"))
             
-            process = subprocess.run(
-                ['powershell', '-Command', 'Start-MpScan -ScanType FullScan'],
-                shell=False,
-                capture_output=True,
-                encoding='cp936',
-                errors='replace',
-                timeout=TimeoutConfig.get_timeout('full_scan')
+            process = run_powershell(
+                'Start-MpScan -ScanType FullScan',
+                timeout=TimeoutConfig.get_timeout('full_scan'),
+                operation='full_scan'
             )
             
-            if process.returncode == 0:
+            if process.timed_out:
+                logger.error("Full scan timed out")
+                print(LanguageManager.get_string("scan_timeout"))
+            elif process.cancelled:
+                print(LanguageManager.get_string("operation_cancelled"))
+            elif process.returncode == 0:
                 logger.info("Full scan completed successfully")
                 print(LanguageManager.get_string("full_scan_completed"))
                 AntivirusScan._show_scan_results()
@@ -74,9 +86,6 @@ class AntivirusScan:
                 logger.error(f"Full scan failed: {process.stderr}")
                 print(f"{LanguageManager.get_string('scan_failed')}: {process.stderr}")
                 
-        except subprocess.TimeoutExpired:
-            logger.error("Full scan timed out")
-            print(LanguageManager.get_string("scan_timeout"))
         except FileNotFoundError:
             logger.error("Windows Defender PowerShell commands not found")
             print(LanguageManager.get_string("defender_not_found"))
@@ -99,17 +108,21 @@ class AntivirusScan:
             logger.info(f"Starting custom scan on path: {path}")
             print(LanguageManager.get_string("virus_scan_starting"))
             print(f"{LanguageManager.get_string('custom_scan_path')}: {path}")
+            # 单引号字符串中只需将单引号写两次，路径中的$和`不会被展开
+            scan_path = path.replace("'", "''")
             
-            process = subprocess.run(
-                ['powershell', '-Command', f'Start-MpScan -ScanType CustomScan -ScanPath "{path}"'],
-                shell=False,
-                capture_output=True,
-                encoding='cp936',
-                errors='replace',
-                timeout=TimeoutConfig.get_timeout('custom_scan')
+            process = run_powershell(
+                f"Start-MpScan -ScanType CustomScan -ScanPath '{scan_path}'",
+                timeout=TimeoutConfig.get_timeout('custom_scan'),
+                operation='custom_scan'
             )
             
-            if process.returncode == 0:
+            if process.timed_out:
+                logger.error("Custom scan timed out")
+                print(LanguageManager.get_string("scan_timeout"))
+            elif process.cancelled:
+                print(LanguageManager.get_string("operation_cancelled"))
+            elif process.returncode == 0:
                 logger.info("Custom scan completed successfully")
                 print(LanguageManager.get_string("custom_scan_completed"))
                 AntivirusScan._show_scan_results()
@@ -117,9 +130,6 @@ class AntivirusScan:
                 logger.error(f"Custom scan failed: {process.stderr}")
                 print(f"{LanguageManager.get_string('scan_failed')}: {process.stderr}")
                 
-        except subprocess.TimeoutExpired:
-            logger.error("Custom scan timed out")
-            print(LanguageManager.get_string("scan_timeout"))
         except FileNotFoundError:
             logger.error("Windows Defender PowerShell commands not found")
             print(LanguageManager.get_string("defender_not_found"))
@@ -137,25 +147,24 @@ class AntivirusScan:
             logger.info("Updating virus definitions")
             print(LanguageManager.get_string("updating_definitions"))
             
-            process = subprocess.run(
-                ['powershell', '-Command', 'Update-MpSignature'],
-                shell=False,
-                capture_output=True,
-                encoding='cp936',
-                errors='replace',
-                timeout=TimeoutConfig.get_timeout('update_definitions')
+            process = run_powershell(
+                'Update-MpSignature',
+                timeout=TimeoutConfig.get_timeout('update_definitions'),
+                operation='update_definitions'
             )
             
-            if process.returncode == 0:
+            if process.timed_out:
+                logger.error("Update virus definitions timed out")
+                print(LanguageManager.get_string("update_timeout"))
+            elif process.cancelled:
+                print(LanguageManager.get_string("operation_cancelled"))
+            elif process.returncode == 0:
                 logger.info("Virus definitions updated successfully")
                 print(LanguageManager.get_string("definitions_updated"))
             else:
                 logger.error(f"Failed to update virus definitions: {process.stderr}")
                 print(f"{LanguageManager.get_string('update_failed')}: {process.stderr}")
                 
-        except subprocess.TimeoutExpired:
-            logger.error("Update virus definitions timed out")
-            print(LanguageManager.get_string("update_timeout"))
         except FileNotFoundError:
             logger.error("Windows Defender PowerShell commands not found")
             print(LanguageManager.get_string("defender_not_found"))
@@ -170,19 +179,19 @@ class AntivirusScan:
     def _show_scan_results():
         """显示扫描结果"""
         try:
-            process = subprocess.run(
-                ['powershell', '-Command', 'Get-MpThreatDetection'],
-                shell=False,
-                capture_output=True,
-                encoding='cp936',
-                errors='replace',
-                timeout=30
-            )
+            process = run_powershell(THREAT_DETECTION_SCRIPT, timeout=30)
+            
+            if process.timed_out or process.cancelled or process.returncode != 0:
+                logger.error(f"Reading scan results failed: {process.stderr}")
+                print(LanguageManager.get_string("results_error"))
+                return
             
-            if process.stdout.strip():
-                logger.info("Threats detected")
+            detections = parse_threat_detections(process.stdout)
+            active = [detection for detection in detections if detection.active]
+            if active:
+                logger.info(f"{len(active)} active threats detected")
                 print(LanguageManager.get_string("threats_detected"))
-                print(process.stdout)
+                AntivirusScan._print_threats(active)
                 
                 # 询问用户是否要清除威胁
                 print(LanguageManager.get_string("remove_threats_prompt"))
@@ -190,13 +199,29 @@ class AntivirusScan:
                 if choice == 'y':
                     AntivirusScan._remove_threats()
             else:
-                logger.info("No threats detected")
+                logger.info("No active threats detected")
                 print(LanguageManager.get_string("no_threats_detected"))
+                if detections:
+                    # 以前检测到、已被隔离或移除的威胁只列出，不再询问
+                    print(LanguageManager.get_string("threats_resolved"))
+                    AntivirusScan._print_threats(detections)
                 
         except Exception as e:
             logger.error(f"Error showing scan results: {str(e)}")
             print(f"{LanguageManager.get_string('results_error')}: {str(e)}")
     
+    @staticmethod
+    def _print_threats(detections):
+        """逐条输出威胁名称、状态、检测时间和受影响的文件"""
+        for detection in detections:
+            name = detection.name or detection.threat_id
+            print(f"- {name} [{detection.status}]")
+            if detection.detected_at is not None:
+                print(f"  {LanguageManager.get_string('threat_detected_at')}: "
+                      f"{detection.detected_at.astimezone():%Y-%m-%d %H:%M:%S}")
+            for resource in detection.resources:
+                print(f"  {resource}")
+    
     @staticmethod
     def _remove_threats():
         """移除检测到的威胁"""
@@ -204,25 +229,24 @@ class AntivirusScan:
             logger.info("Removing detected threats")
             print(LanguageManager.get_string("removing_threats"))
             
-            process = subprocess.run(
-                ['powershell', '-Command', 'Remove-MpThreat'],
-                shell=False,
-                capture_output=True,
-                encoding='cp936',
-                errors='replace',
-                timeout=TimeoutConfig.get_timeout('remove_threats')
+            process = run_powershell(
+                'Remove-MpThreat',
+                timeout=TimeoutConfig.get_timeout('remove_threats'),
+                operation='remove_threats'
             )
             
-            if process.returncode == 0:
+            if process.timed_out:
+                logger.error("Threat removal timed out")
+                print(LanguageManager.get_string("removal_timeout"))
+            elif process.cancelled:
+                print(LanguageManager.get_string("operation_cancelled"))
+            elif process.returncode == 0:
                 logger.info("Threats removed successfully")
                 print(LanguageManager.get_string("threats_removed"))
             else:
                 logger.error(f"Failed to remove threats: {process.stderr}")
                 print(f"{LanguageManager.get_string('removal_failed')}: {process.stderr}")
                 
-        except subprocess.TimeoutExpired:
-            logger.error("Threat removal timed out")
-            print(LanguageManager.get_string("removal_timeout"))
         except Exception as e:
             logger.error(f"Error removing threats: {str(e)}")
             print(f"{LanguageManager.get_string('unexpected_error')}: {str(e)}") 
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Cleanup engine module for System Safety Tools
+包含无用文件清理引擎相关的模块和类
+"""
+
+from .cancellation import CancellationToken, OperationCancelled
+from .progress import ProgressSnapshot, ProgressTracker
+from .walker import FileRecord, ScandirWalker
+from .extensions import ExtensionMatcher
+from .exclusions import ExclusionTrie
+from .index import ScanIndex
+from .budget import ScanBudget, ScanState
+from .scanner import ParallelScanner
+from .planner import CleanupPlan, PlanExecutor
+from .checkpoint import CleanupCheckpoint
+from .removal import BottomUpRemover, RemovalStats
+from .throttle import IOThrottle, TokenBucket
+from .rules import CleanupRule, CleanupRules
+from .report import DirectoryUsage, SpaceReport
+from .duplicates import DuplicateFinder, DuplicateGroup
+from .quarantine import Quarantine, QuarantineEntry
+from .profiles import ProfileCleaner, ProfileTarget
+
+__all__ = [
+    'CancellationToken',
+    'OperationCancelled',
+    'ProgressSnapshot',
+    'ProgressTracker',
+    'FileRecord',
+    'ScandirWalker',
+    'ExtensionMatcher',
+    'ExclusionTrie',
+    'ScanIndex',
+    'ScanBudget',
+    'ScanState',
+    'ParallelScanner',
+    'CleanupPlan',
+    'PlanExecutor',
+    'CleanupCheckpoint',
+    'BottomUpRemover',
+    'RemovalStats',
+    'IOThrottle',
+    'TokenBucket',
+    'CleanupRule',
+    'CleanupRules',
+    'DirectoryUsage',
+    'SpaceReport',
+    'DuplicateFinder',
+    'DuplicateGroup',
+    'Quarantine',
+    'QuarantineEntry',
+    'ProfileCleaner',
+    'ProfileTarget'
+]
+
+# 版本信息
+__version__ = '1.0.0'
+
+# 模块说明
+__doc__ = """
+清理引擎模块
+============
+
+这个模块提供了无用文件清理的底层引擎，包括：
+- 基于os.scandir的轻量目录遍历
+- 单次遍历的多后缀匹配
+- 排除文件和文件夹的前缀树匹配与子树剪枝
+- 基于目录修改时间的持久化增量扫描索引
+- 多驱动器、多子目录的并行扫描
+- 按历史产出分配的总扫描时间预算，中断后下次从断点继续
+- 先生成删除计划、再按计划执行的两阶段清理
+- 定期保存的清理检查点，程序中断后可继续
+- 自底向上的临时目录清理，跳过正在使用的子目录
+- 节流发布的结构化清理进度（扫描速度、候选文件、释放空间、当前目录）
+- 协作式取消，界面可随时停止正在运行的清理
+- 基于令牌桶的I/O限速，可按操作延迟自适应降速
+- 按后缀、存在时间、大小和路径组合的清理规则
+- 内存占用固定的空间占用报告（最大的K个目录和文件）
+- 按大小、部分哈希、完整哈希分级比较的重复文件查找
+- 可恢复的隔离模式，候选文件在同一卷内重命名到隔离目录
+- 多用户主机上并发清理所有用户的临时目录和回收站
+
+主要组件：
+- ScandirWalker: 目录遍历器，复用DirEntry缓存的类型和stat信息生成FileRecord记录
+- ExtensionMatcher: 后缀匹配器，从config/file_extensions.txt加载预处理的后缀查找表
+- ExclusionTrie: 排除项前缀树，从config/excluded_items.txt加载，不区分大小写和分隔符
+- ScanIndex: 扫描索引（SQLite），跳过上次扫描后未变化的目录
+- ScanBudget / ScanState: 扫描时间预算及跨运行的扫描状态（config/scan_state.json）
+- ParallelScanner: 并行扫描器，在有界线程池中并发遍历驱动器并合并结果
+- CleanupPlan / PlanExecutor: 清理计划及其执行器，执行时无需重新扫描磁盘
+- CleanupCheckpoint: 清理检查点（config/cleanup_checkpoint.json），记录清理阶段和删除进度
+- BottomUpRemover: 自底向上清理器，成批删除文件后再删除已清空的目录
+- IOThrottle / TokenBucket: I/O限速器，限制每秒操作数和字节数
+- CleanupRule / CleanupRules: 清理规则（config/cleanup_rules.json），复用遍历时读取的stat数据判断
+- SpaceReport: 空间占用报告，按深度优先顺序流式汇总目录大小，用有界堆保留最大的K项
+- DuplicateFinder: 重复文件查找器，只对大小和首尾哈希都相同的文件计算完整哈希
+- Quarantine: 隔离区，每个卷一个只追加的清单，按原路径恢复，过期文件定期清除
+- ProfileCleaner: 多用户清理器，对每个用户的目录使用BottomUpRemover并按用户汇总
+- CancellationToken: 取消令牌，在批次之间检查，取消后抛出OperationCancelled
+- ProgressTracker: 进度跟踪器，按间隔向progress.add_listener注册的监听器发布ProgressSnapshot
+
+使用示例：
+    from cleanup import ExclusionTrie, ExtensionMatcher, ParallelScanner
+
+    scanner = ParallelScanner(
+        file_filter=ExtensionMatcher.load(),
+        exclusions=ExclusionTrie.load(),
+        max_workers=8,
+        budget=300
+    )
+    for record in scanner.scan(["C:\\\\", "D:\\\\"]):
+        print(record.path, record.size)
+"""
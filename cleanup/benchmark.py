@@ -0,0 +1,322 @@
+"""
+清理引擎性能基准
+
+运行方式:
+    python -m cleanup.benchmark --files 300000
+    python -m cleanup.benchmark --only exclusions --exclusions 10000
+    python -m cleanup.benchmark --only removal --files 200000
+    python -m cleanup.benchmark --only duplicates --files 2000
+"""
+import os
+import time
+import hashlib
+import shutil
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from .duplicates import DuplicateFinder
+from .exclusions import ExclusionTrie
+from .removal import BottomUpRemover
+from .walker import ScandirWalker
+
+
+def build_synthetic_tree(root: str, file_count: int, files_per_dir: int = 200,
+                         dirs_per_level: int = 10) -> int:
+    """
+    在root下生成合成目录树，每10个文件中有1个.log文件
+
+    返回:
+        int: 实际创建的文件数量
+    """
+    created = 0
+    dir_index = 0
+    while created < file_count:
+        # 按dirs_per_level进制展开目录层级，得到较深且分散的目录结构
+        parts = []
+        n = dir_index
+        while True:
+            parts.append(f"d{n % dirs_per_level}")
+            n //= dirs_per_level
+            if n == 0:
+                break
+        directory = os.path.join(root, *parts)
+        os.makedirs(directory, exist_ok=True)
+
+        for i in range(min(files_per_dir, file_count - created)):
+            suffix = ".log" if i % 10 == 0 else ".dat"
+            with open(os.path.join(directory, f"f{i}{suffix}"), "wb"):
+                pass
+            created += 1
+        dir_index += 1
+    return created
+
+
+def rglob_log_scan(root: str) -> int:
+    """原有实现：rglob匹配后再逐个检查存在性和写权限"""
+    count = 0
+    for file_path in Path(root).rglob("*.log"):
+        if not file_path.exists():
+            continue
+        if not os.access(file_path, os.W_OK):
+            continue
+        count += 1
+    return count
+
+
+def walker_log_scan(root: str) -> int:
+    """新实现：ScandirWalker按文件名过滤，仅对匹配文件读取stat"""
+    walker = ScandirWalker(file_filter=lambda name: name.lower().endswith(".log"))
+    return sum(1 for _ in walker.walk(root))
+
+
+def rglob_temp_scan(root: str) -> int:
+    """原有临时目录实现：rglob("*")后逐个判断文件或目录"""
+    count = 0
+    for item in Path(root).rglob("*"):
+        if item.is_file() or item.is_dir():
+            count += 1
+    return count
+
+
+def walker_temp_scan(root: str) -> int:
+    """新临时目录实现：ScandirWalker生成全部文件和目录记录"""
+    walker = ScandirWalker(yield_dirs=True)
+    return sum(1 for _ in walker.walk(root))
+
+
+def _time(func: Callable[[str], int], root: str, repeat: int) -> Dict[str, float]:
+    """多次运行取最短时间，减少文件系统缓存带来的波动"""
+    best = float("inf")
+    result = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(root)
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": best, "matches": result}
+
+
+def run_walker_benchmark(root: str, repeat: int = 3) -> None:
+    """对比rglob与ScandirWalker的遍历耗时"""
+    cases = [
+        ("log scan", rglob_log_scan, walker_log_scan),
+        ("temp scan", rglob_temp_scan, walker_temp_scan),
+    ]
+    for name, old, new in cases:
+        old_result = _time(old, root, repeat)
+        new_result = _time(new, root, repeat)
+        speedup = old_result["seconds"] / new_result["seconds"] if new_result["seconds"] else 0
+        print(f"{name:<10} rglob: {old_result['seconds']:.3f}s ({old_result['matches']})  "
+              f"scandir: {new_result['seconds']:.3f}s ({new_result['matches']})  "
+              f"speedup: {speedup:.1f}x")
+
+
+def rglob_temp_remove(root: str) -> int:
+    """原有临时目录清理：rglob自顶向下，目录在其内容删除前就调用rmdir"""
+    removed = 0
+    for item in Path(root).rglob("*"):
+        try:
+            if item.is_file():
+                item.unlink()
+            elif item.is_dir():
+                item.rmdir()
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def walker_temp_remove(root: str) -> int:
+    """ScandirWalker自顶向下清理，目录记录先于其内容生成"""
+    removed = 0
+    for record in ScandirWalker(yield_dirs=True).walk(root):
+        try:
+            if record.is_dir:
+                os.rmdir(record.path)
+            else:
+                os.unlink(record.path)
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+def bottom_up_temp_remove(root: str) -> int:
+    """BottomUpRemover自底向上清理"""
+    stats = BottomUpRemover().remove_contents(root)
+    return stats.files_removed + stats.dirs_removed
+
+
+def run_removal_benchmark(file_count: int) -> None:
+    """
+    对比三种临时目录清理方式，每种方式使用新生成的目录树
+
+    报告每秒处理的条目数以及清理后残留的条目数
+    """
+    cases = [
+        ("rglob top-down", rglob_temp_remove),
+        ("walker top-down", walker_temp_remove),
+        ("bottom-up", bottom_up_temp_remove),
+    ]
+    for name, func in cases:
+        root = tempfile.mkdtemp(prefix="sst_bench_rm_")
+        try:
+            build_synthetic_tree(root, file_count)
+            entries = walker_temp_scan(root)
+            start = time.perf_counter()
+            func(root)
+            seconds = time.perf_counter() - start
+            left = walker_temp_scan(root)
+            print(f"{name:<16} {entries} entries in {seconds:.2f}s "
+                  f"({entries / seconds:,.0f}/s), {left} left")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def build_duplicate_tree(root: str, file_count: int, duplicate_every: int = 20) -> int:
+    """
+    生成大小集中在少数几档的随机文件，每duplicate_every个文件中有一个与前一个文件相同
+
+    返回:
+        int: 文件总字节数
+    """
+    rng = random.Random(42)
+    sizes = [64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+    total = 0
+    previous = b""
+    for i in range(file_count):
+        directory = os.path.join(root, f"d{i % 50}")
+        os.makedirs(directory, exist_ok=True)
+        if i % duplicate_every == 1:
+            data = previous
+        else:
+            data = rng.randbytes(rng.choice(sizes))
+        with open(os.path.join(directory, f"f{i}.bin"), "wb") as f:
+            f.write(data)
+        previous = data
+        total += len(data)
+    return total
+
+
+def full_hash_duplicates(root: str) -> int:
+    """对比基准：对所有文件计算完整哈希后分组"""
+    groups: Dict[str, int] = {}
+    for record in ScandirWalker().walk(root):
+        digest = hashlib.blake2b(digest_size=32)
+        with open(record.path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        key = digest.hexdigest()
+        groups[key] = groups.get(key, 0) + 1
+    return sum(1 for count in groups.values() if count > 1)
+
+
+def run_duplicate_benchmark(file_count: int) -> None:
+    """对比完整哈希与分级哈希查找重复文件的耗时和读取的字节数"""
+    root = tempfile.mkdtemp(prefix="sst_bench_dup_")
+    try:
+        total = build_duplicate_tree(root, file_count)
+        start = time.perf_counter()
+        full_groups = full_hash_duplicates(root)
+        full_seconds = time.perf_counter() - start
+
+        finder = DuplicateFinder()
+        start = time.perf_counter()
+        groups = finder.find(ScandirWalker().walk(root))
+        staged_seconds = time.perf_counter() - start
+
+        print(f"{file_count} files, {total / 2 ** 20:.0f} MB")
+        print(f"full hash: {full_seconds:.2f}s, {full_groups} groups, "
+              f"read {total / 2 ** 20:.0f} MB")
+        print(f"staged:    {staged_seconds:.2f}s, {len(groups)} groups, "
+              f"read {finder.bytes_read / 2 ** 20:.1f} MB "
+              f"({finder.bytes_read / total:.1%}), full-hashed {finder.full_hashed} files")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def linear_is_excluded(path: str, exclusions: List[str]) -> bool:
+    """逐项比较的朴素实现，复杂度为 O(排除项数量)"""
+    normalized = path.replace('\\', '/').casefold()
+    for item in exclusions:
+        if normalized == item or normalized.startswith(item + '/'):
+            return True
+    return False
+
+
+def run_exclusion_benchmark(exclusion_count: int = 10000, query_count: int = 100000,
+                            linear_sample: int = 2000) -> None:
+    """
+    对比逐项扫描与前缀树在大量排除项下的单次匹配耗时
+
+    逐项扫描的总耗时为 查询数×排除项数，只在前linear_sample个查询上测量
+    """
+    rng = random.Random(42)
+    exclusions = [f"C:\\Users\\user{i % 50}\\Project{i}\\build" for i in range(exclusion_count)]
+    queries = []
+    for _ in range(query_count):
+        project = rng.randrange(exclusion_count * 2)
+        leaf = rng.choice(["build\\out.log", "src\\main.tmp", "cache.bak"])
+        queries.append(f"c:/users/USER{project % 50}/project{project}/{leaf}")
+
+    normalized = [item.replace('\\', '/').casefold() for item in exclusions]
+    sample = queries[:linear_sample]
+    start = time.perf_counter()
+    linear_hits = sum(linear_is_excluded(path, normalized) for path in sample)
+    linear_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+    start = time.perf_counter()
+    trie = ExclusionTrie(exclusions)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    trie_hits = sum(trie.is_excluded(path) for path in queries)
+    trie_us = (time.perf_counter() - start) / len(queries) * 1e6
+    trie_sample_hits = sum(trie.is_excluded(path) for path in sample)
+
+    speedup = linear_us / trie_us if trie_us else 0
+    print(f"exclusions {exclusion_count}, trie build {build_seconds:.3f}s")
+    print(f"linear: {linear_us:.1f}us/query ({linear_hits}/{len(sample)} excluded)  "
+          f"trie: {trie_us:.2f}us/query ({trie_sample_hits}/{len(sample)} excluded, "
+          f"{trie_hits}/{len(queries)} total)  speedup: {speedup:.0f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cleanup engine benchmarks")
+    parser.add_argument("--files", type=int, default=300000, help="synthetic file count")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case")
+    parser.add_argument("--dir", help="existing directory to reuse instead of a temp tree")
+    parser.add_argument("--exclusions", type=int, default=10000, help="exclusion count")
+    parser.add_argument("--only", choices=["walker", "exclusions", "removal", "duplicates"],
+                        help="run a single benchmark")
+    args = parser.parse_args()
+
+    if args.only == "removal":
+        run_removal_benchmark(args.files)
+        return
+    if args.only == "duplicates":
+        run_duplicate_benchmark(args.files)
+        return
+
+    if args.only != "walker":
+        run_exclusion_benchmark(args.exclusions)
+        if args.only == "exclusions":
+            return
+
+    if args.dir:
+        run_walker_benchmark(args.dir, args.repeat)
+        return
+
+    root = tempfile.mkdtemp(prefix="sst_bench_")
+    try:
+        start = time.perf_counter()
+        created = build_synthetic_tree(root, args.files)
+        print(f"Built {created} files in {time.perf_counter() - start:.1f}s under {root}")
+        run_walker_benchmark(root, args.repeat)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""扫描时间预算模块，在驱动器和子目录之间分配总扫描时间并记录中断位置"""
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认的扫描状态保存位置
+STATE_FILE = Path("config/scan_state.json")
+
+# 产出统计的平滑系数，越大越偏重最近一次运行
+_YIELD_SMOOTHING = 0.5
+
+
+class ScanState:
+    """
+    跨运行的扫描状态
+
+    yields记录每个顶层子目录以往的产出（候选字节数/扫描秒数），用于优先
+    扫描高产出目录；frontiers记录预算耗尽时尚未遍历的目录，下次运行从
+    这些目录继续，而不是重新遍历整个子目录；completed记录本轮已扫描完成
+    的子目录，所有子目录都完成后才开始新一轮完整扫描。
+    """
+
+    def __init__(self, state_file: Path = STATE_FILE):
+        self.state_file = state_file
+        self.yields: Dict[str, Dict[str, float]] = {}
+        self.frontiers: Dict[str, List[str]] = {}
+        self.completed: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, state_file: Path = STATE_FILE) -> 'ScanState':
+        """加载扫描状态，文件不存在或损坏时返回空状态"""
+        state = cls(state_file)
+        try:
+            if state_file.exists():
+                with open(state_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                state.yields = data.get("yields", {})
+                state.frontiers = data.get("frontiers", {})
+                state.completed = set(data.get("completed", []))
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load scan state from {state_file}: {e}")
+        return state
+
+    def save(self) -> None:
+        """保存扫描状态，先写临时文件再替换"""
+        with self._lock:
+            data = {"yields": self.yields, "frontiers": self.frontiers,
+                    "completed": sorted(self.completed)}
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.state_file.with_suffix(self.state_file.suffix + ".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.state_file)
+        except OSError as e:
+            logger.error(f"Failed to save scan state to {self.state_file}: {e}")
+
+    def frontier(self, subtree: str) -> Optional[List[str]]:
+        """返回子目录上次中断时未遍历的目录，没有中断记录时返回None"""
+        with self._lock:
+            return self.frontiers.get(subtree)
+
+    def yield_rate(self, subtree: str) -> float:
+        """子目录以往每秒扫描得到的候选字节数，没有记录时为0"""
+        with self._lock:
+            stats = self.yields.get(subtree)
+        if not stats:
+            return 0.0
+        return stats["bytes"] / max(stats["seconds"], 0.001)
+
+    def record(self, subtree: str, files: int, size: int, seconds: float,
+               pending: List[str]) -> None:
+        """
+        记录子目录本次的扫描结果
+
+        参数:
+            pending: 预算耗尽时未遍历的目录，为空表示子目录已扫描完成
+        """
+        with self._lock:
+            stats = self.yields.get(subtree)
+            if stats is None:
+                self.yields[subtree] = {"files": files, "bytes": size, "seconds": seconds}
+            else:
+                for key, value in (("files", files), ("bytes", size), ("seconds", seconds)):
+                    stats[key] = (1 - _YIELD_SMOOTHING) * stats[key] + _YIELD_SMOOTHING * value
+            if pending:
+                self.frontiers[subtree] = pending
+            else:
+                self.frontiers.pop(subtree, None)
+                self.completed.add(subtree)
+
+    def checkpoint(self, subtree: str, frontier: List[str]) -> None:
+        """记录子目录扫描中途的位置，进程意外退出后下次从这里继续"""
+        if not frontier:
+            return
+        with self._lock:
+            self.frontiers[subtree] = frontier
+
+    def remaining(self, subtrees: List[str]) -> List[str]:
+        """
+        返回本轮尚未扫描完成的子目录
+
+        全部完成时开始新一轮扫描，清空完成记录并返回全部子目录
+        """
+        with self._lock:
+            left = [subtree for subtree in subtrees if subtree not in self.completed]
+            if not left:
+                self.completed.clear()
+                return list(subtrees)
+            return left
+
+
+class ScanBudget:
+    """
+    扫描时间预算
+
+    总预算在所有子目录任务之间动态分配：每个任务开始时按剩余时间、
+    并发数和尚未开始的任务数计算自己的截止时间，提前完成的任务留下的
+    时间自动分给后续任务。本轮已完成的子目录不再扫描，其余任务按优先级
+    排序：上次中断的子目录最先继续，其余按以往产出从高到低排列。
+    """
+
+    def __init__(self, total_seconds: float, workers: int):
+        self.total_seconds = total_seconds
+        self.workers = max(1, workers)
+        self.deadline = time.monotonic() + total_seconds
+        self._tasks_left = 0
+        self._lock = threading.Lock()
+
+    def order(self, tasks: List[Tuple[str, str]], state: ScanState) -> List[Tuple[str, str]]:
+        """筛选本轮尚未完成的 (根目录, 子目录) 任务并按优先级排序"""
+        left = set(state.remaining([subtree for _, subtree in tasks]))
+        tasks = [task for task in tasks if task[1] in left]
+        self._tasks_left = len(tasks)
+
+        def priority(task: Tuple[str, str]):
+            subtree = task[1]
+            resumed = state.frontier(subtree) is not None
+            return (not resumed, -state.yield_rate(subtree))
+
+        return sorted(tasks, key=priority)
+
+    def start_task(self) -> Optional[float]:
+        """任务开始时调用，返回该任务的截止时间（time.monotonic），预算已用完时返回None"""
+        with self._lock:
+            tasks_left = max(1, self._tasks_left)
+            self._tasks_left = max(0, self._tasks_left - 1)
+        now = time.monotonic()
+        remaining = self.deadline - now
+        if remaining <= 0:
+            return None
+        # 并行槽位数不超过剩余任务数，剩余时间按槽位平均分给尚未开始的任务
+        slots = min(self.workers, tasks_left)
+        share = remaining * slots / tasks_left
+        return min(self.deadline, now + share)
+
+    def exhausted(self) -> bool:
+        """总预算是否已经用完"""
+        return time.monotonic() >= self.deadline
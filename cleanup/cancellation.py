@@ -0,0 +1,93 @@
+"""协作式取消模块，界面通过取消令牌通知正在运行的清理操作尽快停止"""
+import logging
+import threading
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class OperationCancelled(Exception):
+    """操作已被用户取消"""
+
+
+class CancellationToken:
+    """
+    取消令牌
+
+    由发起操作的一方创建并传给各个工作环节。工作线程在批次之间检查
+    cancelled或调用raise_if_cancelled，不会在删除单个文件的中途停止，
+    因此取消后已完成的工作和统计结果保持一致。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已请求取消"""
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """请求取消，并依次调用已注册的回调"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        logger.info("Cancellation requested")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Cancellation callback failed: {e}")
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """注册取消时调用的回调，已取消时立即调用"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        """移除未被调用的回调，操作结束时调用，避免令牌保留已结束操作的回调"""
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def raise_if_cancelled(self) -> None:
+        """已请求取消时抛出OperationCancelled"""
+        if self._event.is_set():
+            raise OperationCancelled()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """等待取消请求，返回是否已取消"""
+        return self._event.wait(timeout)
+
+
+# 当前由界面启动的操作所使用的令牌
+_ACTIVE_TOKEN: Optional[CancellationToken] = None
+
+
+def set_active_token(token: Optional[CancellationToken]) -> None:
+    """设置当前操作的取消令牌，操作结束后设为None"""
+    global _ACTIVE_TOKEN
+    _ACTIVE_TOKEN = token
+
+
+def get_active_token() -> Optional[CancellationToken]:
+    """获取当前操作的取消令牌"""
+    return _ACTIVE_TOKEN
+
+
+def cancel_active() -> bool:
+    """取消当前操作，没有正在运行的操作时返回False"""
+    token = _ACTIVE_TOKEN
+    if token is None:
+        return False
+    token.cancel()
+    return True
@@ -0,0 +1,122 @@
+"""清理检查点模块，定期保存清理进度，程序中断后可从上次的检查点继续"""
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Optional
+
+from .budget import ScanState
+
+logger = logging.getLogger(__name__)
+
+# 默认的检查点保存位置
+CHECKPOINT_FILE = Path("config/cleanup_checkpoint.json")
+
+# 检查点文件格式版本
+CHECKPOINT_VERSION = 1
+
+
+class CleanupCheckpoint:
+    """
+    清理检查点
+
+    记录当前所处的清理阶段和已删除的文件数量、大小，每隔interval秒保存
+    一次；遍历位置由关联的ScanState记录，与检查点同时保存。清理正常
+    结束时删除检查点文件，文件仍存在即说明上次清理被中断。
+    """
+
+    def __init__(self, checkpoint_file: Path = CHECKPOINT_FILE, interval: float = 15.0):
+        self.checkpoint_file = checkpoint_file
+        self.interval = interval
+        self.stage: Optional[str] = None
+        self.deleted = 0
+        self.bytes_reclaimed = 0
+        self.failed = 0
+        self.started = time.time()
+        self.state: Optional[ScanState] = None
+        self._last_save = time.monotonic()
+
+    @staticmethod
+    def exists(checkpoint_file: Path = CHECKPOINT_FILE) -> bool:
+        """是否存在上次中断留下的检查点"""
+        return checkpoint_file.exists()
+
+    @classmethod
+    def load(cls, checkpoint_file: Path = CHECKPOINT_FILE,
+             interval: float = 15.0) -> Optional['CleanupCheckpoint']:
+        """加载检查点，文件不存在或无效时返回None"""
+        try:
+            with open(checkpoint_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load cleanup checkpoint {checkpoint_file}: {e}")
+            return None
+        if data.get("version") != CHECKPOINT_VERSION:
+            logger.warning(f"Ignoring cleanup checkpoint version {data.get('version')}")
+            return None
+
+        checkpoint = cls(checkpoint_file, interval)
+        checkpoint.stage = data.get("stage")
+        checkpoint.deleted = data.get("deleted", 0)
+        checkpoint.bytes_reclaimed = data.get("bytes_reclaimed", 0)
+        checkpoint.failed = data.get("failed", 0)
+        checkpoint.started = data.get("started", checkpoint.started)
+        return checkpoint
+
+    def attach(self, state: Optional[ScanState]) -> None:
+        """关联正在使用的扫描状态，保存检查点时一并保存遍历位置"""
+        self.state = state
+
+    def enter_stage(self, stage: str) -> None:
+        """进入新的清理阶段并立即保存"""
+        self.stage = stage
+        self.save()
+
+    def record_deletion(self, size: int, ok: bool) -> None:
+        """记录一个文件的删除结果，到达保存间隔时保存检查点"""
+        if ok:
+            self.deleted += 1
+            self.bytes_reclaimed += size
+        else:
+            self.failed += 1
+        self.maybe_save()
+
+    def maybe_save(self) -> None:
+        """距上次保存超过interval秒时保存检查点"""
+        if time.monotonic() - self._last_save >= self.interval:
+            self.save()
+
+    def save(self) -> None:
+        """保存检查点和关联的扫描状态，先写临时文件再替换"""
+        self._last_save = time.monotonic()
+        if self.state is not None:
+            self.state.save()
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "stage": self.stage,
+            "deleted": self.deleted,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "failed": self.failed,
+            "started": self.started,
+            "updated": time.time(),
+        }
+        try:
+            self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.checkpoint_file.with_suffix(self.checkpoint_file.suffix + ".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.checkpoint_file)
+        except OSError as e:
+            logger.error(f"Failed to save cleanup checkpoint {self.checkpoint_file}: {e}")
+
+    def clear(self) -> None:
+        """清理正常完成后删除检查点文件"""
+        try:
+            self.checkpoint_file.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Failed to remove cleanup checkpoint {self.checkpoint_file}: {e}")
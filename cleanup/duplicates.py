@@ -0,0 +1,195 @@
+"""重复文件查找模块，按大小、首尾部分哈希、完整哈希逐级缩小比较范围"""
+import csv
+import mmap
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .cancellation import CancellationToken
+from .progress import ProgressTracker
+from .throttle import IOThrottle
+from .walker import FileRecord
+
+logger = logging.getLogger(__name__)
+
+
+class DuplicateGroup(NamedTuple):
+    """内容相同的一组文件"""
+    size: int
+    digest: str
+    paths: List[str]
+
+    @property
+    def wasted(self) -> int:
+        """只保留一份时可释放的字节数"""
+        return self.size * (len(self.paths) - 1)
+
+
+class DuplicateFinder:
+    """
+    重复文件查找器
+
+    分三级比较：先按文件大小分组，大小唯一的文件不可能重复，无需读取；
+    大小相同的文件再比较首尾各PARTIAL_BYTES字节的哈希；仍然相同的文件
+    才读取完整内容计算哈希。大多数文件在前两级即被排除，实际读取的
+    字节数只占全部文件大小的很小一部分。哈希在线程池中计算，较大的文件
+    通过内存映射读取。
+    """
+
+    # 部分哈希读取的文件首部和尾部字节数
+    PARTIAL_BYTES = 4096
+    # 不小于该大小的文件使用内存映射计算完整哈希
+    MMAP_THRESHOLD = 1024 * 1024
+    # 完整哈希每次处理的字节数
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, min_size: int = 1, max_workers: int = 4,
+                 on_error: Optional[Callable[[str, OSError], None]] = None,
+                 progress: Optional[ProgressTracker] = None,
+                 token: Optional[CancellationToken] = None,
+                 throttle: Optional[IOThrottle] = None):
+        """
+        参数:
+            min_size: 参与比较的最小文件大小（字节），空文件总是被忽略
+            max_workers: 计算哈希的线程数
+            on_error: 读取文件失败时的回调，参数为路径和异常，该文件不再参与比较
+            progress: 进度跟踪器，确认重复的文件计入候选文件数
+            token: 取消令牌，每个文件开始读取前检查，取消后find抛出OperationCancelled
+            throttle: I/O限速器，每次读取前按读取的字节数取用令牌
+        """
+        self.min_size = max(1, min_size)
+        self.max_workers = max_workers
+        self.on_error = on_error
+        self.progress = progress
+        self.token = token
+        self.throttle = throttle
+        self.files_compared = 0
+        self.partial_hashed = 0
+        self.full_hashed = 0
+        self.bytes_read = 0
+        self.bytes_total = 0
+        self._lock = threading.Lock()
+
+    def find(self, records: Iterable[FileRecord]) -> List[DuplicateGroup]:
+        """从扫描记录中找出重复文件，按可释放空间从大到小返回"""
+        by_size: Dict[int, List[str]] = {}
+        for record in records:
+            if not record.is_dir and record.size >= self.min_size:
+                by_size.setdefault(record.size, []).append(record.path)
+                self.bytes_total += record.size
+        candidates = [(size, paths) for size, paths in by_size.items() if len(paths) > 1]
+        by_size.clear()
+        self.files_compared = sum(len(paths) for _, paths in candidates)
+        logger.info(f"Duplicate search: {self.files_compared} files share a size "
+                    f"in {len(candidates)} groups")
+
+        groups: List[DuplicateGroup] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="cleanup-hash") as executor:
+            partial = self._regroup(executor, candidates, self._partial_hash)
+            self.partial_hashed = self.files_compared
+
+            # 首尾部分已覆盖整个文件时，部分哈希即为完整哈希
+            remaining = []
+            for (size, digest), paths in partial:
+                if size <= 2 * self.PARTIAL_BYTES:
+                    groups.append(DuplicateGroup(size, digest, paths))
+                else:
+                    remaining.append((size, paths))
+            self.full_hashed = sum(len(paths) for _, paths in remaining)
+            for (size, digest), paths in self._regroup(executor, remaining, self._full_hash):
+                groups.append(DuplicateGroup(size, digest, paths))
+
+        if self.progress is not None:
+            self.progress.found(sum(len(group.paths) for group in groups))
+        groups.sort(key=lambda group: group.wasted, reverse=True)
+        logger.info(f"Duplicate search found {len(groups)} groups, read {self.bytes_read} "
+                    f"of {self.bytes_total} bytes")
+        return groups
+
+    @staticmethod
+    def write_csv(groups: List[DuplicateGroup], csv_file: Path) -> None:
+        """将重复文件组写入CSV文件，每个文件一行"""
+        csv_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(csv_file, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["group", "size", "digest", "path"])
+            for number, group in enumerate(groups, 1):
+                for path in group.paths:
+                    writer.writerow([number, group.size, group.digest, path])
+        logger.info(f"Duplicate report saved to {csv_file}")
+
+    def _regroup(self, executor: ThreadPoolExecutor, groups: List[Tuple[int, List[str]]],
+                 hash_file: Callable[[str, int], Optional[str]]
+                 ) -> List[Tuple[Tuple[int, str], List[str]]]:
+        """对每组文件计算哈希并按 (大小, 哈希) 重新分组，只保留仍有多个文件的组"""
+        jobs = [(size, path) for size, paths in groups for path in paths]
+        digests = executor.map(lambda job: hash_file(job[1], job[0]), jobs)
+        regrouped: Dict[Tuple[int, str], List[str]] = {}
+        for (size, path), digest in zip(jobs, digests):
+            if digest is not None:
+                regrouped.setdefault((size, digest), []).append(path)
+        if self.token is not None:
+            self.token.raise_if_cancelled()
+        return [(key, paths) for key, paths in regrouped.items() if len(paths) > 1]
+
+    def _partial_hash(self, path: str, size: int) -> Optional[str]:
+        """计算文件首尾各PARTIAL_BYTES字节的哈希，小文件读取全部内容"""
+        if self.token is not None and self.token.cancelled:
+            return None
+        span = self.PARTIAL_BYTES
+        length = size if size <= 2 * span else 2 * span
+        self._acquire(length)
+        try:
+            with open(path, 'rb') as f:
+                if size <= 2 * span:
+                    data = f.read()
+                else:
+                    data = f.read(span)
+                    f.seek(-span, 2)
+                    data += f.read(span)
+        except OSError as e:
+            self._report(path, e)
+            return None
+        with self._lock:
+            self.bytes_read += len(data)
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def _full_hash(self, path: str, size: int) -> Optional[str]:
+        """计算文件完整内容的哈希，大文件使用内存映射读取"""
+        if self.token is not None and self.token.cancelled:
+            return None
+        self._acquire(size)
+        digest = hashlib.blake2b(digest_size=32)
+        try:
+            with open(path, 'rb') as f:
+                if size >= self.MMAP_THRESHOLD:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        view = memoryview(mapped)
+                        try:
+                            for offset in range(0, len(view), self.CHUNK_SIZE):
+                                digest.update(view[offset:offset + self.CHUNK_SIZE])
+                        finally:
+                            view.release()
+                else:
+                    for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                        digest.update(chunk)
+        except (OSError, ValueError) as e:
+            # 文件在扫描后被截断为空时mmap抛出ValueError
+            self._report(path, e if isinstance(e, OSError) else OSError(str(e)))
+            return None
+        with self._lock:
+            self.bytes_read += size
+        return digest.hexdigest()
+
+    def _acquire(self, size: int) -> None:
+        if self.throttle is not None:
+            self.throttle.acquire(1, size)
+
+    def _report(self, path: str, error: OSError) -> None:
+        logger.debug(f"Failed to hash {path}: {error}")
+        if self.on_error is not None:
+            self.on_error(path, error)
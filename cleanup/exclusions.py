@@ -0,0 +1,95 @@
+"""排除项匹配模块，将config/excluded_items.txt编译为路径前缀树"""
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 排除项配置文件，由设置界面维护
+EXCLUDED_ITEMS_FILE = Path("config/excluded_items.txt")
+
+# 前缀树节点中标记“此路径被排除”的键，路径分量不会为空字符串
+_EXCLUDED = ""
+
+Node = Dict[str, "Node"]
+
+
+class ExclusionTrie:
+    """
+    排除项前缀树
+
+    每个排除路径按分隔符拆分为小写分量后插入前缀树。遍历器在进入目录时
+    携带该目录对应的树节点，检查子条目只需一次字典查找；被排除的目录
+    直接跳过，不再向下遍历。路径不区分大小写，且 / 与 \\ 视为相同。
+    """
+
+    def __init__(self, items: Iterable[str] = ()):
+        self._root: Node = {}
+        self._count = 0
+        for item in items:
+            self.add(item)
+
+    @staticmethod
+    def split(path: str) -> List[str]:
+        """将路径规范化为小写分量列表"""
+        return [part for part in path.replace('\\', '/').casefold().split('/')
+                if part and part != '.']
+
+    @classmethod
+    def load(cls, config_file: Path = EXCLUDED_ITEMS_FILE) -> 'ExclusionTrie':
+        """从配置文件加载排除项，文件不存在或读取失败时返回空前缀树"""
+        try:
+            if config_file.exists():
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    return cls(line.strip() for line in f if line.strip())
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"Failed to load excluded items from {config_file}: {e}")
+        return cls()
+
+    def add(self, path: str) -> None:
+        """添加一个排除路径（文件或文件夹）"""
+        parts = self.split(path)
+        if not parts:
+            return
+        node = self._root
+        for part in parts:
+            node = node.setdefault(part, {})
+        if _EXCLUDED not in node:
+            node[_EXCLUDED] = {}
+            self._count += 1
+
+    def node_for(self, path: str) -> Tuple[Optional[Node], bool]:
+        """
+        定位路径对应的树节点
+
+        返回:
+            (节点, 是否被排除)；节点为None表示该路径下不可能再有排除项
+        """
+        if not self._count:
+            return None, False
+        node = self._root
+        for part in self.split(path):
+            node = node.get(part)
+            if node is None:
+                return None, False
+            if _EXCLUDED in node:
+                return node, True
+        return node, False
+
+    @staticmethod
+    def child(node: Node, name: str) -> Tuple[Optional[Node], bool]:
+        """由父目录节点查找子条目节点，返回(节点, 是否被排除)"""
+        child = node.get(name.casefold())
+        if child is None:
+            return None, False
+        return child, _EXCLUDED in child
+
+    def is_excluded(self, path: str) -> bool:
+        """判断路径本身或其任一上级目录是否被排除"""
+        return self.node_for(path)[1]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
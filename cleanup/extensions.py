@@ -0,0 +1,71 @@
+"""文件后缀匹配模块，根据config/file_extensions.txt一次遍历匹配所有后缀"""
+import logging
+from pathlib import Path
+from typing import FrozenSet, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 后缀配置文件，由设置界面维护
+EXTENSIONS_FILE = Path("config/file_extensions.txt")
+
+# 默认清理的文件后缀
+DEFAULT_EXTENSIONS = (".bak", ".dmp", ".log", ".old", ".temp", ".tmp")
+
+
+class ExtensionMatcher:
+    """
+    文件后缀匹配器
+
+    后缀集合在构造时预处理为小写的查找表，匹配时只需取出文件名最后一个
+    点之后的部分做一次集合查找；包含多个点的后缀（如 .log.1）按预先
+    计算的长度再补充查找。无论配置多少个后缀，一次遍历即可完成匹配。
+    """
+
+    def __init__(self, extensions: Iterable[str]):
+        normalized = {self.normalize(ext) for ext in extensions if ext and ext.strip()}
+        self.extensions: FrozenSet[str] = frozenset(normalized)
+        # 含多个点的后缀无法通过最后一个点定位，按长度从长到短单独匹配
+        self._multi_dot_lengths: List[int] = sorted(
+            {len(ext) for ext in normalized if ext.count('.') > 1}, reverse=True
+        )
+
+    @staticmethod
+    def normalize(extension: str) -> str:
+        """统一为小写并带前导点的形式"""
+        extension = extension.strip().lower()
+        if not extension.startswith('.'):
+            extension = '.' + extension
+        return extension
+
+    @classmethod
+    def load(cls, config_file: Path = EXTENSIONS_FILE) -> 'ExtensionMatcher':
+        """从配置文件加载后缀，文件不存在、为空或读取失败时使用默认后缀"""
+        try:
+            if config_file.exists():
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    extensions = [line.strip() for line in f if line.strip()]
+                if extensions:
+                    return cls(extensions)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.error(f"Failed to load file extensions from {config_file}: {e}")
+        return cls(DEFAULT_EXTENSIONS)
+
+    def match(self, name: str) -> Optional[str]:
+        """返回文件名匹配到的后缀，不匹配时返回None"""
+        for length in self._multi_dot_lengths:
+            suffix = name[-length:].lower()
+            if suffix in self.extensions:
+                return suffix
+
+        dot = name.rfind('.')
+        if dot < 0:
+            return None
+        suffix = name[dot:].lower()
+        return suffix if suffix in self.extensions else None
+
+    def __call__(self, name: str) -> bool:
+        """作为ScandirWalker的文件名过滤函数使用"""
+        return self.match(name) is not None
+
+    def __len__(self) -> int:
+        return len(self.extensions)
@@ -0,0 +1,18 @@
+"""清理结果的格式化工具"""
+
+
+def format_size(size: float) -> str:
+    """将字节数格式化为易读的大小，例如 1.5 MB"""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(size) < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_duration(seconds: float) -> str:
+    """将秒数格式化为 H:MM:SS，例如 0:05:07"""
+    seconds = max(0, int(round(seconds)))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
@@ -0,0 +1,153 @@
+"""扫描索引模块，持久化记录目录的修改时间，用于增量清理扫描"""
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 默认的索引数据库位置
+INDEX_FILE = Path("config/scan_index.db")
+
+# 累积多少条更新后写入一次数据库
+_FLUSH_THRESHOLD = 5000
+
+
+class DirectoryState(NamedTuple):
+    """索引中记录的目录状态"""
+    mtime: float
+    subdirs: Tuple[str, ...]
+    candidates: int
+
+
+class ScanIndex:
+    """
+    目录扫描索引
+
+    记录每个已扫描目录的修改时间、子目录名称和上次匹配到的候选文件数量。
+    目录中文件的创建、删除和重命名都会更新目录的修改时间，因此当修改时间
+    未变且上次没有候选文件时，可以跳过列出该目录，只按记录的子目录名继续
+    向下遍历。
+
+    目录修改时间依赖文件系统维护（NTFS、ReFS等），prefixes用于限定只对
+    这些根目录下的路径使用索引。索引签名（例如后缀配置）变化时旧记录作废。
+    """
+
+    def __init__(self, index_file: Path = INDEX_FILE, signature: str = "",
+                 prefixes: Optional[Iterable[str]] = None):
+        """
+        参数:
+            index_file: SQLite数据库文件
+            signature: 匹配规则的签名，与上次不同时清空索引
+            prefixes: 允许使用索引的根目录前缀，None表示全部路径
+        """
+        self.index_file = index_file
+        self.signature = signature
+        self.prefixes = tuple(prefixes) if prefixes is not None else None
+        self.skipped = 0
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._pending: List[Tuple[str, float, str, int]] = []
+        self._lock = threading.Lock()
+
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute(
+            "CREATE TABLE IF NOT EXISTS directories ("
+            "path TEXT PRIMARY KEY, mtime REAL NOT NULL, "
+            "subdirs TEXT NOT NULL, candidates INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._writer.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        row = self._writer.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        if row is None or row[0] != signature:
+            logger.info("Scan index signature changed, discarding previous index")
+            self._writer.execute("DELETE FROM directories")
+            self._writer.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)", (signature,)
+            )
+        self._writer.commit()
+
+    @staticmethod
+    def make_signature(*parts: Iterable[str]) -> str:
+        """由匹配规则生成索引签名"""
+        digest = hashlib.sha1()
+        for part in parts:
+            digest.update("\n".join(sorted(part)).encode('utf-8'))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.index_file), timeout=30,
+                                     check_same_thread=False)
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    def applies_to(self, path: str) -> bool:
+        """路径是否位于允许使用索引的根目录下"""
+        return self.prefixes is None or path.startswith(self.prefixes)
+
+    def lookup(self, path: str) -> Optional[DirectoryState]:
+        """查询目录的上次扫描状态，每个线程使用独立的只读连接"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        row = connection.execute(
+            "SELECT mtime, subdirs, candidates FROM directories WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return None
+        return DirectoryState(row[0], tuple(json.loads(row[1])), row[2])
+
+    def unchanged(self, path: str, mtime: float) -> Optional[DirectoryState]:
+        """目录自上次扫描后未变化且没有候选文件时返回其状态，否则返回None"""
+        if not self.applies_to(path):
+            return None
+        state = self.lookup(path)
+        if state is None or state.mtime != mtime or state.candidates:
+            return None
+        with self._lock:
+            self.skipped += 1
+        return state
+
+    def record(self, path: str, mtime: float, subdirs: List[str], candidates: int) -> None:
+        """记录目录的本次扫描结果，累积到一定数量后批量写入"""
+        if not self.applies_to(path):
+            return
+        with self._lock:
+            self._pending.append((path, mtime, json.dumps(subdirs, ensure_ascii=False), candidates))
+            if len(self._pending) >= _FLUSH_THRESHOLD:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        self._writer.executemany(
+            "INSERT OR REPLACE INTO directories (path, mtime, subdirs, candidates) "
+            "VALUES (?, ?, ?, ?)", self._pending
+        )
+        self._writer.commit()
+        self._pending = []
+
+    def save(self) -> None:
+        """写入所有尚未保存的记录"""
+        with self._lock:
+            self._flush_locked()
+        logger.info(f"Scan index saved, {self.skipped} unchanged directories skipped")
+
+    def close(self) -> None:
+        """保存并关闭所有数据库连接"""
+        self.save()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
@@ -0,0 +1,174 @@
+"""清理计划模块，先遍历生成删除计划，再由执行器按计划删除而无需重新遍历"""
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .cancellation import CancellationToken
+from .progress import ProgressTracker
+from .walker import FileRecord
+
+logger = logging.getLogger(__name__)
+
+# 默认的计划保存位置
+PLAN_FILE = Path("config/cleanup_plan.json")
+
+# 计划文件格式版本
+PLAN_VERSION = 1
+
+
+class PlanEntry(NamedTuple):
+    """计划中的单个待删除文件"""
+    path: str
+    size: int
+    mtime: float
+
+
+class PlanResult(NamedTuple):
+    """计划执行结果"""
+    deleted: int
+    bytes_reclaimed: int
+    skipped: int
+    failed: int
+
+
+class CleanupPlan:
+    """
+    清理计划
+
+    记录候选文件及其大小、修改时间，并按后缀和所在目录汇总数量与大小。
+    计划以紧凑的JSON格式保存，执行时直接读取，不需要再次扫描磁盘。
+    """
+
+    def __init__(self, roots: Optional[List[str]] = None, created: Optional[float] = None):
+        self.roots = list(roots or [])
+        self.created = created if created is not None else time.time()
+        self.entries: List[PlanEntry] = []
+        self.by_extension: Dict[str, List[int]] = {}
+        self.by_directory: Dict[str, List[int]] = {}
+        self.total_bytes = 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[FileRecord],
+                     extension_of: Callable[[str], Optional[str]],
+                     roots: Optional[List[str]] = None) -> 'CleanupPlan':
+        """由扫描记录生成计划，extension_of用于确定每个文件归属的后缀"""
+        plan = cls(roots)
+        for record in records:
+            if not record.is_dir:
+                plan.add(record.path, record.size, record.mtime, extension_of)
+        return plan
+
+    def add(self, path: str, size: int, mtime: float,
+            extension_of: Callable[[str], Optional[str]]) -> None:
+        """添加一个候选文件并更新汇总"""
+        self.entries.append(PlanEntry(path, size, mtime))
+        self.total_bytes += size
+
+        extension = extension_of(os.path.basename(path)) or ""
+        totals = self.by_extension.setdefault(extension, [0, 0])
+        totals[0] += 1
+        totals[1] += size
+
+        totals = self.by_directory.setdefault(os.path.dirname(path), [0, 0])
+        totals[0] += 1
+        totals[1] += size
+
+    def top_directories(self, count: int = 10) -> List[Tuple[str, int, int]]:
+        """按可释放空间排序，返回前count个目录的(目录, 文件数, 字节数)"""
+        ranked = sorted(self.by_directory.items(), key=lambda item: item[1][1], reverse=True)
+        return [(directory, files, size) for directory, (files, size) in ranked[:count]]
+
+    def save(self, plan_file: Path = PLAN_FILE) -> None:
+        """保存计划到JSON文件，先写临时文件再替换，避免留下不完整的计划"""
+        plan_file.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": PLAN_VERSION,
+            "created": self.created,
+            "roots": self.roots,
+            "total_bytes": self.total_bytes,
+            "by_extension": self.by_extension,
+            "by_directory": self.by_directory,
+            "entries": [list(entry) for entry in self.entries],
+        }
+        tmp_file = plan_file.with_suffix(plan_file.suffix + ".tmp")
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_file, plan_file)
+        logger.info(f"Cleanup plan saved: {plan_file} ({len(self.entries)} files)")
+
+    @classmethod
+    def load(cls, plan_file: Path = PLAN_FILE) -> 'CleanupPlan':
+        """从JSON文件加载计划"""
+        with open(plan_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(f"Unsupported cleanup plan version: {data.get('version')}")
+
+        plan = cls(data.get("roots"), data.get("created"))
+        plan.entries = [PlanEntry(path, size, mtime) for path, size, mtime in data["entries"]]
+        plan.total_bytes = data.get("total_bytes", sum(entry.size for entry in plan.entries))
+        plan.by_extension = data.get("by_extension", {})
+        plan.by_directory = data.get("by_directory", {})
+        return plan
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class PlanExecutor:
+    """
+    计划执行器
+
+    按计划逐个删除文件。verify为True时删除前对比文件当前的大小和修改时间，
+    计划生成后被改写过的文件（例如仍在写入的日志）会被跳过。
+    """
+
+    def __init__(self, verify: bool = True):
+        self.verify = verify
+
+    def execute(self, plan: CleanupPlan,
+                delete: Callable[[str, int], bool],
+                on_skipped: Optional[Callable[[PlanEntry], None]] = None,
+                progress: Optional[ProgressTracker] = None,
+                token: Optional[CancellationToken] = None) -> PlanResult:
+        """
+        执行计划
+
+        参数:
+            plan: 要执行的清理计划
+            delete: 删除单个文件的函数，参数为路径和计划中记录的大小（计入限速器和
+                隔离清单），成功时返回True
+            on_skipped: 文件在计划生成后发生变化而被跳过时的回调
+            progress: 进度跟踪器，记录已处理的条目和释放的空间
+            token: 取消令牌，每个文件前检查，取消后返回已完成部分的结果
+        """
+        deleted = reclaimed = skipped = failed = 0
+        for entry in plan.entries:
+            if token is not None and token.cancelled:
+                break
+            if progress is not None:
+                progress.scanned(1)
+            if self.verify and not self._unchanged(entry):
+                skipped += 1
+                if on_skipped is not None:
+                    on_skipped(entry)
+                continue
+            if delete(entry.path, entry.size):
+                deleted += 1
+                reclaimed += entry.size
+                if progress is not None:
+                    progress.deleted(1, entry.size)
+            else:
+                failed += 1
+        return PlanResult(deleted, reclaimed, skipped, failed)
+
+    @staticmethod
+    def _unchanged(entry: PlanEntry) -> bool:
+        try:
+            st = os.stat(entry.path)
+        except OSError:
+            return False
+        return st.st_size == entry.size and st.st_mtime == entry.mtime
@@ -0,0 +1,193 @@
+"""多用户配置文件清理模块，并发清理所有用户的临时目录和回收站"""
+import os
+import stat
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from .cancellation import CancellationToken
+from .exclusions import ExclusionTrie
+from .progress import ProgressTracker
+from .removal import BottomUpRemover, RemovalStats
+from .throttle import IOThrottle
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+logger = logging.getLogger(__name__)
+
+_IS_WINDOWS = os.name == 'nt'
+
+# 不属于真实用户的系统配置文件
+SYSTEM_PROFILES = frozenset(name.casefold() for name in (
+    "Public", "Default", "Default User", "All Users", "defaultuser0"
+))
+
+# 每个配置文件下需要清理的临时目录，相对于配置文件目录
+PROFILE_TEMP_DIRS = (
+    os.path.join("AppData", "Local", "Temp"),
+)
+
+# 驱动器根目录下的回收站目录，其中每个用户一个以SID命名的子目录
+RECYCLE_BIN_DIR = "$Recycle.Bin"
+
+_PROFILE_LIST_KEY = r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\ProfileList"
+
+
+class ProfileTarget(NamedTuple):
+    """属于某个用户的待清理目录"""
+    profile: str
+    path: str
+
+
+def default_profiles_root() -> str:
+    """用户配置文件所在的目录，通常为 C:\\Users"""
+    if winreg is not None:
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, _PROFILE_LIST_KEY) as key:
+                value, _ = winreg.QueryValueEx(key, "ProfilesDirectory")
+                return os.path.expandvars(value)
+        except OSError as e:
+            logger.warning(f"Failed to read profiles directory from registry: {e}")
+    return os.path.join(os.getenv('SystemDrive', 'C:') + os.sep, "Users")
+
+
+def profile_names_by_sid() -> Dict[str, str]:
+    """从注册表读取SID到用户配置文件名的映射，非Windows上为空"""
+    names: Dict[str, str] = {}
+    if winreg is None:
+        return names
+    try:
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, _PROFILE_LIST_KEY) as key:
+            for i in range(winreg.QueryInfoKey(key)[0]):
+                sid = winreg.EnumKey(key, i)
+                try:
+                    with winreg.OpenKey(key, sid) as profile:
+                        path, _ = winreg.QueryValueEx(profile, "ProfileImagePath")
+                    names[sid] = os.path.basename(os.path.expandvars(path))
+                except OSError:
+                    continue
+    except OSError as e:
+        logger.warning(f"Failed to read profile list from registry: {e}")
+    return names
+
+
+def _is_real_directory(entry: os.DirEntry) -> bool:
+    """是否为普通目录，排除符号链接和目录联接（如 Default User）"""
+    try:
+        if not entry.is_dir(follow_symlinks=False):
+            return False
+        if _IS_WINDOWS:
+            attributes = entry.stat(follow_symlinks=False).st_file_attributes
+            return not attributes & stat.FILE_ATTRIBUTE_REPARSE_POINT
+        return True
+    except OSError:
+        return False
+
+
+def profile_temp_targets(profiles_root: str,
+                         temp_dirs: Iterable[str] = PROFILE_TEMP_DIRS) -> List[ProfileTarget]:
+    """列出profiles_root下所有用户配置文件中存在的临时目录"""
+    targets: List[ProfileTarget] = []
+    try:
+        with os.scandir(profiles_root) as it:
+            profiles = sorted((entry for entry in it if _is_real_directory(entry)),
+                              key=lambda entry: entry.name.casefold())
+    except OSError as e:
+        logger.error(f"Failed to list profiles in {profiles_root}: {e}")
+        return targets
+    for entry in profiles:
+        if entry.name.casefold() in SYSTEM_PROFILES:
+            continue
+        for temp_dir in temp_dirs:
+            path = os.path.join(entry.path, temp_dir)
+            if os.path.isdir(path):
+                targets.append(ProfileTarget(entry.name, path))
+    return targets
+
+
+def recycle_bin_targets(roots: Iterable[str],
+                        names: Optional[Dict[str, str]] = None) -> List[ProfileTarget]:
+    """列出各驱动器回收站中每个用户的子目录，names为SID到用户名的映射"""
+    names = names if names is not None else profile_names_by_sid()
+    targets: List[ProfileTarget] = []
+    for root in roots:
+        recycle_bin = os.path.join(root, RECYCLE_BIN_DIR)
+        try:
+            with os.scandir(recycle_bin) as it:
+                entries = [entry for entry in it if _is_real_directory(entry)]
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.error(f"Failed to list recycle bin {recycle_bin}: {e}")
+            continue
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            targets.append(ProfileTarget(names.get(entry.name, entry.name), entry.path))
+    return targets
+
+
+def _add(total: RemovalStats, stats: RemovalStats) -> RemovalStats:
+    return RemovalStats(*(a + b for a, b in zip(total, stats)))
+
+
+class ProfileCleaner:
+    """
+    多用户配置文件清理器
+
+    每个目标目录由一个BottomUpRemover在线程池中清理，与单用户临时目录
+    清理使用相同的自底向上删除方式，结果按用户汇总。进度跟踪器、限速器
+    和取消令牌由所有线程共用。
+    """
+
+    def __init__(self, exclusions: Optional[ExclusionTrie] = None,
+                 on_error: Optional[Callable[[str, OSError], None]] = None,
+                 max_workers: int = 4,
+                 progress: Optional[ProgressTracker] = None,
+                 token: Optional[CancellationToken] = None,
+                 throttle: Optional[IOThrottle] = None):
+        """
+        参数:
+            exclusions: 排除项前缀树
+            on_error: 删除或列出失败时的回调，可能在多个线程中被调用
+            max_workers: 同时清理的目录数量
+            progress: 进度跟踪器
+            token: 取消令牌，取消后各线程停止并返回已完成部分的统计
+            throttle: I/O限速器
+        """
+        self.exclusions = exclusions
+        self.on_error = on_error
+        self.max_workers = max_workers
+        self.progress = progress
+        self.token = token
+        self.throttle = throttle
+
+    def clean(self, targets: List[ProfileTarget]) -> Dict[str, RemovalStats]:
+        """并发清理所有目标目录的内容，返回按用户汇总的统计"""
+        totals: Dict[str, RemovalStats] = {}
+        if not targets:
+            return totals
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(targets)),
+                                thread_name_prefix="cleanup-profile") as executor:
+            results = executor.map(self._clean_one, targets)
+            for target, stats in zip(targets, results):
+                previous = totals.get(target.profile)
+                totals[target.profile] = stats if previous is None else _add(previous, stats)
+        return totals
+
+    def _clean_one(self, target: ProfileTarget) -> RemovalStats:
+        remover = BottomUpRemover(exclusions=self.exclusions, on_error=self.on_error,
+                                  progress=self.progress, token=self.token,
+                                  throttle=self.throttle)
+        stats = remover.remove_contents(target.path)
+        logger.info(f"Cleaned {target.path} for profile {target.profile}: {stats}")
+        return stats
+
+    @staticmethod
+    def total(results: Dict[str, RemovalStats]) -> RemovalStats:
+        """所有用户的合计"""
+        total = RemovalStats(0, 0, 0, 0, 0)
+        for stats in results.values():
+            total = _add(total, stats)
+        return total
@@ -0,0 +1,144 @@
+"""清理进度模块，以限定频率向界面和日志发布结构化的清理进度"""
+import time
+import logging
+import threading
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressSnapshot(NamedTuple):
+    """某一时刻的清理进度"""
+    operation: str
+    files_scanned: int
+    scan_rate: float
+    candidates: int
+    files_deleted: int
+    bytes_reclaimed: int
+    current_directory: str
+    elapsed: float
+    finished: bool
+
+
+ProgressListener = Callable[[ProgressSnapshot], None]
+
+
+class _Subscription:
+    """监听器及其最小通知间隔"""
+    __slots__ = ("callback", "interval", "last")
+
+    def __init__(self, callback: ProgressListener, interval: float):
+        self.callback = callback
+        self.interval = interval
+        self.last = 0.0
+
+    def notify(self, snapshot: ProgressSnapshot, now: float) -> None:
+        if not snapshot.finished and now - self.last < self.interval:
+            return
+        self.last = now
+        try:
+            self.callback(snapshot)
+        except Exception as e:
+            logger.error(f"Progress listener failed: {e}")
+
+
+# 全局监听器，例如界面状态栏，接收所有清理操作的进度
+_LISTENERS: List[_Subscription] = []
+_LISTENERS_LOCK = threading.Lock()
+
+
+def add_listener(callback: ProgressListener, interval: float = 0.5) -> None:
+    """注册全局进度监听器，interval为两次通知之间的最小间隔（秒），结束时总会通知"""
+    with _LISTENERS_LOCK:
+        _LISTENERS.append(_Subscription(callback, interval))
+
+
+def remove_listener(callback: ProgressListener) -> None:
+    """移除全局进度监听器"""
+    with _LISTENERS_LOCK:
+        _LISTENERS[:] = [sub for sub in _LISTENERS if sub.callback != callback]
+
+
+class ProgressTracker:
+    """
+    清理进度跟踪器
+
+    扫描和删除线程只累加计数，每隔interval秒最多生成一次快照并分发给
+    全局监听器和本跟踪器自己的监听器，各监听器再按自己的间隔节流。
+    计数在锁内更新，可由多个扫描线程同时调用。
+    """
+
+    def __init__(self, operation: str,
+                 listeners: Iterable[Tuple[ProgressListener, float]] = (),
+                 interval: float = 0.1):
+        """
+        参数:
+            operation: 操作名称，写入每个快照
+            listeners: 仅接收本次操作进度的 (监听器, 最小间隔) 列表
+            interval: 生成快照的最小间隔（秒）
+        """
+        self.operation = operation
+        self.interval = interval
+        self._subscriptions = [_Subscription(callback, every) for callback, every in listeners]
+        self._started = time.monotonic()
+        self._last_publish = 0.0
+        self._scanned = 0
+        self._candidates = 0
+        self._deleted = 0
+        self._bytes = 0
+        self._directory = ""
+        self._lock = threading.Lock()
+
+    def scanned(self, count: int, directory: Optional[str] = None) -> None:
+        """记录新检查的文件数量和当前所在目录"""
+        with self._lock:
+            self._scanned += count
+            if directory is not None:
+                self._directory = directory
+        self._maybe_publish()
+
+    def found(self, count: int = 1) -> None:
+        """记录新发现的候选文件数量"""
+        with self._lock:
+            self._candidates += count
+        self._maybe_publish()
+
+    def deleted(self, count: int, size: int) -> None:
+        """记录删除的文件数量和释放的字节数"""
+        with self._lock:
+            self._deleted += count
+            self._bytes += size
+        self._maybe_publish()
+
+    def snapshot(self, finished: bool = False) -> ProgressSnapshot:
+        """生成当前进度快照"""
+        elapsed = time.monotonic() - self._started
+        with self._lock:
+            return ProgressSnapshot(
+                self.operation, self._scanned, self._scanned / elapsed if elapsed > 0 else 0.0,
+                self._candidates, self._deleted, self._bytes, self._directory,
+                elapsed, finished
+            )
+
+    def finish(self) -> ProgressSnapshot:
+        """发布最终快照，所有监听器都会收到"""
+        snapshot = self.snapshot(finished=True)
+        self._publish(snapshot, time.monotonic())
+        return snapshot
+
+    def _maybe_publish(self) -> None:
+        now = time.monotonic()
+        if now - self._last_publish < self.interval:
+            return
+        with self._lock:
+            # 其他线程可能刚刚发布过
+            if now - self._last_publish < self.interval:
+                return
+            self._last_publish = now
+        self._publish(self.snapshot(), now)
+
+    def _publish(self, snapshot: ProgressSnapshot, now: float) -> None:
+        with _LISTENERS_LOCK:
+            subscriptions = _LISTENERS + self._subscriptions
+        for subscription in subscriptions:
+            subscription.notify(snapshot, now)
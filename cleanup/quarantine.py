@@ -0,0 +1,243 @@
+"""隔离区模块，将候选文件移动到所在卷的隔离目录而不是直接删除，可按原路径恢复"""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 隔离目录的默认名称，位于每个卷的根目录下
+QUARANTINE_DIR = "$SSTQuarantine"
+
+# 隔离目录中的清单文件名
+MANIFEST_NAME = "manifest.jsonl"
+
+
+class QuarantineEntry(NamedTuple):
+    """隔离区中的单个文件"""
+    id: str
+    path: str
+    size: int
+    time: float
+
+
+def _quarantined(entry: QuarantineEntry) -> Dict:
+    return {"o": "q", "i": entry.id, "p": entry.path, "s": entry.size, "t": entry.time}
+
+
+def _encode(item: Dict) -> str:
+    return json.dumps(item, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+class _Volume:
+    """
+    单个卷的隔离目录及其清单
+
+    清单只追加写入，每行一条记录：q为隔离，r为已恢复。清除过期文件后
+    重写清单，只保留仍在隔离区中的条目。加载时按顺序重放得到当前的
+    条目，以及按原路径（不区分大小写）建立的索引，同一路径多次隔离时
+    恢复最近的一次。
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest = os.path.join(directory, MANIFEST_NAME)
+        self.entries: Dict[str, QuarantineEntry] = {}
+        self.by_path: Dict[str, List[str]] = {}
+        self._handle = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.manifest, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        item = json.loads(line)
+                        if item["o"] == "q":
+                            self.add(QuarantineEntry(item["i"], item["p"], item["s"], item["t"]))
+                        else:
+                            self.discard(item["i"])
+                    except (ValueError, KeyError, TypeError):
+                        # 程序中断时最后一行可能不完整
+                        logger.warning(f"Skipped invalid manifest line in {self.manifest}")
+        except FileNotFoundError:
+            pass
+
+    def add(self, entry: QuarantineEntry) -> None:
+        self.entries[entry.id] = entry
+        self.by_path.setdefault(os.path.normcase(entry.path), []).append(entry.id)
+
+    def discard(self, entry_id: str) -> Optional[QuarantineEntry]:
+        entry = self.entries.pop(entry_id, None)
+        if entry is not None:
+            key = os.path.normcase(entry.path)
+            ids = self.by_path[key]
+            ids.remove(entry_id)
+            if not ids:
+                del self.by_path[key]
+        return entry
+
+    def stored_path(self, entry_id: str) -> str:
+        return os.path.join(self.directory, entry_id)
+
+    def append(self, item: Dict) -> None:
+        if self._handle is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._handle = open(self.manifest, 'a', encoding='utf-8')
+        self._handle.write(_encode(item))
+        self._handle.flush()
+
+    def compact(self) -> None:
+        """只保留仍在隔离区中的条目，重写清单"""
+        self.close()
+        tmp_file = self.manifest + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(_encode(_quarantined(entry)))
+        os.replace(tmp_file, self.manifest)
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+class Quarantine:
+    """
+    隔离区
+
+    文件被重命名到其所在卷根目录下的隔离目录中，同一卷内的重命名只修改
+    目录项，不复制数据。清单按卷保存在隔离目录中，首次访问某个卷时加载
+    到内存，按原路径恢复只需一次字典查找和一次重命名。超过保留期限的
+    文件由purge删除，并压缩清单。
+    """
+
+    def __init__(self, dir_name: str = QUARANTINE_DIR):
+        """
+        参数:
+            dir_name: 每个卷根目录下的隔离目录名称
+        """
+        self.dir_name = dir_name
+        self._volumes: Dict[str, _Volume] = {}
+        self._mounts: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def volume_root(self, path: str) -> str:
+        """文件所在卷的根目录"""
+        path = os.path.abspath(path)
+        drive, _ = os.path.splitdrive(path)
+        if drive:
+            return drive + os.sep
+        # 没有盘符时（非Windows）向上查找挂载点，按目录缓存
+        directory = os.path.dirname(path)
+        mount = self._mounts.get(directory)
+        if mount is None:
+            mount = directory
+            while not os.path.ismount(mount):
+                mount = os.path.dirname(mount)
+            self._mounts[directory] = mount
+        return mount
+
+    def directory_for(self, root: str) -> str:
+        """卷根目录下的隔离目录"""
+        return os.path.join(root, self.dir_name)
+
+    def move(self, path: str, size: int = 0) -> QuarantineEntry:
+        """
+        将文件移入隔离区，与os.unlink一样在失败时抛出OSError
+
+        返回:
+            QuarantineEntry: 隔离记录
+        """
+        with self._lock:
+            volume = self._volume(self.volume_root(path))
+            entry = QuarantineEntry(uuid.uuid4().hex, os.path.abspath(path), size, time.time())
+            os.makedirs(volume.directory, exist_ok=True)
+            os.rename(path, volume.stored_path(entry.id))
+            volume.append(_quarantined(entry))
+            volume.add(entry)
+        return entry
+
+    def find(self, path: str) -> Optional[QuarantineEntry]:
+        """按原路径查找最近一次隔离的记录"""
+        with self._lock:
+            volume = self._volume(self.volume_root(path))
+            ids = volume.by_path.get(os.path.normcase(os.path.abspath(path)))
+            return volume.entries[ids[-1]] if ids else None
+
+    def restore(self, path: str) -> QuarantineEntry:
+        """
+        将最近一次隔离的文件恢复到原路径
+
+        原路径已有文件时抛出FileExistsError，隔离区中没有记录时抛出FileNotFoundError
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            volume = self._volume(self.volume_root(path))
+            ids = volume.by_path.get(os.path.normcase(path))
+            if not ids:
+                raise FileNotFoundError(f"Not in quarantine: {path}")
+            entry = volume.entries[ids[-1]]
+            if os.path.exists(entry.path):
+                raise FileExistsError(f"File already exists: {entry.path}")
+            os.makedirs(os.path.dirname(entry.path), exist_ok=True)
+            os.rename(volume.stored_path(entry.id), entry.path)
+            volume.append({"o": "r", "i": entry.id})
+            volume.discard(entry.id)
+        logger.info(f"Restored from quarantine: {entry.path}")
+        return entry
+
+    def entries(self, roots: List[str]) -> List[QuarantineEntry]:
+        """给定卷上仍在隔离区中的文件，按隔离时间排列"""
+        with self._lock:
+            result = [entry for root in roots for entry in self._volume(root).entries.values()]
+        return sorted(result, key=lambda entry: entry.time)
+
+    def purge(self, roots: List[str], max_age: float) -> Tuple[int, int]:
+        """
+        删除给定卷上隔离超过max_age秒的文件并压缩清单
+
+        返回:
+            (删除的文件数, 释放的字节数)
+        """
+        cutoff = time.time() - max_age
+        purged = reclaimed = 0
+        with self._lock:
+            for root in roots:
+                if not os.path.isdir(self.directory_for(root)):
+                    continue
+                volume = self._volume(root)
+                expired = [entry for entry in volume.entries.values() if entry.time < cutoff]
+                for entry in expired:
+                    try:
+                        os.unlink(volume.stored_path(entry.id))
+                        reclaimed += entry.size
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        logger.error(f"Failed to purge quarantined file {entry.path}: {e}")
+                        continue
+                    volume.discard(entry.id)
+                    purged += 1
+                if expired:
+                    volume.compact()
+        if purged:
+            logger.info(f"Purged {purged} quarantined files, {reclaimed} bytes")
+        return purged, reclaimed
+
+    def close(self) -> None:
+        """关闭所有清单文件"""
+        with self._lock:
+            for volume in self._volumes.values():
+                volume.close()
+
+    def _volume(self, root: str) -> _Volume:
+        key = os.path.normcase(root)
+        volume = self._volumes.get(key)
+        if volume is None:
+            volume = _Volume(self.directory_for(root))
+            self._volumes[key] = volume
+        return volume
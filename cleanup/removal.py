@@ -0,0 +1,197 @@
+"""自底向上的目录清理模块，先删除文件再删除已清空的目录"""
+import os
+import stat
+import time
+import logging
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from .cancellation import CancellationToken
+from .exclusions import ExclusionTrie, Node
+from .progress import ProgressTracker
+from .throttle import IOThrottle
+
+logger = logging.getLogger(__name__)
+
+_IS_WINDOWS = os.name == 'nt'
+
+
+class RemovalStats(NamedTuple):
+    """清理结果统计"""
+    files_removed: int
+    dirs_removed: int
+    bytes_reclaimed: int
+    failed: int
+    pruned: int
+
+
+class _Frame:
+    """待完成的目录：剩余子目录处理完后，未被阻塞的目录会被删除"""
+    __slots__ = ("path", "subdirs", "blocked")
+
+    def __init__(self, path: str, subdirs: List[Tuple[str, Optional[Node]]], blocked: bool):
+        self.path = path
+        self.subdirs = subdirs
+        self.blocked = blocked
+
+
+class BottomUpRemover:
+    """
+    自底向上的目录清理器
+
+    每个目录先完整列出并关闭句柄，再成批删除其中的文件，随后进入子目录；
+    目录只在其全部内容删除成功后才调用rmdir，不会对非空目录产生失败的
+    系统调用。目录中第一个文件删除失败（被占用或无权限）时，认为该目录
+    正在被使用，跳过其余文件和全部子目录，其上级目录也不再尝试删除。
+    """
+
+    def __init__(self, exclusions: Optional[ExclusionTrie] = None,
+                 on_error: Optional[Callable[[str, OSError], None]] = None,
+                 progress: Optional[ProgressTracker] = None,
+                 token: Optional[CancellationToken] = None,
+                 throttle: Optional[IOThrottle] = None):
+        """
+        参数:
+            exclusions: 排除项前缀树，被排除的条目及其上级目录都会保留
+            on_error: 删除或列出失败时的回调，参数为路径和异常
+            progress: 进度跟踪器，每个目录处理完文件后更新一次
+            token: 取消令牌，每个目录开始前检查，取消后返回已完成部分的统计
+            throttle: I/O限速器，列出目录和删除每个文件前取用令牌
+        """
+        self.exclusions = exclusions if exclusions else None
+        self.on_error = on_error
+        self.progress = progress
+        self.token = token
+        self.throttle = throttle
+        self._files = self._dirs = self._bytes = self._failed = self._pruned = 0
+
+    def remove_contents(self, root: str) -> RemovalStats:
+        """删除root下的全部内容，root目录本身保留"""
+        self._files = self._dirs = self._bytes = self._failed = self._pruned = 0
+
+        node: Optional[Node] = None
+        if self.exclusions is not None:
+            node, excluded = self.exclusions.node_for(root)
+            if excluded:
+                return RemovalStats(0, 0, 0, 0, 0)
+
+        subdirs, blocked = self._clear_files(root, node)
+        stack = [_Frame(root, subdirs, blocked)]
+        while stack:
+            if self.token is not None and self.token.cancelled:
+                break
+            frame = stack[-1]
+            if frame.subdirs:
+                path, child = frame.subdirs.pop()
+                subdirs, blocked = self._clear_files(path, child)
+                stack.append(_Frame(path, subdirs, blocked))
+                continue
+
+            stack.pop()
+            if not stack:
+                break
+            parent = stack[-1]
+            if frame.blocked:
+                parent.blocked = True
+                continue
+            try:
+                os.rmdir(frame.path)
+                self._dirs += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                parent.blocked = True
+                self._report(frame.path, e)
+
+        return RemovalStats(self._files, self._dirs, self._bytes, self._failed, self._pruned)
+
+    def _clear_files(self, path: str,
+                     node: Optional[Node]) -> Tuple[List[Tuple[str, Optional[Node]]], bool]:
+        """
+        列出目录并删除其中的文件
+
+        返回:
+            (需要继续处理的子目录, 目录是否无法被清空)
+        """
+        if self.throttle is not None:
+            self.throttle.acquire()
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except FileNotFoundError:
+            return [], False
+        except OSError as e:
+            self._report(path, e)
+            return [], True
+
+        if self.progress is not None:
+            self.progress.scanned(len(entries), path)
+
+        blocked = False
+        files: List[os.DirEntry] = []
+        subdirs: List[Tuple[str, Optional[Node]]] = []
+        for entry in entries:
+            child = None
+            if node is not None:
+                child, excluded = ExclusionTrie.child(node, entry.name)
+                if excluded:
+                    blocked = True
+                    continue
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if self._is_reparse_point(entry):
+                    # 不进入目录联接，保留链接本身
+                    blocked = True
+                    continue
+                subdirs.append((entry.path, child))
+            else:
+                files.append(entry)
+
+        removed = reclaimed = 0
+        pruned = False
+        for i, entry in enumerate(files):
+            try:
+                size = entry.stat(follow_symlinks=False).st_size
+                if self.throttle is not None:
+                    self.throttle.acquire(1, size)
+                    started = time.perf_counter()
+                    os.unlink(entry.path)
+                    self.throttle.observe(time.perf_counter() - started)
+                else:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                # 目录中的文件正在被使用，跳过该目录的其余内容
+                self._report(entry.path, e)
+                self._pruned += len(files) - i - 1 + len(subdirs)
+                logger.debug(f"Pruned in-use directory {path}")
+                pruned = True
+                break
+            removed += 1
+            reclaimed += size
+
+        self._files += removed
+        self._bytes += reclaimed
+        if self.progress is not None and removed:
+            self.progress.deleted(removed, reclaimed)
+        if pruned:
+            return [], True
+
+        # 逆序保存，pop时按列出顺序处理
+        subdirs.reverse()
+        return subdirs, blocked
+
+    def _report(self, path: str, error: OSError) -> None:
+        self._failed += 1
+        if self.on_error is not None:
+            self.on_error(path, error)
+
+    @staticmethod
+    def _is_reparse_point(entry: os.DirEntry) -> bool:
+        if not _IS_WINDOWS:
+            return False
+        attributes = entry.stat(follow_symlinks=False).st_file_attributes
+        return bool(attributes & stat.FILE_ATTRIBUTE_REPARSE_POINT)
@@ -0,0 +1,161 @@
+"""空间占用报告模块，流式统计目录大小并保留最大的K个文件和目录"""
+import os
+import csv
+import heapq
+import logging
+import threading
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from .cancellation import CancellationToken
+from .exclusions import ExclusionTrie
+from .progress import ProgressTracker
+from .throttle import IOThrottle
+from .walker import FileRecord, ScandirWalker
+
+logger = logging.getLogger(__name__)
+
+
+class DirectoryUsage(NamedTuple):
+    """目录及其全部子目录的占用统计"""
+    path: str
+    size: int
+    files: int
+
+
+class _OpenDirectory:
+    """尚未遍历完的目录，子目录完成后将其大小累加到上级目录"""
+    __slots__ = ("path", "size", "files")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = 0
+        self.files = 0
+
+
+class _TopK:
+    """有界最小堆，只保留权重最大的k项"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[int, str, tuple]] = []
+
+    def push(self, weight: int, key: str, item: tuple) -> None:
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (weight, key, item))
+        elif weight > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (weight, key, item))
+
+    def items(self) -> list:
+        """按权重从大到小返回保留的项"""
+        return [item for _, _, item in sorted(self._heap, reverse=True)]
+
+
+class SpaceReport:
+    """
+    空间占用报告
+
+    遍历器按深度优先顺序列出目录，因此进入某个目录时，栈中不是其祖先
+    的目录都已遍历完毕。报告只保存当前目录到根目录这一条路径上的累计
+    大小，目录完成时将大小并入上级目录并放入有界堆。内存占用只与目录
+    深度和k有关，与文件数量无关。
+    """
+
+    def __init__(self, top_k: int = 50,
+                 exclusions: Optional[ExclusionTrie] = None,
+                 progress: Optional[ProgressTracker] = None,
+                 token: Optional[CancellationToken] = None,
+                 throttle: Optional[IOThrottle] = None):
+        """
+        参数:
+            top_k: 保留的最大文件和最大目录的数量
+            exclusions: 排除项前缀树，被排除的目录不计入统计
+            progress: 进度跟踪器，每列出一个目录更新一次
+            token: 取消令牌，取消后保留已统计部分的结果
+            throttle: I/O限速器，传给遍历器
+        """
+        self.top_k = top_k
+        self.exclusions = exclusions
+        self.progress = progress
+        self.token = token
+        self.throttle = throttle
+        self.total_size = 0
+        self.total_files = 0
+        self.roots: List[DirectoryUsage] = []
+        self._files = _TopK(top_k)
+        self._dirs = _TopK(top_k)
+        self._lock = threading.Lock()
+
+    def add_root(self, root: str) -> DirectoryUsage:
+        """统计一个根目录，可由多个线程对不同根目录同时调用"""
+        root = os.path.normpath(root)
+        files = _TopK(self.top_k)
+        dirs = _TopK(self.top_k)
+        stack: List[_OpenDirectory] = []
+
+        def close(directory: _OpenDirectory) -> None:
+            if stack:
+                stack[-1].size += directory.size
+                stack[-1].files += directory.files
+                dirs.push(directory.size, directory.path,
+                          DirectoryUsage(directory.path, directory.size, directory.files))
+
+        def on_directory(path: str, entries: int) -> None:
+            parent = os.path.dirname(path)
+            while stack and stack[-1].path != parent:
+                close(stack.pop())
+            stack.append(_OpenDirectory(path))
+            if self.progress is not None:
+                self.progress.scanned(entries, path)
+
+        walker = ScandirWalker(
+            exclusions=self.exclusions,
+            on_directory=on_directory,
+            token=self.token,
+            throttle=self.throttle
+        )
+        for record in walker.walk(root):
+            current = stack[-1]
+            current.size += record.size
+            current.files += 1
+            files.push(record.size, record.path, record)
+        while len(stack) > 1:
+            close(stack.pop())
+
+        usage = DirectoryUsage(root, stack[0].size, stack[0].files) if stack \
+            else DirectoryUsage(root, 0, 0)
+        logger.info(f"Space report for {root}: {usage.files} files, {usage.size} bytes")
+        with self._lock:
+            self.roots.append(usage)
+            self.total_size += usage.size
+            self.total_files += usage.files
+            for record in files.items():
+                self._files.push(record.size, record.path, record)
+            for directory in dirs.items():
+                self._dirs.push(directory.size, directory.path, directory)
+        return usage
+
+    def largest_files(self) -> List[FileRecord]:
+        """最大的k个文件，从大到小排列"""
+        return self._files.items()
+
+    def largest_directories(self) -> List[DirectoryUsage]:
+        """最大的k个目录（不含根目录），大小包含全部子目录，从大到小排列"""
+        return self._dirs.items()
+
+    def write_csv(self, csv_file: Path) -> None:
+        """将根目录、最大目录和最大文件写入CSV文件"""
+        csv_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(csv_file, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["type", "path", "size", "files"])
+            self._write_rows(writer, "root", sorted(self.roots, key=lambda u: u.path))
+            self._write_rows(writer, "directory", self.largest_directories())
+            for record in self.largest_files():
+                writer.writerow(["file", record.path, record.size, 1])
+        logger.info(f"Space report saved to {csv_file}")
+
+    @staticmethod
+    def _write_rows(writer, kind: str, usages: Iterable[DirectoryUsage]) -> None:
+        for usage in usages:
+            writer.writerow([kind, usage.path, usage.size, usage.files])
@@ -0,0 +1,161 @@
+"""
+清理规则模块，按后缀、最短存在时间、最小大小和路径通配符筛选候选文件
+
+规则从config/cleanup_rules.json加载，格式为规则对象的列表，例如:
+
+    [
+        {"name": "stale logs", "extensions": [".log"], "min_age_days": 7},
+        {"name": "large dumps", "extensions": [".dmp"], "min_size": 10485760,
+         "path": "C:/Windows/*"},
+        {"name": "old files", "min_age_days": 30}
+    ]
+
+未指定extensions的规则适用于file_extensions.txt中配置的全部后缀。文件匹配
+任意一条规则即成为候选文件；规则文件不存在时按原有方式只匹配后缀。
+"""
+import re
+import json
+import time
+import fnmatch
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Pattern
+
+from .extensions import ExtensionMatcher
+from .walker import FileRecord
+
+logger = logging.getLogger(__name__)
+
+# 规则配置文件，与file_extensions.txt放在同一目录
+RULES_FILE = Path("config/cleanup_rules.json")
+
+_SECONDS_PER_DAY = 86400
+
+
+class CleanupRule:
+    """单条清理规则，路径通配符在构造时编译为正则表达式"""
+
+    __slots__ = ("name", "extensions", "min_age", "min_size", "path", "_pattern")
+
+    def __init__(self, name: str = "", extensions: Optional[Iterable[str]] = None,
+                 min_age_days: float = 0, min_size: int = 0, path: Optional[str] = None):
+        """
+        参数:
+            name: 规则名称，用于日志
+            extensions: 适用的后缀，None表示适用于配置的全部后缀
+            min_age_days: 文件最后修改后至少经过的天数
+            min_size: 文件的最小字节数
+            path: 完整路径的通配符，不区分大小写，/ 与 \\ 视为相同
+        """
+        self.name = name
+        self.extensions = (frozenset(ExtensionMatcher.normalize(ext) for ext in extensions)
+                           if extensions is not None else None)
+        self.min_age = float(min_age_days) * _SECONDS_PER_DAY
+        self.min_size = int(min_size)
+        self.path = path
+        self._pattern: Optional[Pattern[str]] = None
+        if path:
+            self._pattern = re.compile(fnmatch.translate(self._normalize_path(path)))
+
+    @staticmethod
+    def _normalize_path(path: str) -> str:
+        return path.replace('\\', '/').casefold()
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CleanupRule':
+        """由配置文件中的规则对象创建规则"""
+        return cls(
+            name=data.get("name", ""),
+            extensions=data.get("extensions"),
+            min_age_days=data.get("min_age_days", 0),
+            min_size=data.get("min_size", 0),
+            path=data.get("path"),
+        )
+
+    def matches(self, record: FileRecord, now: float) -> bool:
+        """按已读取的大小和修改时间判断文件是否符合规则，不产生额外的系统调用"""
+        if record.size < self.min_size:
+            return False
+        if self.min_age and now - record.mtime < self.min_age:
+            return False
+        if self._pattern is not None:
+            return self._pattern.match(self._normalize_path(record.path)) is not None
+        return True
+
+    def describe(self) -> str:
+        """规则的简短描述"""
+        parts = [self.name or "-"]
+        if self.extensions is not None:
+            parts.append(",".join(sorted(self.extensions)))
+        if self.min_age:
+            parts.append(f">= {self.min_age / _SECONDS_PER_DAY:g}d")
+        if self.min_size:
+            parts.append(f">= {self.min_size}B")
+        if self.path:
+            parts.append(self.path)
+        return " ".join(parts)
+
+
+class CleanupRules:
+    """
+    清理规则集
+
+    name_filter是所有规则适用后缀的并集，作为遍历器的文件名过滤，
+    只有文件名匹配的文件才会读取stat；record_filter再按后缀找到适用的
+    规则，用已读取的stat数据逐条判断。没有规则时record_filter为None，
+    遍历行为与只按后缀匹配时完全相同。
+    """
+
+    def __init__(self, rules: List[CleanupRule], extensions: ExtensionMatcher,
+                 now: Optional[float] = None):
+        """
+        参数:
+            rules: 规则列表
+            extensions: file_extensions.txt中配置的后缀
+            now: 计算文件存在时间的基准时间，默认为创建规则集的时间
+        """
+        self.rules = rules
+        self.now = now if now is not None else time.time()
+        self._by_extension: Dict[str, List[CleanupRule]] = {}
+        for rule in rules:
+            applies_to = rule.extensions if rule.extensions is not None else extensions.extensions
+            for extension in applies_to:
+                self._by_extension.setdefault(extension, []).append(rule)
+        if rules:
+            self.name_filter = ExtensionMatcher(self._by_extension)
+        else:
+            self.name_filter = extensions
+
+    @classmethod
+    def load(cls, extensions: ExtensionMatcher,
+             config_file: Path = RULES_FILE) -> 'CleanupRules':
+        """从配置文件加载规则，文件不存在或无效时返回空规则集"""
+        rules: List[CleanupRule] = []
+        try:
+            if config_file.exists():
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                rules = [CleanupRule.from_dict(item) for item in data]
+                logger.info(f"Loaded {len(rules)} cleanup rules from {config_file}")
+        except (OSError, ValueError, TypeError, AttributeError, re.error) as e:
+            logger.error(f"Failed to load cleanup rules from {config_file}: {e}")
+            rules = []
+        return cls(rules, extensions)
+
+    @property
+    def record_filter(self) -> Optional[Callable[[FileRecord], bool]]:
+        """供遍历器使用的记录过滤函数，没有规则时为None"""
+        return self.matches if self.rules else None
+
+    def matches(self, record: FileRecord) -> bool:
+        """文件是否符合任意一条适用于其后缀的规则"""
+        name = record.path[record.path.rfind('\\') + 1:]
+        name = name[name.rfind('/') + 1:]
+        extension = self.name_filter.match(name)
+        for rule in self._by_extension.get(extension, ()):
+            if rule.matches(record, self.now):
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self.rules)
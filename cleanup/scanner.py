@@ -0,0 +1,252 @@
+"""并行清理扫描模块，按驱动器及其顶层子目录并发遍历文件"""
+import os
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .budget import ScanBudget, ScanState
+from .cancellation import CancellationToken
+from .exclusions import ExclusionTrie
+from .index import ScanIndex
+from .progress import ProgressTracker
+from .throttle import IOThrottle
+from .walker import FileRecord, ScandirWalker
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch(NamedTuple):
+    """工作线程提交的一批记录及提交时子目录的遍历位置"""
+    subtree: str
+    records: List[FileRecord]
+    frontier: List[str]
+
+
+class _TaskResult(NamedTuple):
+    """子目录任务的结束消息，排在该任务所有批次之后"""
+    root: str
+    subtree: str
+    files: int
+    size: int
+    seconds: float
+    pending: List[str]
+    out_of_time: bool
+    completed: bool
+
+
+class ParallelScanner:
+    """
+    并行扫描器
+
+    将每个根目录（驱动器）拆分为顶层文件和若干顶层子目录任务，
+    在有界线程池中并发遍历，并将结果合并为单一的候选文件流。
+    给出预算时按预算排序任务并限制每个任务的时长，预算耗尽时未遍历的
+    目录记入扫描状态，下次扫描从这些目录继续。
+
+    扫描状态只在消费方处理完一批记录后才更新，因此随时保存的扫描状态
+    （检查点）都不会跳过已发现但尚未处理的文件。
+    """
+
+    def __init__(self, file_filter: Optional[Callable[[str], bool]] = None,
+                 exclusions: Optional[ExclusionTrie] = None,
+                 index: Optional[ScanIndex] = None,
+                 max_workers: Optional[int] = None,
+                 budget: Optional[float] = None,
+                 state: Optional[ScanState] = None,
+                 on_checkpoint: Optional[Callable[[], None]] = None,
+                 progress: Optional[ProgressTracker] = None,
+                 token: Optional[CancellationToken] = None,
+                 throttle: Optional[IOThrottle] = None,
+                 record_filter: Optional[Callable[[FileRecord], bool]] = None,
+                 batch_size: int = 256, queue_size: int = 64,
+                 flush_interval: float = 1.0):
+        """
+        参数:
+            file_filter: 文件名过滤函数，None表示全部文件
+            exclusions: 排除项前缀树，被排除的目录在进入前即被剪枝
+            index: 扫描索引，用于跳过上次扫描后未变化的目录
+            max_workers: 线程池大小，默认按CPU数量计算
+            budget: 所有根目录共享的总扫描时间（秒），None表示不限制
+            state: 跨运行的扫描状态，用于任务排序和从上次中断处继续
+            on_checkpoint: 扫描状态前进后在消费方线程中调用，可用于定期保存检查点
+            progress: 进度跟踪器，记录检查的文件数、当前目录和候选文件数
+            token: 取消令牌，工作线程在每个目录前、消费方在每批记录前检查，
+                取消后scan抛出OperationCancelled
+            throttle: I/O限速器，所有工作线程共用
+            record_filter: 文件记录过滤函数，例如清理规则，在工作线程中对已读取的stat数据调用
+            batch_size: 每批次提交到结果队列的文件数量
+            queue_size: 结果队列中最多缓存的批次数量
+            flush_interval: 没有凑满一批时，至少每隔多少秒提交一次遍历位置
+        """
+        self.file_filter = file_filter
+        self.exclusions = exclusions
+        self.index = index
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.budget = budget
+        self.state = state if state is not None else ScanState()
+        self.on_checkpoint = on_checkpoint
+        self.progress = progress
+        self.token = token
+        self.throttle = throttle
+        self.record_filter = record_filter
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self.timed_out_roots: Set[str] = set()
+        self.errors: List[Tuple[str, Exception]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def scan(self, roots: List[str]) -> Iterator[FileRecord]:
+        """并发扫描所有根目录，按发现顺序逐个返回匹配的文件记录"""
+        self.timed_out_roots.clear()
+        self.errors.clear()
+        self._stop.clear()
+
+        results: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        budget = ScanBudget(self.budget, self.max_workers) if self.budget is not None else None
+
+        top_files: List[FileRecord] = []
+        tasks = []
+        for root in roots:
+            try:
+                records, subdirs = self._new_walker().list_dir(root, raise_errors=True)
+            except OSError as e:
+                logger.error(f"Failed to list root {root}: {e}")
+                self._record_error(root, e)
+                continue
+            top_files.extend(records)
+            tasks.extend((root, subdir) for subdir in subdirs)
+        if budget is not None:
+            tasks = budget.order(tasks, self.state)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                      thread_name_prefix="cleanup-scan")
+        try:
+            for root, subdir in tasks:
+                executor.submit(self._scan_subtree, root, subdir, budget, results)
+
+            # 子目录任务在后台运行的同时先处理顶层文件
+            if self.progress is not None:
+                self.progress.found(len(top_files))
+            yield from top_files
+
+            pending = len(tasks)
+            while pending:
+                if self.token is not None:
+                    self.token.raise_if_cancelled()
+                item = results.get()
+                if isinstance(item, _TaskResult):
+                    pending -= 1
+                    self._finish_task(item)
+                    continue
+                if self.progress is not None and item.records:
+                    self.progress.found(len(item.records))
+                yield from item.records
+                # 本批记录已处理完，推进该子目录的检查点位置
+                self.state.checkpoint(item.subtree, item.frontier)
+                if self.on_checkpoint is not None:
+                    self.on_checkpoint()
+        finally:
+            # 消费方提前结束时通知所有工作线程停止
+            self._stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._drain(results)
+
+    def _new_walker(self) -> ScandirWalker:
+        on_directory = None
+        if self.progress is not None:
+            progress = self.progress
+
+            def on_directory(path: str, count: int) -> None:
+                progress.scanned(count, path)
+        return ScandirWalker(file_filter=self.file_filter, exclusions=self.exclusions,
+                             index=self.index, on_directory=on_directory, token=self.token,
+                             throttle=self.throttle, record_filter=self.record_filter)
+
+    def _scan_subtree(self, root: str, subdir: str, budget: Optional[ScanBudget],
+                      results: "queue.Queue") -> None:
+        """在工作线程中遍历单个顶层子目录"""
+        started = time.monotonic()
+        deadline = None
+        if budget is not None:
+            deadline = budget.start_task()
+            if deadline is None:
+                self._put(results, _TaskResult(root, subdir, 0, 0, 0.0, [], True, False))
+                return
+
+        batch: List[FileRecord] = []
+        out_of_time = False
+        walker = self._new_walker()
+        last_flush = started
+
+        def should_stop() -> bool:
+            nonlocal out_of_time, batch, last_flush
+            if self._stop.is_set():
+                return True
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                out_of_time = True
+                return True
+            if now - last_flush >= self.flush_interval:
+                # 长时间没有候选文件时也提交遍历位置，使检查点持续前进
+                self._put(results, _Batch(subdir, batch, walker.frontier()))
+                batch = []
+                last_flush = now
+            return False
+
+        files = size = 0
+        completed = False
+        try:
+            for record in walker.walk(subdir, should_stop, self.state.frontier(subdir)):
+                files += 1
+                size += record.size
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    self._put(results, _Batch(subdir, batch, walker.frontier()))
+                    batch = []
+                    last_flush = time.monotonic()
+            # 消费方提前结束时不更新状态，保留上次的中断位置
+            completed = out_of_time or not self._stop.is_set()
+        except Exception as e:
+            logger.error(f"Failed to scan subtree {subdir}: {e}")
+            self._record_error(root, e)
+        finally:
+            if batch:
+                self._put(results, _Batch(subdir, batch, walker.frontier()))
+            self._put(results, _TaskResult(root, subdir, files, size,
+                                           time.monotonic() - started, walker.pending,
+                                           out_of_time, completed))
+
+    def _finish_task(self, result: _TaskResult) -> None:
+        """在消费方处理完子目录任务的全部记录后更新扫描状态"""
+        if result.completed:
+            self.state.record(result.subtree, result.files, result.size,
+                              result.seconds, result.pending)
+        if result.out_of_time:
+            self.timed_out_roots.add(result.root)
+
+    def _put(self, results: "queue.Queue", item) -> None:
+        """向结果队列提交数据，消费方停止后放弃提交"""
+        while not self._stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _record_error(self, root: str, error: Exception) -> None:
+        with self._lock:
+            self.errors.append((root, error))
+
+    @staticmethod
+    def _drain(results: "queue.Queue") -> None:
+        """清空结果队列，释放可能被阻塞的工作线程"""
+        try:
+            while True:
+                results.get_nowait()
+        except queue.Empty:
+            pass
@@ -0,0 +1,143 @@
+"""I/O限速模块，用令牌桶限制清理的每秒操作数和字节数，并可按延迟自适应降速"""
+import time
+import logging
+import threading
+from typing import Optional
+
+from .cancellation import CancellationToken
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    令牌桶
+
+    令牌按rate每秒补充，最多积累capacity个。reserve允许令牌为负，
+    调用方按返回的等待时间休眠，多个线程同时取用时按到达顺序排队，
+    单次取用超过桶容量（例如大文件的字节数）也能正常限速。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        参数:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量，即允许的突发量，默认为一秒的令牌数
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float) -> None:
+        """修改补充速率，已积累的令牌保留"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def reserve(self, amount: float) -> float:
+        """取用amount个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class IOThrottle:
+    """
+    清理I/O限速器
+
+    每个文件系统操作（列出目录、删除文件）前调用acquire，按每秒操作数和
+    每秒字节数两个令牌桶中较长的等待时间休眠。adaptive为True时，操作完成
+    后通过observe报告耗时：平滑后的单次延迟超过target_latency时速率减半，
+    低于目标时逐步恢复到配置的上限（加性增、乘性减），速率不低于上限的
+    min_fraction，保证扫描在繁忙的主机上仍能按可预期的速度完成。
+    """
+
+    # 两次速率调整之间的最小间隔（秒）
+    ADJUST_INTERVAL = 0.25
+
+    def __init__(self, ops_per_sec: Optional[float] = None,
+                 bytes_per_sec: Optional[float] = None,
+                 adaptive: bool = False, target_latency: float = 0.02,
+                 min_fraction: float = 0.1,
+                 token: Optional[CancellationToken] = None):
+        """
+        参数:
+            ops_per_sec: 每秒操作数上限，None表示不限制
+            bytes_per_sec: 每秒处理的字节数上限，None表示不限制
+            adaptive: 是否根据操作延迟自动降速
+            target_latency: 自适应模式的单次操作目标延迟（秒）
+            min_fraction: 自适应降速的下限，占配置上限的比例
+            token: 取消令牌，等待期间取消时立即返回
+        """
+        self.ops_per_sec = ops_per_sec
+        self.bytes_per_sec = bytes_per_sec
+        self.adaptive = adaptive
+        self.target_latency = target_latency
+        self.min_fraction = min_fraction
+        self.token = token
+        self.scale = 1.0
+        self._ops = TokenBucket(ops_per_sec) if ops_per_sec else None
+        self._bytes = TokenBucket(bytes_per_sec) if bytes_per_sec else None
+        self._latency: Optional[float] = None
+        self._last_adjust = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, ops: int = 1, size: int = 0) -> None:
+        """在执行操作前调用，必要时休眠到令牌足够"""
+        delay = self._reserve(ops, size)
+        if delay <= 0:
+            return
+        if self.token is not None:
+            self.token.wait(delay)
+        else:
+            time.sleep(delay)
+
+    def charge(self, ops: int = 0, size: int = 0) -> None:
+        """操作完成后补记额外的用量，不等待，由下一次acquire偿还"""
+        self._reserve(ops, size)
+
+    def observe(self, latency: float) -> None:
+        """报告单次操作的耗时，自适应模式下据此调整速率"""
+        if not self.adaptive:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._latency is None:
+                self._latency = latency
+            else:
+                self._latency = 0.8 * self._latency + 0.2 * latency
+            if now - self._last_adjust < self.ADJUST_INTERVAL:
+                return
+            self._last_adjust = now
+            if self._latency > self.target_latency:
+                scale = max(self.min_fraction, self.scale * 0.5)
+            else:
+                scale = min(1.0, self.scale + 0.05)
+            if scale == self.scale:
+                return
+            if scale < self.scale:
+                logger.info(f"I/O latency {self._latency * 1000:.1f}ms above target, "
+                            f"throttling to {scale:.0%} of configured rate")
+            self.scale = scale
+        if self._ops is not None:
+            self._ops.set_rate(self.ops_per_sec * scale)
+        if self._bytes is not None:
+            self._bytes.set_rate(self.bytes_per_sec * scale)
+
+    def _reserve(self, ops: int, size: int) -> float:
+        delay = 0.0
+        if self._ops is not None and ops:
+            delay = self._ops.reserve(ops)
+        if self._bytes is not None and size:
+            delay = max(delay, self._bytes.reserve(size))
+        return delay
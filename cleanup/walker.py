@@ -0,0 +1,258 @@
+"""基于os.scandir的目录遍历模块，复用DirEntry缓存的类型和stat信息"""
+import os
+import stat
+import time
+import logging
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .cancellation import CancellationToken
+from .exclusions import ExclusionTrie, Node
+from .index import ScanIndex
+from .throttle import IOThrottle
+
+logger = logging.getLogger(__name__)
+
+_IS_WINDOWS = os.name == 'nt'
+
+# 限速时按每多少个目录条目计为一次目录枚举请求
+_ENTRIES_PER_REQUEST = 256
+
+
+class FileRecord(NamedTuple):
+    """遍历得到的轻量文件记录"""
+    path: str
+    size: int
+    mtime: float
+    is_dir: bool
+
+
+# 待遍历目录：(路径, 排除项前缀树节点, 使用索引时的目录修改时间)
+_Pending = Tuple[str, Optional[Node], Optional[float]]
+
+
+class _Listing(NamedTuple):
+    """单个目录的列出结果"""
+    records: List[FileRecord]
+    subdirs: List[_Pending]
+    names: List[str]
+    candidates: int
+    entries: int
+    ok: bool
+
+
+class ScandirWalker:
+    """
+    目录遍历器
+
+    使用os.scandir逐个目录列出条目，文件类型直接取自DirEntry缓存，
+    只有通过文件名过滤的文件才会读取stat信息。在Windows上DirEntry.stat()
+    直接使用目录枚举返回的数据，不产生额外的系统调用。
+    """
+
+    def __init__(self, file_filter: Optional[Callable[[str], bool]] = None,
+                 yield_dirs: bool = False,
+                 exclusions: Optional[ExclusionTrie] = None,
+                 index: Optional[ScanIndex] = None,
+                 on_directory: Optional[Callable[[str, int], None]] = None,
+                 token: Optional[CancellationToken] = None,
+                 throttle: Optional[IOThrottle] = None,
+                 record_filter: Optional[Callable[[FileRecord], bool]] = None):
+        """
+        参数:
+            file_filter: 文件名过滤函数，返回True的文件才会生成记录，None表示全部文件
+            yield_dirs: 是否同时生成目录记录
+            exclusions: 排除项前缀树，被排除的目录不会进入遍历
+            index: 扫描索引，未变化且没有候选文件的目录不再列出，只遍历其子目录
+            on_directory: 每列出一个目录后调用，参数为目录路径和其中的条目数量
+            token: 取消令牌，每个目录开始前检查，取消后的行为与should_stop相同
+            throttle: I/O限速器，每列出一个目录前取用令牌
+            record_filter: 文件记录过滤函数，在文件名过滤和读取stat之后调用，
+                可直接使用记录中的大小和修改时间
+        """
+        self.file_filter = file_filter
+        self.yield_dirs = yield_dirs
+        self.exclusions = exclusions if exclusions else None
+        self.index = index
+        self.on_directory = on_directory
+        self.token = token
+        self.throttle = throttle
+        self.record_filter = record_filter
+        self.errors = 0
+        # 遍历被should_stop中断时尚未遍历的目录，可作为下次遍历的resume_from
+        self.pending: List[str] = []
+        self._stack: List[_Pending] = []
+        self._current: Optional[str] = None
+
+    def walk(self, root: str,
+             should_stop: Optional[Callable[[], bool]] = None,
+             resume_from: Optional[List[str]] = None) -> Iterator[FileRecord]:
+        """
+        遍历根目录下的所有文件
+
+        参数:
+            root: 要遍历的根目录
+            should_stop: 每个目录开始前调用，返回True时停止遍历
+            resume_from: 上次中断时记录的pending目录，给出时只遍历这些目录
+        """
+        self.pending = []
+        self._current = None
+        stack: List[_Pending] = []
+        self._stack = stack
+        for path in reversed(resume_from) if resume_from is not None else (root,):
+            node, excluded = self._root_node(path)
+            if not excluded:
+                stack.append((path, node, self._dir_mtime(path)))
+        while stack:
+            if ((should_stop is not None and should_stop())
+                    or (self.token is not None and self.token.cancelled)):
+                self.pending = self.frontier()
+                return
+            current, node, mtime = stack.pop()
+
+            if mtime is not None:
+                state = self.index.unchanged(current, mtime)
+                if state is not None:
+                    # 目录内容未变化，直接按索引中的子目录名继续遍历
+                    if self.throttle is not None and state.subdirs:
+                        self.throttle.acquire(len(state.subdirs))
+                    stack.extend(reversed(self._known_subdirs(current, node, state.subdirs)))
+                    continue
+
+            listing = self._list_throttled(current, node)
+            if mtime is not None and listing.ok:
+                self.index.record(current, mtime, listing.names, listing.candidates)
+            if self.on_directory is not None:
+                self.on_directory(current, listing.entries)
+            # 逆序入栈，保持与目录列出顺序一致的深度优先遍历
+            stack.extend(reversed(listing.subdirs))
+            self._current = current
+            yield from listing.records
+            self._current = None
+
+    def frontier(self) -> List[str]:
+        """
+        当前的遍历位置，可作为resume_from继续遍历
+
+        在生成某个目录的记录期间调用时包含该目录本身，继续遍历时会重新
+        列出它，保证尚未处理的记录不会丢失
+        """
+        paths = [path for path, _, _ in reversed(self._stack)]
+        if self._current is not None:
+            paths.insert(0, self._current)
+        return paths
+
+    def list_dir(self, path: str,
+                 raise_errors: bool = False) -> Tuple[List[FileRecord], List[str]]:
+        """
+        列出单个目录，返回该目录下的记录和需要继续遍历的子目录
+
+        参数:
+            path: 要列出的目录
+            raise_errors: 目录本身无法列出时是否抛出OSError，默认记录后跳过
+        """
+        node, excluded = self._root_node(path)
+        if excluded:
+            return [], []
+        listing = self._list(path, node, raise_errors)
+        return listing.records, [subdir for subdir, _, _ in listing.subdirs]
+
+    def _root_node(self, path: str) -> Tuple[Optional[Node], bool]:
+        if self.exclusions is None:
+            return None, False
+        return self.exclusions.node_for(path)
+
+    def _dir_mtime(self, path: str) -> Optional[float]:
+        """使用索引时返回目录的修改时间，不使用索引或无法读取时返回None"""
+        if self.index is None:
+            return None
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _known_subdirs(self, path: str, node: Optional[Node],
+                       names: Tuple[str, ...]) -> List[_Pending]:
+        """由索引记录的子目录名生成待遍历项，每个子目录只需一次stat"""
+        subdirs: List[_Pending] = []
+        for name in names:
+            child = None
+            if node is not None:
+                child, excluded = ExclusionTrie.child(node, name)
+                if excluded:
+                    continue
+            subdir = os.path.join(path, name)
+            mtime = self._dir_mtime(subdir)
+            if mtime is not None:
+                subdirs.append((subdir, child, mtime))
+        return subdirs
+
+    def _list_throttled(self, path: str, node: Optional[Node]) -> _Listing:
+        """限速时按条目数量计入目录枚举请求，并报告每次请求的平均耗时"""
+        if self.throttle is None:
+            return self._list(path, node)
+        self.throttle.acquire()
+        started = time.perf_counter()
+        listing = self._list(path, node)
+        requests = 1 + listing.entries // _ENTRIES_PER_REQUEST
+        self.throttle.charge(requests - 1)
+        self.throttle.observe((time.perf_counter() - started) / requests)
+        return listing
+
+    def _list(self, path: str, node: Optional[Node], raise_errors: bool = False) -> _Listing:
+        """列出目录条目，node为该目录在排除项前缀树中的节点"""
+        records: List[FileRecord] = []
+        subdirs: List[_Pending] = []
+        names: List[str] = []
+        candidates = 0
+        count = 0
+        use_index = self.index is not None
+        try:
+            with os.scandir(path) as entries:
+                for count, entry in enumerate(entries, 1):
+                    try:
+                        child = None
+                        excluded = False
+                        if node is not None:
+                            # 只有位于排除路径前缀上的目录才需要逐项检查
+                            child, excluded = ExclusionTrie.child(node, entry.name)
+                        if entry.is_dir(follow_symlinks=False):
+                            if self._is_reparse_point(entry):
+                                continue
+                            # 索引记录全部子目录，排除项变化后无需重建索引
+                            names.append(entry.name)
+                            if excluded:
+                                continue
+                            mtime = None
+                            if use_index or self.yield_dirs:
+                                mtime = entry.stat(follow_symlinks=False).st_mtime
+                            subdirs.append((entry.path, child, mtime if use_index else None))
+                            if self.yield_dirs:
+                                records.append(FileRecord(entry.path, 0, mtime, True))
+                        elif self.file_filter is None or self.file_filter(entry.name):
+                            # 索引按文件名匹配计数，被排除或规则暂不满足的文件以后
+                            # 仍可能成为候选，排除项变化后无需重建索引
+                            candidates += 1
+                            if excluded:
+                                continue
+                            st = entry.stat(follow_symlinks=False)
+                            record = FileRecord(entry.path, st.st_size, st.st_mtime, False)
+                            if self.record_filter is None or self.record_filter(record):
+                                records.append(record)
+                    except OSError:
+                        # 条目在列出后被删除或无法访问
+                        continue
+        except OSError as e:
+            if raise_errors:
+                raise
+            self.errors += 1
+            logger.debug(f"Cannot list directory {path}: {e}")
+            return _Listing(records, subdirs, names, candidates, count, False)
+        return _Listing(records, subdirs, names, candidates, count, True)
+
+    @staticmethod
+    def _is_reparse_point(entry: os.DirEntry) -> bool:
+        """Windows上跳过目录联接等重解析点，避免重复遍历或陷入循环"""
+        if not _IS_WINDOWS:
+            return False
+        attributes = entry.stat(follow_symlinks=False).st_file_attributes
+        return bool(attributes & stat.FILE_ATTRIBUTE_REPARSE_POINT)
@@ -0,0 +1,90 @@
+"""
+External command module for System Safety Tools
+包含外部命令执行相关的模块和类
+"""
+
+from .runner import CommandResult, CommandRunner, get_runner, run_command
+from .progress import CommandProgress, CommandProgressTracker, ProgressParser, parser_for
+from .chkdsk import ChkdskOrchestrator, DriveCheckResult
+from .powershell import (PowerShellPool, configure_powershell_pool, get_powershell_pool,
+                         run_powershell)
+from .parsers import (GpuStatus, ImageHealth, ThreatDetection, parse_dism_health,
+                      parse_nvidia_smi_csv, parse_threat_detections)
+from .health_cache import HealthCache, configure_health_cache, get_health_cache
+from .history import (RuntimeHistory, configure_runtime_history, get_runtime_history,
+                      operation_key)
+
+__all__ = [
+    'CommandResult',
+    'CommandRunner',
+    'get_runner',
+    'run_command',
+    'CommandProgress',
+    'CommandProgressTracker',
+    'ProgressParser',
+    'parser_for',
+    'ChkdskOrchestrator',
+    'DriveCheckResult',
+    'PowerShellPool',
+    'configure_powershell_pool',
+    'get_powershell_pool',
+    'run_powershell',
+    'GpuStatus',
+    'ImageHealth',
+    'ThreatDetection',
+    'parse_dism_health',
+    'parse_nvidia_smi_csv',
+    'parse_threat_detections',
+    'HealthCache',
+    'configure_health_cache',
+    'get_health_cache',
+    'RuntimeHistory',
+    'configure_runtime_history',
+    'get_runtime_history',
+    'operation_key'
+]
+
+# 版本信息
+__version__ = '1.0.0'
+
+# 模块说明
+__doc__ = """
+外部命令模块
+============
+
+这个模块统一执行sfc、DISM、chkdsk、PowerShell等外部命令，包括：
+- 在一个共享的后台事件循环中异步运行多个命令，不为每个命令占用线程
+- 统一的超时处理，超时后结束整个进程树
+- 统一的输出解码（默认cp936），无法解码的字符被替换
+- 通过取消令牌在用户停止操作时结束命令
+- 按行流式读取输出，队列有界，调用方处理不过来时暂停读取
+- 解析sfc、DISM、chkdsk（中英文系统）输出的百分比进度并估算剩余时间
+- 按物理磁盘并发检查多个驱动器并汇总结果
+- 复用常驻的PowerShell进程执行cmdlet，省去每次启动和加载模块的时间
+- 将Defender威胁记录（JSON）、nvidia-smi查询结果（CSV）和DISM健康状态解析为结构化数据
+- 缓存DISM健康检查结果，系统重启或组件服务状态改变后失效
+- 记录每台主机上各操作的耗时，按历史耗时的百分位数调整超时
+- 结构化的执行结果
+
+主要组件：
+- CommandRunner: 命令执行器，run_async在事件循环中执行，run/submit供工具线程调用
+- CommandResult: 执行结果，包含返回码、输出、耗时以及是否超时或被取消
+- get_runner / run_command: 进程内共享的执行器及其快捷调用
+- CommandProgressTracker: 作为on_line回调解析进度，发布CommandProgress给界面
+- ProgressParser / parser_for: 各命令的进度解析器及按命令名称的选择
+- ChkdskOrchestrator: 多驱动器chkdsk调度，同一物理磁盘上的驱动器依次检查
+- DriveCheckResult: 单个驱动器的检查结果
+- PowerShellPool / run_powershell: PowerShell宿主池，按行交换Base64编码的脚本和带标记的输出
+- ThreatDetection / GpuStatus / ImageHealth: 解析后的威胁记录、GPU状态和组件存储状态
+- HealthCache / get_health_cache: 按工具、参数和系统标识保存的健康检查结果，带有效期
+- RuntimeHistory / get_runtime_history: SQLite中的命令耗时历史，run_command的operation参数写入
+
+使用示例：
+    from commands import run_command
+
+    result = run_command(['sfc', '/scannow'], timeout=3600)
+    if result.timed_out:
+        print("timed out")
+    elif not result.ok:
+        print(result.stderr)
+"""
@@ -0,0 +1,341 @@
+"""多驱动器磁盘检查模块，按物理磁盘并发运行chkdsk并汇总各驱动器的结果"""
+import re
+import time
+import asyncio
+import queue
+import struct
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from cleanup.cancellation import CancellationToken, get_active_token
+from .history import get_runtime_history, operation_key
+from .progress import (PROGRESS_CANCELLED, PROGRESS_FAILED, PROGRESS_FINISHED,
+                       PROGRESS_RUNNING, PROGRESS_TIMED_OUT, ChkdskProgressParser,
+                       CommandProgress, publish)
+from .runner import STREAM_BUFFER_LINES, CommandResult, CommandRunner, get_runner
+
+try:
+    import win32file
+except ImportError:
+    win32file = None
+
+logger = logging.getLogger(__name__)
+
+# 查询卷所在物理磁盘的控制码
+IOCTL_VOLUME_GET_VOLUME_DISK_EXTENTS = 0x00560000
+
+# VOLUME_DISK_EXTENTS 头部（区段数及对齐填充）和每个 DISK_EXTENT（磁盘号、起始偏移、长度）
+_EXTENTS_HEADER = struct.Struct('<I4x')
+_DISK_EXTENT = struct.Struct('<I4xqq')
+
+# 一次最多读取的区段数，跨越多个磁盘的动态卷才会有多个区段
+_MAX_EXTENTS = 32
+
+# chkdsk 的退出码
+CHKDSK_NO_ERRORS = 0
+CHKDSK_ERRORS_FIXED = 1
+CHKDSK_CLEANUP_PERFORMED = 2
+CHKDSK_ERRORS_FOUND = 3
+
+# 卷正在使用时chkdsk /f 提出的问题：系统卷询问是否在重启时检查，其他卷询问是否
+# 强制卸除。命令的标准输入已关闭，问题得不到回答，检查不会进行。英文的问题
+# 跨越多行，按最后一行匹配
+PROMPT_SCHEDULE = "schedule"
+PROMPT_DISMOUNT = "dismount"
+
+_PROMPTS = (
+    (PROMPT_SCHEDULE, re.compile(r'the next time the system restarts\?|'
+                                 r'计划在下一?次系统重新启动时检查此卷', re.IGNORECASE)),
+    (PROMPT_DISMOUNT, re.compile(r'force a dismount on this volume|强制卸除', re.IGNORECASE)),
+)
+
+# 等待检查结束时处理输出行的间隔（秒）
+_POLL_INTERVAL = 0.1
+
+
+def volume_prompt(text: str) -> str:
+    """chkdsk输出中卷正在使用时的问题类型，没有时返回空字符串"""
+    for prompt, pattern in _PROMPTS:
+        if pattern.search(text):
+            return prompt
+    return ""
+
+
+class DriveCheckResult(NamedTuple):
+    """
+    单个驱动器的检查结果，result为None表示未能启动或未开始检查；
+    prompt不为空表示卷正在使用，chkdsk提出的问题（PROMPT_*）未被回答，没有检查
+    """
+    drive: str
+    disks: FrozenSet[int]
+    repair: bool
+    result: Optional[CommandResult]
+    error: str = ""
+    prompt: str = ""
+
+    @property
+    def ok(self) -> bool:
+        """检查已完成且未发现需要处理的错误"""
+        return (self.result is not None and not self.result.timed_out
+                and not self.result.cancelled and not self.prompt
+                and self.result.returncode in (CHKDSK_NO_ERRORS, CHKDSK_ERRORS_FIXED,
+                                               CHKDSK_CLEANUP_PERFORMED))
+
+
+def fixed_drives(drives: Iterable[str]) -> List[str]:
+    """只保留本地固定磁盘上的驱动器，光驱、网络驱动器和可移动设备不做检查"""
+    drives = [drive.rstrip('\\/') for drive in drives]
+    if win32file is None:
+        return drives
+    return [drive for drive in drives
+            if win32file.GetDriveType(drive + '\\') == win32file.DRIVE_FIXED]
+
+
+def physical_disks(drive: str) -> FrozenSet[int]:
+    """驱动器所在的物理磁盘编号，无法查询时返回空集合"""
+    if win32file is None:
+        return frozenset()
+    try:
+        handle = win32file.CreateFile(
+            f"\\\\.\\{drive.rstrip(chr(92) + '/')}", 0,
+            win32file.FILE_SHARE_READ | win32file.FILE_SHARE_WRITE,
+            None, win32file.OPEN_EXISTING, 0, None
+        )
+        try:
+            data = win32file.DeviceIoControl(
+                handle, IOCTL_VOLUME_GET_VOLUME_DISK_EXTENTS, None,
+                _EXTENTS_HEADER.size + _MAX_EXTENTS * _DISK_EXTENT.size
+            )
+        finally:
+            handle.Close()
+    except Exception as e:
+        logger.warning(f"Failed to query physical disks of {drive}: {e}")
+        return frozenset()
+    count, = _EXTENTS_HEADER.unpack_from(data)
+    return frozenset(
+        _DISK_EXTENT.unpack_from(data, _EXTENTS_HEADER.size + i * _DISK_EXTENT.size)[0]
+        for i in range(min(count, _MAX_EXTENTS))
+    )
+
+
+class ChkdskOrchestrator:
+    """
+    多驱动器磁盘检查
+
+    只读检查时，位于不同物理磁盘上的驱动器同时检查，最多max_parallel个；
+    同一物理磁盘上的驱动器依次检查，避免磁头在分区之间来回寻道。无法
+    确定所在磁盘的驱动器单独检查，不与其他驱动器同时进行。修复模式需要
+    独占锁定卷，总是依次检查。所有chkdsk进程都在共享命令执行器的事件
+    循环中运行，本类只在调用线程中调度，不另外创建线程。
+    """
+
+    def __init__(self, max_parallel: int = 4, timeout: Optional[float] = None,
+                 runner: Optional[CommandRunner] = None,
+                 token: Optional[CancellationToken] = None,
+                 on_started: Optional[Callable[[str, FrozenSet[int]], None]] = None,
+                 on_finished: Optional[Callable[[DriveCheckResult], None]] = None,
+                 on_output: Optional[Callable[[str, str], None]] = None,
+                 disk_lookup: Callable[[str], FrozenSet[int]] = physical_disks,
+                 interval: float = 0.25, operation: Optional[str] = None,
+                 timeout_for: Optional[Callable[[str], Optional[float]]] = None):
+        """
+        参数:
+            max_parallel: 同时进行只读检查的驱动器数量上限
+            timeout: 每个驱动器的超时秒数
+            runner: 命令执行器，默认使用共享的执行器
+            token: 取消令牌，默认使用界面为当前操作设置的令牌；取消后不再
+                开始新的检查，正在运行的chkdsk被结束
+            on_started: 某个驱动器开始检查时在调用线程中调用
+            on_finished: 某个驱动器检查结束时在调用线程中调用
+            on_output: 收到进度以外的输出行时在调用线程中调用，参数为驱动器和该行
+            disk_lookup: 查询驱动器所在物理磁盘的函数
+            interval: 发布总体进度的最小间隔（秒）
+            operation: 给出时每个驱动器的检查耗时记入执行历史，操作键由operation、
+                驱动器和修复参数组成（见operation_key）
+            timeout_for: 按操作键返回超时的函数，给出operation时代替timeout，
+                使每个驱动器按各自的历史耗时确定超时
+        """
+        self.max_parallel = max(1, max_parallel)
+        self.timeout = timeout
+        self.runner = runner or get_runner()
+        self.token = token if token is not None else get_active_token()
+        self.on_started = on_started
+        self.on_finished = on_finished
+        self.on_output = on_output
+        self.disk_lookup = disk_lookup
+        self.interval = interval
+        self.operation = operation
+        self.timeout_for = timeout_for
+        self._percent: Dict[str, float] = {}
+        self._stages: Dict[str, str] = {}
+        self._prompts: Dict[str, str] = {}
+        self._output: "queue.Queue[Tuple[str, str]]" = queue.Queue(maxsize=STREAM_BUFFER_LINES)
+        self._lock = threading.Lock()
+        self._started = 0.0
+        self._last_publish = 0.0
+
+    def check(self, drives: Iterable[str], repair: bool = False) -> List[DriveCheckResult]:
+        """检查所有驱动器，按给定顺序返回每个驱动器的结果"""
+        plan = [(drive.rstrip('\\/'), self.disk_lookup(drive)) for drive in drives]
+        limit = 1 if repair else self.max_parallel
+        logger.info(f"Checking {len(plan)} drives, repair={repair}, parallel={limit}: "
+                    + ", ".join(f"{drive}{sorted(disks)}" for drive, disks in plan))
+        self._started = time.monotonic()
+        self._percent = {drive: 0.0 for drive, _ in plan}
+
+        results: Dict[str, DriveCheckResult] = {}
+        pending = list(plan)
+        running: Dict[Future, Tuple[str, FrozenSet[int]]] = {}
+        while pending or running:
+            if self.token is None or not self.token.cancelled:
+                for item in list(pending):
+                    if len(running) >= limit:
+                        break
+                    if self._conflicts(item[1], running.values()):
+                        continue
+                    pending.remove(item)
+                    future = self._start(item[0], repair, results, item[1])
+                    if future is not None:
+                        running[future] = item
+            else:
+                for drive, disks in pending:
+                    results[drive] = DriveCheckResult(drive, disks, repair, None, "cancelled")
+                pending.clear()
+            if not running:
+                continue
+            done, _ = wait(list(running), timeout=_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            self._drain_output()
+            for future in done:
+                drive, disks = running.pop(future)
+                try:
+                    result = DriveCheckResult(drive, disks, repair, future.result(),
+                                              prompt=self._prompts.pop(drive, ""))
+                except OSError as e:
+                    result = DriveCheckResult(drive, disks, repair, None, str(e))
+                self._finish(result, results)
+
+        ordered = [results[drive] for drive, _ in plan]
+        self._publish(finished=True, status=self._status(ordered))
+        return ordered
+
+    def _status(self, results: List[DriveCheckResult]) -> str:
+        """所有驱动器都检查完毕且没有问题时为已完成，否则为取消、超时或失败"""
+        if (self.token is not None and self.token.cancelled) or any(
+                result.result is not None and result.result.cancelled for result in results):
+            return PROGRESS_CANCELLED
+        if any(result.result is not None and result.result.timed_out for result in results):
+            return PROGRESS_TIMED_OUT
+        if all(result.ok for result in results):
+            return PROGRESS_FINISHED
+        return PROGRESS_FAILED
+
+    @staticmethod
+    def _conflicts(disks: FrozenSet[int], running: Iterable[Tuple[str, FrozenSet[int]]]) -> bool:
+        """是否与正在检查的驱动器共用物理磁盘，所在磁盘未知时与任何驱动器冲突"""
+        for _, busy in running:
+            if not disks or not busy or disks & busy:
+                return True
+        return False
+
+    def _start(self, drive: str, repair: bool, results: Dict[str, DriveCheckResult],
+               disks: FrozenSet[int]) -> Optional[Future]:
+        args = ['chkdsk', drive] + (['/f'] if repair else [])
+        timeout = self.timeout
+        key = self._operation_key(drive, repair)
+        if key is not None and self.timeout_for is not None:
+            timeout = self.timeout_for(key)
+        if self.on_started is not None:
+            self.on_started(drive, disks)
+        try:
+            return self.runner.submit(args, timeout, self.token,
+                                      on_line=self._line_handler(drive))
+        except OSError as e:
+            self._finish(DriveCheckResult(drive, disks, repair, None, str(e)), results)
+            return None
+
+    def _finish(self, result: DriveCheckResult, results: Dict[str, DriveCheckResult]) -> None:
+        results[result.drive] = result
+        with self._lock:
+            self._percent[result.drive] = 100.0
+            self._stages.pop(result.drive, None)
+        if result.prompt:
+            logger.warning(f"chkdsk {result.drive} was not run: volume in use, "
+                           f"unanswered {result.prompt} prompt")
+        if result.result is not None:
+            logger.info(f"chkdsk {result.drive} exited with {result.result.returncode} "
+                        f"in {result.result.duration:.1f}s")
+            key = self._operation_key(result.drive, result.repair)
+            if key is not None:
+                get_runtime_history().record_result(key, result.result)
+        else:
+            logger.error(f"chkdsk {result.drive} did not run: {result.error}")
+        if self.on_finished is not None:
+            self.on_finished(result)
+        self._publish(finished=False)
+
+    def _operation_key(self, drive: str, repair: bool) -> Optional[str]:
+        """某个驱动器的检查在执行历史中的操作键，未给出operation时为None"""
+        if self.operation is None:
+            return None
+        return operation_key(self.operation, drive, '/f' if repair else None)
+
+    def _line_handler(self, drive: str):
+        """
+        每个驱动器一个解析器，在事件循环中逐行更新该驱动器的进度；其余的行
+        （阶段标题也包括在内）交给调用线程输出
+        """
+        parser = ChkdskProgressParser()
+
+        async def on_line(line: str) -> None:
+            update = parser.parse(line)
+            if update is None or update.percent is None:
+                if self.on_output is not None:
+                    await self._put_output(drive, line)
+                prompt = volume_prompt(line)
+                if prompt:
+                    with self._lock:
+                        self._prompts[drive] = prompt
+            if update is None:
+                return
+            with self._lock:
+                self._stages[drive] = update.stage
+                if update.percent is not None:
+                    self._percent[drive] = update.percent
+            if time.monotonic() - self._last_publish >= self.interval:
+                self._publish(finished=False)
+
+        return on_line
+
+    async def _put_output(self, drive: str, line: str) -> None:
+        """
+        在事件循环中放入一行，队列满时等待调用线程取走
+
+        等待期间只暂停该驱动器的读取，不阻塞事件循环，其他驱动器的检查
+        照常进行，与执行器的有界行队列相同
+        """
+        while True:
+            try:
+                self._output.put_nowait((drive, line))
+                return
+            except queue.Full:
+                await asyncio.sleep(_POLL_INTERVAL / 2)
+
+    def _drain_output(self) -> None:
+        """在调用线程中输出已收到的行"""
+        while True:
+            try:
+                drive, line = self._output.get_nowait()
+            except queue.Empty:
+                return
+            self.on_output(drive, line)
+
+    def _publish(self, finished: bool, status: str = PROGRESS_RUNNING) -> None:
+        """发布所有驱动器的平均进度，阶段显示正在检查的驱动器"""
+        with self._lock:
+            self._last_publish = time.monotonic()
+            percent = sum(self._percent.values()) / len(self._percent) if self._percent else 100.0
+            stage = "  ".join(f"{drive} {stage}".strip() for drive, stage in self._stages.items())
+        publish(CommandProgress("chkdsk", percent, stage, None,
+                                time.monotonic() - self._started, finished, status))
@@ -0,0 +1,230 @@
+"""系统健康检查结果缓存模块，在有效期内且系统未重启、未安装更新时复用DISM的检查结果"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Sequence
+
+from .parsers import HEALTH_UNKNOWN, ImageHealth
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+logger = logging.getLogger(__name__)
+
+# 默认的缓存保存位置
+HEALTH_CACHE_FILE = Path("config/health_cache.json")
+
+# 缓存文件格式版本
+HEALTH_CACHE_VERSION = 1
+
+# Windows 10 起每次启动加一的计数
+_BOOT_ID_KEY = r"SYSTEM\CurrentControlSet\Control\Session Manager\Memory Management\PrefetchParameters"
+
+# 存在时表示组件更新需要重启才能完成
+_REBOOT_PENDING_KEY = (r"SOFTWARE\Microsoft\Windows\CurrentVersion"
+                       r"\Component Based Servicing\RebootPending")
+
+
+class CachedHealth(NamedTuple):
+    """缓存的检查结果"""
+    health: ImageHealth
+    checked_at: float
+
+    @property
+    def age(self) -> float:
+        """距检查时的秒数"""
+        return max(0.0, time.time() - self.checked_at)
+
+
+def _boot_id() -> str:
+    """本次启动的标识，重启后改变"""
+    if winreg is not None:
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, _BOOT_ID_KEY) as key:
+                value, _ = winreg.QueryValueEx(key, "BootId")
+                return f"boot:{value}"
+        except OSError:
+            pass
+    try:
+        with open("/proc/sys/kernel/random/boot_id", 'r', encoding='ascii') as f:
+            return f"boot:{f.read().strip()}"
+    except OSError:
+        pass
+    # 没有启动计数时使用启动时间，按分钟取整以抵消计算误差
+    try:
+        import ctypes
+        get_tick_count = ctypes.windll.kernel32.GetTickCount64
+        get_tick_count.restype = ctypes.c_uint64
+        return f"uptime:{int((time.time() - get_tick_count() / 1000) // 60)}"
+    except (AttributeError, OSError):
+        return "boot:unknown"
+
+
+def _mtime(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _servicing_state() -> str:
+    """
+    组件服务状态的标识
+
+    安装或卸载更新会修改 servicing\\Packages 目录；待重启完成的操作
+    留下 WinSxS\\pending.xml 和 RebootPending 注册表项。
+    """
+    windir = os.environ.get("SystemRoot") or os.environ.get("windir") or r"C:\Windows"
+    pending = _mtime(os.path.join(windir, "WinSxS", "pending.xml"))
+    packages = _mtime(os.path.join(windir, "servicing", "Packages"))
+    reboot_pending = False
+    if winreg is not None:
+        try:
+            winreg.CloseKey(winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, _REBOOT_PENDING_KEY))
+            reboot_pending = True
+        except OSError:
+            pass
+    return f"packages:{packages} pending:{pending} reboot:{int(reboot_pending)}"
+
+
+def system_fingerprint() -> str:
+    """启动标识和组件服务状态，其中任一改变后缓存的结果不再可信"""
+    return f"{_boot_id()} {_servicing_state()}"
+
+
+def cache_key(args: Sequence[str]) -> str:
+    """按工具名称和参数生成缓存键，不区分大小写和路径"""
+    tool = re.split(r'[\\/]', args[0])[-1].lower()
+    if tool.endswith('.exe'):
+        tool = tool[:-4]
+    return " ".join([tool] + [arg.lower() for arg in args[1:]])
+
+
+class HealthCache:
+    """
+    DISM等健康检查的结果缓存
+
+    结果按工具和参数保存，同时记录检查时的系统标识。超过ttl秒、系统
+    重启过或组件服务状态改变（安装了更新、有待重启的操作）的结果都不
+    再返回。无法判断状态的结果不缓存。执行修复等会改变系统状态的操作
+    后应调用invalidate。缓存保存在JSON文件中，程序重新启动后仍然有效。
+    """
+
+    def __init__(self, cache_file: Path = HEALTH_CACHE_FILE, ttl: float = 12 * 3600,
+                 enabled: bool = True):
+        """
+        参数:
+            cache_file: 缓存文件路径
+            ttl: 结果的有效期（秒）
+            enabled: 为False时不读取也不保存任何结果
+        """
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: Optional[Dict[str, dict]] = None
+        self._lock = threading.Lock()
+
+    def get(self, args: Sequence[str]) -> Optional[CachedHealth]:
+        """返回仍然有效的结果，没有时返回None"""
+        if not self.enabled:
+            return None
+        key = cache_key(args)
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None:
+                return None
+            age = time.time() - entry["checked_at"]
+            if age < 0 or age > self.ttl:
+                reason = "expired"
+            elif entry["fingerprint"] != system_fingerprint():
+                reason = "system changed"
+            else:
+                return CachedHealth(ImageHealth(entry["state"], entry["message"]),
+                                    entry["checked_at"])
+            logger.info(f"Discarding cached result of '{key}': {reason}")
+            del self._entries[key]
+            self._save()
+            return None
+
+    def put(self, args: Sequence[str], health: ImageHealth) -> None:
+        """保存一次检查的结果"""
+        if not self.enabled or health.state == HEALTH_UNKNOWN:
+            return
+        key = cache_key(args)
+        with self._lock:
+            self._load()[key] = {
+                "state": health.state,
+                "message": health.message,
+                "checked_at": time.time(),
+                "fingerprint": system_fingerprint(),
+            }
+            self._save()
+
+    def invalidate(self, args: Optional[Sequence[str]] = None) -> None:
+        """删除某个命令的结果，args为None时删除所有结果"""
+        with self._lock:
+            entries = self._load()
+            if args is None:
+                entries.clear()
+            else:
+                entries.pop(cache_key(args), None)
+            self._save()
+        logger.info(f"Health cache invalidated: {cache_key(args) if args else 'all'}")
+
+    def _load(self) -> Dict[str, dict]:
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return self._entries
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load health cache {self.cache_file}: {e}")
+            return self._entries
+        if data.get("version") != HEALTH_CACHE_VERSION:
+            logger.warning(f"Ignoring health cache version {data.get('version')}")
+            return self._entries
+        self._entries = {key: entry for key, entry in data.get("entries", {}).items()
+                         if {"state", "message", "checked_at", "fingerprint"} <= entry.keys()}
+        return self._entries
+
+    def _save(self) -> None:
+        """先写临时文件再替换"""
+        data = {"version": HEALTH_CACHE_VERSION, "entries": self._entries or {}}
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(self.cache_file.suffix + ".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.error(f"Failed to save health cache {self.cache_file}: {e}")
+
+
+_CACHE: Optional[HealthCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def configure_health_cache(**options) -> HealthCache:
+    """按给定参数（同HealthCache）创建共享的结果缓存"""
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = HealthCache(**options)
+        return _CACHE
+
+
+def get_health_cache() -> HealthCache:
+    """获取共享的结果缓存，未配置时使用默认参数创建"""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = HealthCache()
+        return _CACHE
@@ -0,0 +1,177 @@
+"""命令耗时历史模块，记录每台主机上外部命令的执行时间，并据此估计合适的超时"""
+import math
+import time
+import socket
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# 默认的历史数据库位置
+HISTORY_FILE = Path("config/command_history.db")
+
+
+class RuntimeSample(NamedTuple):
+    """一次命令执行的耗时，timed_out为True时实际耗时至少为duration"""
+    duration: float
+    timed_out: bool
+    finished_at: float
+
+
+def operation_key(operation: str, *details: Optional[str]) -> str:
+    """
+    执行历史中的操作键，由操作类型和影响耗时的参数组成，例如 "chkdsk c: /f"
+
+    只读检查和修复、不同的驱动器或子命令耗时差别很大，分别记录和估计。
+    空的参数被忽略，参数不区分大小写
+    """
+    return " ".join([operation] + [detail.strip().lower() for detail in details
+                                   if detail and detail.strip()])
+
+
+def percentile(values: List[float], q: float) -> float:
+    """最近秩法计算百分位数，q取0到1之间"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class RuntimeHistory:
+    """
+    命令耗时历史
+
+    按主机名和操作键（见operation_key）记录每次执行的耗时，被取消的执行
+    不记录。每个操作键只保留最近max_samples次。
+
+    suggest_timeout按最近耗时的百分位数乘以余量给出超时：快的机器上
+    卡住的命令能较早结束，慢的机器不会因固定超时而误判。样本不足时
+    使用配置的固定值；最近一次超时则至少加倍，避免连续误判。
+    """
+
+    def __init__(self, history_file: Path = HISTORY_FILE, max_samples: int = 50,
+                 host: Optional[str] = None):
+        """
+        参数:
+            history_file: SQLite数据库文件
+            max_samples: 每台主机每个操作键保留的记录数
+            host: 主机名，默认为本机名称
+        """
+        self.history_file = history_file
+        self.max_samples = max(1, max_samples)
+        self.host = host or socket.gethostname()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.history_file.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.history_file), timeout=30,
+                                         check_same_thread=False)
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "host TEXT NOT NULL, operation TEXT NOT NULL, duration REAL NOT NULL, "
+                "timed_out INTEGER NOT NULL, finished_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS runs_by_operation "
+                "ON runs (host, operation, finished_at)"
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def record(self, operation: str, duration: float, timed_out: bool = False) -> None:
+        """记录一次执行，并删除超出保留数量的旧记录"""
+        now = time.time()
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT INTO runs (host, operation, duration, timed_out, finished_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self.host, operation, duration, int(timed_out), now)
+                )
+                connection.execute(
+                    "DELETE FROM runs WHERE host = ? AND operation = ? AND rowid NOT IN ("
+                    "SELECT rowid FROM runs WHERE host = ? AND operation = ? "
+                    "ORDER BY finished_at DESC LIMIT ?)",
+                    (self.host, operation, self.host, operation, self.max_samples)
+                )
+                connection.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to record runtime of {operation}: {e}")
+
+    def record_result(self, operation: str, result) -> None:
+        """记录命令的执行结果（CommandResult），被取消的不记录"""
+        if result.cancelled:
+            return
+        self.record(operation, result.duration, result.timed_out)
+
+    def samples(self, operation: str) -> List[RuntimeSample]:
+        """本机该操作最近的执行记录，最新的在前"""
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT duration, timed_out, finished_at FROM runs "
+                    "WHERE host = ? AND operation = ? ORDER BY finished_at DESC LIMIT ?",
+                    (self.host, operation, self.max_samples)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read runtime history of {operation}: {e}")
+            return []
+        return [RuntimeSample(row[0], bool(row[1]), row[2]) for row in rows]
+
+    def suggest_timeout(self, operation: str, default: float, q: float = 0.95,
+                        margin: float = 1.5, min_samples: int = 5,
+                        min_factor: float = 0.25, max_factor: float = 4) -> float:
+        """
+        根据历史耗时估计超时
+
+        参数:
+            operation: 操作键
+            default: 配置的固定超时，样本不足时使用
+            q: 使用的百分位数
+            margin: 百分位数乘以的余量
+            min_samples: 开始估计所需的最少样本数
+            min_factor: 超时下限为default的倍数
+            max_factor: 超时上限为default的倍数
+        """
+        samples = self.samples(operation)
+        if len(samples) < min_samples:
+            return default
+        timeout = max(percentile([sample.duration for sample in samples], q) * margin,
+                      default * min_factor)
+        if samples[0].timed_out:
+            timeout = max(timeout, samples[0].duration * 2)
+        return min(timeout, default * max_factor)
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+_HISTORY: Optional[RuntimeHistory] = None
+_HISTORY_LOCK = threading.Lock()
+
+
+def configure_runtime_history(**options) -> RuntimeHistory:
+    """按给定参数（同RuntimeHistory）创建共享的耗时历史"""
+    global _HISTORY
+    with _HISTORY_LOCK:
+        _HISTORY = RuntimeHistory(**options)
+        return _HISTORY
+
+
+def get_runtime_history() -> RuntimeHistory:
+    """获取共享的耗时历史，未配置时使用默认参数创建"""
+    global _HISTORY
+    with _HISTORY_LOCK:
+        if _HISTORY is None:
+            _HISTORY = RuntimeHistory()
+        return _HISTORY
@@ -0,0 +1,253 @@
+"""命令输出解析模块，将Defender、nvidia-smi和DISM的输出转换为结构化的结果"""
+import csv
+import io
+import json
+import logging
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Windows Defender 威胁检测记录
+# ---------------------------------------------------------------------------
+
+# 以JSON输出威胁检测记录，同时从Get-MpThreat取得威胁名称；
+# 使用-InputObject保证只有一条或没有记录时也输出数组
+THREAT_DETECTION_SCRIPT = r'''
+$names = @{}
+Get-MpThreat | ForEach-Object { $names[[string]$_.ThreatID] = $_.ThreatName }
+$detections = @(Get-MpThreatDetection | ForEach-Object {
+    [pscustomobject]@{
+        ThreatID = [string]$_.ThreatID
+        ThreatName = $names[[string]$_.ThreatID]
+        ThreatStatusID = [int]$_.ThreatStatusID
+        ActionSuccess = [bool]$_.ActionSuccess
+        InitialDetectionTime = if ($_.InitialDetectionTime) { $_.InitialDetectionTime.ToString('o') } else { $null }
+        Resources = @($_.Resources)
+    }
+})
+ConvertTo-Json -InputObject $detections -Depth 3 -Compress
+'''
+
+# ThreatStatusID 的含义
+THREAT_STATUS = {
+    0: "Unknown",
+    1: "Detected",
+    2: "Cleaned",
+    3: "Quarantined",
+    4: "Removed",
+    5: "Allowed",
+    6: "Blocked",
+    102: "QuarantineFailed",
+    103: "RemoveFailed",
+    104: "AllowFailed",
+    105: "Abandoned",
+    107: "BlockedFailed",
+}
+
+# 已经处理完毕、不需要再清除的状态
+_RESOLVED_STATUS = frozenset((2, 3, 4, 5, 6))
+
+
+class ThreatDetection(NamedTuple):
+    """一条威胁检测记录"""
+    threat_id: str
+    name: str
+    status_id: int
+    action_success: bool
+    detected_at: Optional[datetime]
+    resources: Tuple[str, ...]
+
+    @property
+    def status(self) -> str:
+        """状态名称"""
+        return THREAT_STATUS.get(self.status_id, str(self.status_id))
+
+    @property
+    def active(self) -> bool:
+        """威胁是否仍未处理，需要清除"""
+        return self.status_id not in _RESOLVED_STATUS
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """解析 .NET 'o' 格式的时间，小数秒最多保留6位"""
+    if not value:
+        return None
+    match = re.match(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(\.\d+)?(Z|[+-]\d{2}:\d{2})?$', value)
+    if match is None:
+        return None
+    text = match.group(1) + (match.group(2) or '')[:7]
+    zone = match.group(3) or ''
+    text += '+00:00' if zone == 'Z' else zone
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def parse_threat_detections(text: str) -> List[ThreatDetection]:
+    """
+    解析THREAT_DETECTION_SCRIPT输出的JSON
+
+    没有输出时返回空列表，输出不是有效的JSON时抛出ValueError
+    """
+    text = text.strip()
+    if not text:
+        return []
+    items = json.loads(text)
+    if isinstance(items, dict):
+        items = [items]
+    detections = []
+    for item in items:
+        resources = item.get("Resources") or []
+        if isinstance(resources, str):
+            resources = [resources]
+        detections.append(ThreatDetection(
+            str(item.get("ThreatID") or ""),
+            item.get("ThreatName") or "",
+            int(item.get("ThreatStatusID") or 0),
+            bool(item.get("ActionSuccess")),
+            _parse_timestamp(item.get("InitialDetectionTime")),
+            tuple(str(resource) for resource in resources)
+        ))
+    return detections
+
+
+# ---------------------------------------------------------------------------
+# nvidia-smi 与 wmic 显卡信息
+# ---------------------------------------------------------------------------
+
+# nvidia-smi 查询的字段，顺序与GpuStatus一致
+NVIDIA_SMI_FIELDS = (
+    "index", "name", "driver_version", "temperature.gpu", "utilization.gpu",
+    "memory.used", "memory.total", "power.draw", "power.limit",
+)
+
+
+def nvidia_smi_query_args() -> List[str]:
+    """以CSV格式查询各GPU状态的nvidia-smi参数"""
+    return ['nvidia-smi', f"--query-gpu={','.join(NVIDIA_SMI_FIELDS)}",
+            '--format=csv,noheader,nounits']
+
+
+class GpuStatus(NamedTuple):
+    """一块NVIDIA GPU的状态，驱动不支持的字段为None"""
+    index: int
+    name: str
+    driver_version: str
+    temperature: Optional[float]
+    utilization: Optional[float]
+    memory_used: Optional[float]
+    memory_total: Optional[float]
+    power_draw: Optional[float]
+    power_limit: Optional[float]
+
+    @property
+    def memory_percent(self) -> Optional[float]:
+        """显存占用百分比"""
+        if self.memory_used is None or not self.memory_total:
+            return None
+        return self.memory_used * 100 / self.memory_total
+
+
+def _number(value: str) -> Optional[float]:
+    """nvidia-smi 对不支持的字段输出 [N/A] 或 [Not Supported]"""
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_nvidia_smi_csv(text: str) -> List[GpuStatus]:
+    """解析nvidia_smi_query_args()的输出，单位分别为 °C、%、MiB、W"""
+    gpus = []
+    for row in csv.reader(io.StringIO(text.strip()), skipinitialspace=True):
+        if len(row) < len(NVIDIA_SMI_FIELDS):
+            if row:
+                logger.warning(f"Unexpected nvidia-smi row: {row}")
+            continue
+        values = [value.strip() for value in row]
+        gpus.append(GpuStatus(
+            int(values[0]), values[1], values[2],
+            *(_number(value) for value in values[3:len(NVIDIA_SMI_FIELDS)])
+        ))
+    return gpus
+
+
+def wmic_video_controller_args() -> List[str]:
+    """以CSV格式查询显卡名称、驱动版本和显存的wmic参数"""
+    return ['wmic', 'path', 'win32_VideoController', 'get',
+            'Name,DriverVersion,AdapterRAM', '/format:csv']
+
+
+class VideoController(NamedTuple):
+    """wmic报告的显卡"""
+    name: str
+    driver_version: str
+    adapter_ram: Optional[int]
+
+
+def parse_wmic_video_controllers(text: str) -> List[VideoController]:
+    """解析wmic_video_controller_args()的输出，首个非空行为表头"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return []
+    controllers = []
+    for row in csv.DictReader(lines):
+        name = (row.get("Name") or "").strip()
+        if not name:
+            continue
+        ram = (row.get("AdapterRAM") or "").strip()
+        controllers.append(VideoController(
+            name, (row.get("DriverVersion") or "").strip(),
+            int(ram) if ram.isdigit() else None
+        ))
+    return controllers
+
+
+# ---------------------------------------------------------------------------
+# DISM 组件存储健康状态
+# ---------------------------------------------------------------------------
+
+HEALTH_HEALTHY = "healthy"
+HEALTH_REPAIRABLE = "repairable"
+HEALTH_NOT_REPAIRABLE = "not_repairable"
+HEALTH_UNKNOWN = "unknown"
+
+# 按顺序匹配，DISM使用/English时为英文，中文匹配用于未加该参数的输出
+_HEALTH_PATTERNS = (
+    (HEALTH_NOT_REPAIRABLE, re.compile(r'component store cannot be repaired|组件存储无法修复',
+                                       re.IGNORECASE)),
+    (HEALTH_REPAIRABLE, re.compile(r'component store is repairable|组件存储可以修复',
+                                   re.IGNORECASE)),
+    (HEALTH_HEALTHY, re.compile(r'No component store corruption detected|未检测到组件存储损坏',
+                                re.IGNORECASE)),
+)
+
+
+class ImageHealth(NamedTuple):
+    """DISM /CheckHealth 或 /ScanHealth 报告的组件存储状态"""
+    state: str
+    message: str
+
+    @property
+    def needs_repair(self) -> bool:
+        """是否应执行 /RestoreHealth，无法判断状态时也修复"""
+        return self.state in (HEALTH_REPAIRABLE, HEALTH_UNKNOWN)
+
+
+def dism_health_args(operation: str = '/CheckHealth') -> List[str]:
+    """查询组件存储状态的DISM参数，/English使输出与系统语言无关"""
+    return ['DISM.exe', '/English', '/Online', '/Cleanup-Image', operation]
+
+
+def parse_dism_health(text: str) -> ImageHealth:
+    """从DISM输出中找出组件存储状态"""
+    for line in text.splitlines():
+        for state, pattern in _HEALTH_PATTERNS:
+            if pattern.search(line):
+                return ImageHealth(state, line.strip())
+    return ImageHealth(HEALTH_UNKNOWN, "")
@@ -0,0 +1,384 @@
+"""PowerShell宿主池模块，复用常驻的PowerShell进程执行Defender等cmdlet"""
+import re
+import time
+import uuid
+import base64
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from cleanup.cancellation import CancellationToken, get_active_token
+from .history import get_runtime_history
+from .runner import CommandResult, CommandRunner, get_runner
+
+logger = logging.getLogger(__name__)
+
+# 每个命令输出结束时宿主写出的标记行：##SST-END <请求编号> [<状态>]
+END_MARKER = "##SST-END"
+_END_LINE = re.compile(r'##SST-END (\S+)(?: (-?\d+))?\s*$')
+
+# 宿主进程中运行的循环：每行读取一个请求 "<编号> <Base64编码的UTF-8脚本>"，
+# 执行后先在标准错误、再在标准输出写出结束标记，标准输出的标记带有状态码
+HOST_SCRIPT = r'''
+$ErrorActionPreference = 'Continue'
+$ProgressPreference = 'SilentlyContinue'
+[Console]::OutputEncoding = [Text.Encoding]::UTF8
+while ($null -ne ($line = [Console]::In.ReadLine())) {
+    $parts = $line.Split(' ', 2)
+    $id = $parts[0]
+    $status = 0
+    try {
+        $script = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($parts[1]))
+        $global:LASTEXITCODE = 0
+        $records = @(& ([ScriptBlock]::Create($script)) 2>&1)
+        $errors = @($records | Where-Object { $_ -is [System.Management.Automation.ErrorRecord] })
+        $others = @($records | Where-Object { $_ -isnot [System.Management.Automation.ErrorRecord] })
+        if ($others.Count) { [Console]::Out.Write(($others | Out-String -Width 4096)) }
+        foreach ($e in $errors) { [Console]::Error.WriteLine($e.ToString()) }
+        if ($errors.Count) { $status = 1 }
+        if ($LASTEXITCODE) { $status = $LASTEXITCODE }
+    } catch {
+        $status = 1
+        [Console]::Error.WriteLine($_.ToString())
+    }
+    [Console]::Error.WriteLine("##SST-END $id")
+    [Console]::Error.Flush()
+    [Console]::Out.WriteLine("`n##SST-END $id $status")
+    [Console]::Out.Flush()
+}
+'''
+
+
+def host_command(executable: str = "powershell") -> List[str]:
+    """启动PowerShell宿主进程的命令行"""
+    encoded = base64.b64encode(HOST_SCRIPT.encode('utf-16-le')).decode('ascii')
+    return [executable, '-NoLogo', '-NoProfile', '-NonInteractive',
+            '-ExecutionPolicy', 'Bypass', '-EncodedCommand', encoded]
+
+
+class HostError(Exception):
+    """宿主进程意外退出或协议出错"""
+
+
+class PowerShellHost:
+    """
+    一个常驻的PowerShell进程
+
+    请求和响应按行交换，脚本以Base64编码放在一行中，不受引号和换行的
+    影响；输出以带请求编号的结束标记分隔。一个宿主同一时间只执行一个
+    命令，由PowerShellPool保证。
+    """
+
+    # 读取输出时允许的最长行（字节）
+    LINE_LIMIT = 1024 * 1024
+
+    def __init__(self, args: Sequence[str]):
+        self.args = list(args)
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.commands_run = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        """启动宿主进程，命令不存在时抛出FileNotFoundError"""
+        self.process = await asyncio.create_subprocess_exec(
+            *self.args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=self.LINE_LIMIT
+        )
+        logger.info(f"Started PowerShell host {self.process.pid}")
+
+    async def execute(self, script: str) -> CommandResult:
+        """执行一个脚本并等待其结束标记，宿主退出或输出超长的行时抛出HostError"""
+        request_id = uuid.uuid4().hex
+        payload = base64.b64encode(script.encode('utf-8')).decode('ascii')
+        started = time.monotonic()
+        try:
+            self.process.stdin.write(f"{request_id} {payload}\n".encode('ascii'))
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise HostError(f"PowerShell host {self.process.pid} is gone: {e}")
+        readers = [asyncio.ensure_future(self._read_until_marker(stream, request_id))
+                   for stream in (self.process.stdout, self.process.stderr)]
+        try:
+            (stdout, status), (stderr, _) = await asyncio.gather(*readers)
+        except BaseException:
+            # 一个流出错后不再等待另一个流的结束标记
+            for reader in readers:
+                reader.cancel()
+            raise
+        self.commands_run += 1
+        self.last_used = time.monotonic()
+        return CommandResult(('powershell', script), status, stdout, stderr,
+                             time.monotonic() - started)
+
+    async def _read_until_marker(self, stream: asyncio.StreamReader, request_id: str):
+        lines = []
+        while True:
+            try:
+                raw = await stream.readline()
+            except (asyncio.LimitOverrunError, ValueError) as e:
+                # 超长的行已被部分丢弃，之后的输出无法再与请求对应
+                raise HostError(f"PowerShell host {self.process.pid} wrote a line longer "
+                                f"than {self.LINE_LIMIT} bytes: {e}")
+            if not raw:
+                returncode = await self.process.wait()
+                raise HostError(f"PowerShell host {self.process.pid} exited with {returncode}")
+            line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+            match = _END_LINE.search(line)
+            if match is not None and match.group(1) == request_id:
+                before = line[:match.start()]
+                if before:
+                    lines.append(before)
+                # 宿主在标记前补一个换行，去掉由此产生的空行
+                if lines and not lines[-1]:
+                    lines.pop()
+                status = int(match.group(2)) if match.group(2) is not None else 0
+                return "\n".join(lines), status
+            lines.append(line)
+
+    async def close(self) -> None:
+        """关闭标准输入让宿主自行退出，超时后结束进程"""
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), 5)
+        except (asyncio.TimeoutError, OSError):
+            await self.kill()
+        logger.info(f"Closed PowerShell host {self.process.pid} "
+                    f"after {self.commands_run} commands")
+
+    async def kill(self) -> None:
+        """立即结束宿主进程"""
+        if self.alive:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+            await self.process.wait()
+
+
+class PowerShellPool:
+    """
+    PowerShell宿主池
+
+    宿主进程在首次使用时启动并预先导入常用模块，之后保留在池中复用，
+    省去每次启动PowerShell和加载Defender模块的数秒时间。空闲超过
+    health_check_after秒的宿主在复用前先执行一个简单命令确认仍可响应；
+    执行满max_commands个命令后回收，空闲超过idle_timeout秒后关闭。
+    命令超时或被取消时结束该宿主，下次使用时重新启动。所有宿主在共享
+    命令执行器的事件循环中运行。
+    """
+
+    def __init__(self, max_hosts: int = 2, max_commands: int = 50,
+                 idle_timeout: float = 300, health_check_after: float = 30,
+                 preload: Sequence[str] = (), host_args: Optional[Sequence[str]] = None,
+                 runner: Optional[CommandRunner] = None):
+        """
+        参数:
+            max_hosts: 同时存在的宿主数量上限，也是可同时执行的命令数
+            max_commands: 每个宿主执行多少个命令后回收
+            idle_timeout: 空闲宿主保留的秒数
+            health_check_after: 空闲超过该秒数的宿主复用前先检查
+            preload: 宿主启动后依次执行的脚本，例如导入模块
+            host_args: 启动宿主的命令行，默认为host_command()；测试时可替换为
+                使用相同协议的替身进程
+            runner: 提供事件循环的命令执行器，默认使用共享的执行器
+        """
+        self.max_hosts = max(1, max_hosts)
+        self.max_commands = max_commands
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.preload = list(preload)
+        self.host_args = list(host_args) if host_args is not None else host_command()
+        self.runner = runner or get_runner()
+        self._idle: List[PowerShellHost] = []
+        self._expiry: Dict[PowerShellHost, asyncio.TimerHandle] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def run(self, script: str, timeout: Optional[float] = None,
+            token: Optional[CancellationToken] = None) -> CommandResult:
+        """
+        在池中的宿主上执行脚本并等待结果，结果与run_command相同
+
+        参数:
+            script: PowerShell脚本，可以包含多行
+            timeout: 超时秒数，None表示不限制
+            token: 取消令牌，默认使用界面为当前操作设置的令牌
+        """
+        if token is None:
+            token = get_active_token()
+        future = asyncio.run_coroutine_threadsafe(self.run_async(script, timeout, token),
+                                                  self.runner.loop)
+        return future.result()
+
+    async def run_async(self, script: str, timeout: Optional[float] = None,
+                        token: Optional[CancellationToken] = None) -> CommandResult:
+        """
+        在当前事件循环中执行脚本，参数同run
+
+        超时和取消从调用时算起，包括等待空闲宿主以及启动宿主、预先导入
+        模块的时间
+        """
+        loop = asyncio.get_running_loop()
+        cancel_requested = asyncio.Event()
+
+        def on_cancel() -> None:
+            loop.call_soon_threadsafe(cancel_requested.set)
+
+        started = time.monotonic()
+        execute = asyncio.ensure_future(self._execute(script, started))
+        cancel_wait = asyncio.ensure_future(cancel_requested.wait())
+        try:
+            if token is not None:
+                token.add_callback(on_cancel)
+            await asyncio.wait({execute, cancel_wait}, timeout=timeout,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            cancel_wait.cancel()
+            if token is not None:
+                token.remove_callback(on_cancel)
+
+        if not execute.done():
+            # _execute被中断时结束正在使用或启动中的宿主
+            execute.cancel()
+            await asyncio.wait({execute})
+            cancelled = cancel_requested.is_set()
+            logger.warning(f"PowerShell command {'cancelled' if cancelled else 'timed out'}")
+            return CommandResult(('powershell', script), None, "", "",
+                                 time.monotonic() - started, not cancelled, cancelled)
+        return execute.result()
+
+    async def _execute(self, script: str, started: float) -> CommandResult:
+        """占用一个宿主执行脚本，被中断时结束该宿主"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_hosts)
+        async with self._slots:
+            host = await self._acquire()
+            try:
+                result = await host.execute(script)
+            except HostError as e:
+                logger.error(str(e))
+                await host.kill()
+                return CommandResult(('powershell', script), host.process.returncode,
+                                     "", str(e), time.monotonic() - started)
+            except BaseException:
+                # 无法可靠地中断宿主中正在执行的命令，直接结束宿主
+                await host.kill()
+                logger.warning(f"PowerShell host {host.process.pid} killed")
+                raise
+            self._release(host)
+            return result
+
+    async def close(self) -> None:
+        """关闭所有空闲宿主"""
+        hosts, self._idle = self._idle, []
+        for handle in self._expiry.values():
+            handle.cancel()
+        self._expiry.clear()
+        for host in hosts:
+            await host.close()
+
+    async def _acquire(self) -> PowerShellHost:
+        """取出一个可用的空闲宿主，没有时启动新的"""
+        while self._idle:
+            host = self._idle.pop()
+            handle = self._expiry.pop(host, None)
+            if handle is not None:
+                handle.cancel()
+            try:
+                healthy = await self._healthy(host)
+            except BaseException:
+                await host.kill()
+                raise
+            if healthy:
+                return host
+            await host.kill()
+        host = PowerShellHost(self.host_args)
+        try:
+            await host.start()
+            for script in self.preload:
+                try:
+                    await host.execute(script)
+                except HostError as e:
+                    logger.error(f"PowerShell host preload failed: {e}")
+                    break
+        except BaseException:
+            # 启动或预先导入时超时、被取消
+            await host.kill()
+            raise
+        return host
+
+    async def _healthy(self, host: PowerShellHost) -> bool:
+        """进程仍在运行，长时间空闲的宿主还需在5秒内响应一个简单命令"""
+        if not host.alive:
+            return False
+        if time.monotonic() - host.last_used < self.health_check_after:
+            return True
+        try:
+            result = await asyncio.wait_for(host.execute("'ok'"), 5)
+            return result.stdout.strip() == "ok"
+        except (HostError, asyncio.TimeoutError):
+            logger.warning(f"PowerShell host {host.process.pid} failed health check")
+            return False
+
+    def _release(self, host: PowerShellHost) -> None:
+        """将宿主放回池中，执行次数达到上限时回收"""
+        if not host.alive:
+            return
+        if host.commands_run >= self.max_commands:
+            asyncio.ensure_future(host.close())
+            return
+        self._idle.append(host)
+        loop = asyncio.get_running_loop()
+        self._expiry[host] = loop.call_later(self.idle_timeout, self._expire, host)
+
+    def _expire(self, host: PowerShellHost) -> None:
+        """关闭空闲超时的宿主"""
+        self._expiry.pop(host, None)
+        if host in self._idle:
+            self._idle.remove(host)
+            asyncio.ensure_future(host.close())
+
+
+# 进程内共享的PowerShell宿主池
+_POOL: Optional[PowerShellPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def configure_powershell_pool(**options) -> PowerShellPool:
+    """
+    按给定参数（同PowerShellPool）创建共享的宿主池
+
+    之前的池不再分配新命令，其空闲宿主在空闲超时后自行关闭
+    """
+    global _POOL
+    with _POOL_LOCK:
+        _POOL = PowerShellPool(**options)
+        return _POOL
+
+
+def get_powershell_pool() -> PowerShellPool:
+    """获取共享的PowerShell宿主池，未配置时使用默认参数创建"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = PowerShellPool()
+        return _POOL
+
+
+def run_powershell(script: str, timeout: Optional[float] = None,
+                   token: Optional[CancellationToken] = None,
+                   operation: Optional[str] = None) -> CommandResult:
+    """使用共享的宿主池执行PowerShell脚本并等待结果，operation同run_command"""
+    result = get_powershell_pool().run(script, timeout, token)
+    if operation is not None:
+        get_runtime_history().record_result(operation, result)
+    return result
@@ -0,0 +1,253 @@
+"""命令进度模块，从sfc、DISM、chkdsk的输出中解析百分比进度并估算剩余时间"""
+import re
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# 命令进度的状态，除运行中外都是最终状态
+PROGRESS_RUNNING = "running"
+PROGRESS_FINISHED = "finished"
+PROGRESS_FAILED = "failed"
+PROGRESS_CANCELLED = "cancelled"
+PROGRESS_TIMED_OUT = "timed_out"
+
+
+class ProgressUpdate(NamedTuple):
+    """从一行输出中解析出的进度，percent为None表示只更新阶段"""
+    percent: Optional[float]
+    stage: str = ""
+    eta: Optional[float] = None
+
+
+class CommandProgress(NamedTuple):
+    """发布给界面的命令进度，finished表示最后一次发布，结束的方式见status"""
+    command: str
+    percent: float
+    stage: str
+    eta: Optional[float]
+    elapsed: float
+    finished: bool
+    status: str = PROGRESS_RUNNING
+
+
+def result_status(result) -> str:
+    """命令执行结果（CommandResult）对应的最终状态，None表示命令未能启动"""
+    if result is None:
+        return PROGRESS_FAILED
+    if result.cancelled:
+        return PROGRESS_CANCELLED
+    if result.timed_out:
+        return PROGRESS_TIMED_OUT
+    return PROGRESS_FINISHED if result.returncode == 0 else PROGRESS_FAILED
+
+
+CommandProgressListener = Callable[[CommandProgress], None]
+
+
+class ProgressParser(ABC):
+    """进度解析器，识别不到进度的行返回None"""
+
+    @abstractmethod
+    def parse(self, line: str) -> Optional[ProgressUpdate]:
+        """解析一行输出"""
+
+
+class SfcProgressParser(ProgressParser):
+    """
+    sfc /scannow 的进度
+
+    英文系统输出 "Verification 45% complete."，中文系统输出
+    "验证 45% 已完成。"，均以回车刷新同一行。
+    """
+
+    PERCENT = re.compile(r'(?:Verification|验证)\D{0,8}?(\d{1,3})\s*%')
+
+    def parse(self, line: str) -> Optional[ProgressUpdate]:
+        match = self.PERCENT.search(line)
+        if match is None:
+            return None
+        return ProgressUpdate(float(match.group(1)), "verification")
+
+
+class DismProgressParser(ProgressParser):
+    """
+    DISM 的进度条
+
+    各语言相同，形如 "[====        40.0%             ]"，完成时为
+    "[==========================100.0%==========================]"。
+    """
+
+    BAR = re.compile(r'\[[=\s]*(\d{1,3}(?:[.,]\d+)?)%[=\s]*\]')
+
+    def parse(self, line: str) -> Optional[ProgressUpdate]:
+        match = self.BAR.search(line)
+        if match is None:
+            return None
+        return ProgressUpdate(float(match.group(1).replace(',', '.')))
+
+
+class ChkdskProgressParser(ProgressParser):
+    """
+    chkdsk 的进度
+
+    Windows 10 及以后输出阶段标题 "Stage 1: Examining basic file system
+    structure ..."（中文为 "阶段 1: 正在检查基本文件系统结构..."）和进度行
+    "Progress: 1234 of 5678 done; Stage: 21%; Total: 7%; ETA: 0:01:02 .."
+    （中文为 "进度: 1234/5678 个已完成; 阶段: 21%; 总计: 7%; ETA: 0:01:02 .."）。
+    进度行使用总计百分比和chkdsk自己估计的剩余时间。较早的版本只输出
+    "12 percent complete." 或 "完成 12%。"。
+    """
+
+    STAGE = re.compile(r'^\s*(?:Stage|阶段)\s*(\d)\s*[:：]\s*(.+?)\s*$')
+    TOTAL = re.compile(r'(?:Total|总计)\s*[:：]\s*(\d{1,3})\s*%')
+    ETA = re.compile(r'ETA\s*[:：]\s*(\d+):(\d{2}):(\d{2})')
+    LEGACY = re.compile(r'(\d{1,3})\s*percent complete|完成\s*(\d{1,3})\s*%', re.IGNORECASE)
+
+    def __init__(self):
+        self.stage = ""
+
+    def parse(self, line: str) -> Optional[ProgressUpdate]:
+        match = self.STAGE.match(line)
+        if match is not None:
+            self.stage = f"{match.group(1)}: {match.group(2)}"
+            return ProgressUpdate(None, self.stage)
+        match = self.TOTAL.search(line)
+        if match is not None:
+            eta = None
+            eta_match = self.ETA.search(line)
+            if eta_match is not None:
+                hours, minutes, seconds = (int(part) for part in eta_match.groups())
+                eta = float(hours * 3600 + minutes * 60 + seconds)
+            return ProgressUpdate(float(match.group(1)), self.stage, eta)
+        match = self.LEGACY.search(line)
+        if match is not None:
+            return ProgressUpdate(float(match.group(1) or match.group(2)), self.stage)
+        return None
+
+
+_PARSERS: Dict[str, Callable[[], ProgressParser]] = {
+    'sfc': SfcProgressParser,
+    'dism': DismProgressParser,
+    'chkdsk': ChkdskProgressParser,
+}
+
+
+def parser_for(command: str) -> Optional[ProgressParser]:
+    """按命令名称（不区分大小写，可带路径和扩展名）创建解析器，未知命令返回None"""
+    name = re.split(r'[\\/]', command)[-1].lower()
+    if name.endswith('.exe'):
+        name = name[:-4]
+    factory = _PARSERS.get(name)
+    return factory() if factory is not None else None
+
+
+# 全局监听器，例如界面的进度条，接收所有外部命令的进度
+_LISTENERS: List[CommandProgressListener] = []
+_LISTENERS_LOCK = threading.Lock()
+
+
+def add_listener(callback: CommandProgressListener) -> None:
+    """注册全局命令进度监听器"""
+    with _LISTENERS_LOCK:
+        _LISTENERS.append(callback)
+
+
+def remove_listener(callback: CommandProgressListener) -> None:
+    """移除全局命令进度监听器"""
+    with _LISTENERS_LOCK:
+        _LISTENERS[:] = [listener for listener in _LISTENERS if listener != callback]
+
+
+def publish(progress: CommandProgress) -> None:
+    """将进度发送给所有全局监听器"""
+    with _LISTENERS_LOCK:
+        listeners = list(_LISTENERS)
+    for listener in listeners:
+        try:
+            listener(progress)
+        except Exception as e:
+            logger.error(f"Command progress listener failed: {e}")
+
+
+class CommandProgressTracker:
+    """
+    命令进度跟踪器
+
+    作为run_command的on_line回调逐行接收输出：能解析出百分比的行转换为
+    进度事件发布给监听器，其余的行交给on_output（阶段标题两者都会收到）。
+    命令自己给出剩余时间时直接使用，否则按首次出现进度以来的平均速度
+    估算。进度按interval节流，百分比没有变化时不发布。
+    """
+
+    # 开始估算剩余时间前至少需要观察的时间（秒）
+    MIN_ETA_WINDOW = 2.0
+
+    def __init__(self, command: str, parser: Optional[ProgressParser] = None,
+                 on_output: Optional[Callable[[str], None]] = None,
+                 interval: float = 0.25):
+        """
+        参数:
+            command: 命令名称，用于选择解析器并写入每个进度事件
+            parser: 进度解析器，默认按命令名称选择
+            on_output: 接收非进度输出行的回调
+            interval: 两次发布之间的最小间隔（秒），结束时总会发布
+        """
+        self.command = command
+        self.parser = parser if parser is not None else parser_for(command)
+        self.on_output = on_output
+        self.interval = interval
+        self.percent = 0.0
+        self.stage = ""
+        self.eta: Optional[float] = None
+        self._started = time.monotonic()
+        self._first: Optional[tuple] = None
+        self._last_publish = 0.0
+        self._last_percent: Optional[float] = None
+
+    def feed(self, line: str) -> None:
+        """处理一行命令输出"""
+        update = self.parser.parse(line) if self.parser is not None else None
+        if update is None or update.percent is None:
+            if update is not None:
+                self.stage = update.stage
+            if self.on_output is not None:
+                self.on_output(line)
+            return
+        now = time.monotonic()
+        self.percent = min(max(update.percent, 0.0), 100.0)
+        if update.stage:
+            self.stage = update.stage
+        self.eta = update.eta if update.eta is not None else self._estimate(now)
+        if self.percent == self._last_percent or now - self._last_publish < self.interval:
+            return
+        self._last_publish = now
+        self._last_percent = self.percent
+        self._publish(finished=False)
+
+    def finish(self, status: str = PROGRESS_FINISHED) -> CommandProgress:
+        """发布最终进度，所有监听器都会收到；status为命令结束的方式"""
+        return self._publish(finished=True, status=status)
+
+    def _estimate(self, now: float) -> Optional[float]:
+        """按首次出现进度以来的平均速度估算剩余秒数"""
+        if self._first is None:
+            self._first = (now, self.percent)
+            return None
+        started, percent = self._first
+        elapsed = now - started
+        done = self.percent - percent
+        if elapsed < self.MIN_ETA_WINDOW or done <= 0:
+            return None
+        return (100.0 - self.percent) * elapsed / done
+
+    def _publish(self, finished: bool, status: str = PROGRESS_RUNNING) -> CommandProgress:
+        progress = CommandProgress(self.command, self.percent, self.stage,
+                                   None if finished else self.eta,
+                                   time.monotonic() - self._started, finished, status)
+        publish(progress)
+        return progress
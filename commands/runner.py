@@ -0,0 +1,358 @@
+"""外部命令执行模块，在共享的事件循环中异步运行命令，统一处理超时、编码和取消"""
+import os
+import re
+import time
+import codecs
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Deque, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from cleanup.cancellation import CancellationToken, get_active_token
+from .history import get_runtime_history
+
+logger = logging.getLogger(__name__)
+
+_IS_WINDOWS = os.name == 'nt'
+
+# Windows中文系统控制台程序的输出编码
+DEFAULT_ENCODING = 'cp936'
+
+# 结束进程后等待其输出管道关闭的最长时间（秒）
+_DRAIN_TIMEOUT = 5
+
+# 流式输出时，执行器与调用线程之间最多缓存的行数
+STREAM_BUFFER_LINES = 256
+
+# 流式输出时结果中保留的最后几行标准输出
+STREAM_TAIL_LINES = 500
+
+# 每次从管道读取的字节数
+_READ_SIZE = 4096
+
+# 控制台程序用回车刷新同一行进度，回车和换行都作为行结束
+_LINE_END = re.compile(r'\r\n|\r|\n')
+
+
+class CommandResult(NamedTuple):
+    """外部命令的执行结果"""
+    args: Tuple[str, ...]
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    duration: float
+    timed_out: bool = False
+    cancelled: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """命令是否正常结束且返回码为0"""
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+
+class _LineChannel:
+    """
+    事件循环与调用线程之间有界的行队列
+
+    队列满时读取管道的协程等待调用线程取走数据，不再读取管道，子进程
+    写满管道后随之阻塞，输出不会在内存中无限堆积。只有该命令被暂停，
+    事件循环中的其他命令不受影响。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = STREAM_BUFFER_LINES):
+        self._loop = loop
+        self._maxsize = maxsize
+        self._lines: Deque[str] = deque()
+        self._condition = threading.Condition()
+        self._space: Optional[asyncio.Event] = None
+        self._closed = False
+        self._abandoned = False
+
+    async def put(self, line: str) -> None:
+        """在事件循环中放入一行，队列满时等待"""
+        if self._space is None:
+            self._space = asyncio.Event()
+        while True:
+            with self._condition:
+                if self._abandoned:
+                    return
+                if len(self._lines) < self._maxsize:
+                    self._lines.append(line)
+                    self._condition.notify()
+                    return
+                self._space.clear()
+            await self._space.wait()
+
+    def close(self) -> None:
+        """输出结束，调用线程取完剩余的行后get返回None"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def get(self) -> Optional[str]:
+        """在调用线程中取出一行，输出结束时返回None"""
+        with self._condition:
+            while not self._lines and not self._closed:
+                self._condition.wait()
+            if not self._lines:
+                return None
+            was_full = len(self._lines) >= self._maxsize
+            line = self._lines.popleft()
+        if was_full:
+            self._loop.call_soon_threadsafe(self._wake)
+        return line
+
+    def abandon(self) -> None:
+        """调用线程不再读取，丢弃之后的输出以免命令因队列满而停住"""
+        with self._condition:
+            self._abandoned = True
+            self._lines.clear()
+        self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        if self._space is not None:
+            self._space.set()
+
+
+class CommandRunner:
+    """
+    命令执行器
+
+    所有命令在同一个后台线程的事件循环中以asyncio子进程运行，多个命令
+    可以同时执行而不各自占用线程。工具线程通过run同步等待结果，也可以
+    通过submit同时提交多个命令。超时或取消时结束整个进程树，返回的结果
+    中包含已读取的部分输出。启动失败时（命令不存在、无权限）抛出与
+    subprocess相同的OSError。
+
+    指定on_line时按行流式读取标准输出，每读到一行就交给调用方，结果中
+    只保留最后STREAM_TAIL_LINES行，长时间运行的命令不会在内存中积累
+    全部输出。
+    """
+
+    def __init__(self, encoding: str = DEFAULT_ENCODING):
+        """
+        参数:
+            encoding: 命令输出的默认编码
+        """
+        self.encoding = encoding
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """后台事件循环，首次使用时启动"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="command-runner",
+                                          daemon=True)
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, args: Sequence[str], timeout: Optional[float] = None,
+               token: Optional[CancellationToken] = None,
+               encoding: Optional[str] = None, cwd: Optional[str] = None,
+               env: Optional[Dict[str, str]] = None,
+               on_line: Optional[Callable[[str], Awaitable[None]]] = None
+               ) -> "Future[CommandResult]":
+        """
+        在后台事件循环中启动命令，立即返回Future，参数同run
+
+        on_line在事件循环中被等待，不应执行耗时的同步操作
+        """
+        if token is None:
+            token = get_active_token()
+        coroutine = self.run_async(args, timeout, token, encoding, cwd, env, on_line)
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, args: Sequence[str], timeout: Optional[float] = None,
+            token: Optional[CancellationToken] = None,
+            encoding: Optional[str] = None, cwd: Optional[str] = None,
+            env: Optional[Dict[str, str]] = None,
+            on_line: Optional[Callable[[str], None]] = None) -> CommandResult:
+        """
+        执行命令并等待结果
+
+        参数:
+            args: 命令及其参数
+            timeout: 超时秒数，None表示不限制
+            token: 取消令牌，默认使用界面为当前操作设置的令牌
+            encoding: 输出编码，默认为执行器的编码
+            cwd: 工作目录
+            env: 环境变量，None表示继承当前进程
+            on_line: 逐行接收标准输出的回调，在调用run的线程中执行；
+                回调处理较慢时命令的输出随之暂停
+        """
+        if on_line is None:
+            return self.submit(args, timeout, token, encoding, cwd, env).result()
+        channel = _LineChannel(self.loop)
+        future = self.submit(args, timeout, token, encoding, cwd, env, channel.put)
+        future.add_done_callback(lambda _: channel.close())
+        try:
+            line = channel.get()
+            while line is not None:
+                on_line(line)
+                line = channel.get()
+        except BaseException:
+            channel.abandon()
+            raise
+        return future.result()
+
+    async def run_async(self, args: Sequence[str], timeout: Optional[float] = None,
+                        token: Optional[CancellationToken] = None,
+                        encoding: Optional[str] = None, cwd: Optional[str] = None,
+                        env: Optional[Dict[str, str]] = None,
+                        on_line: Optional[Callable[[str], Awaitable[None]]] = None
+                        ) -> CommandResult:
+        """在当前事件循环中执行命令，参数同submit"""
+        args = tuple(args)
+        encoding = encoding or self.encoding
+        logger.info(f"Running command: {' '.join(args)}")
+        started = time.monotonic()
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            env=env
+        )
+
+        loop = asyncio.get_running_loop()
+        cancel_requested = asyncio.Event()
+
+        def on_cancel() -> None:
+            loop.call_soon_threadsafe(cancel_requested.set)
+
+        tail: Deque[str] = deque(maxlen=STREAM_TAIL_LINES)
+        if on_line is None:
+            output = asyncio.ensure_future(process.communicate())
+        else:
+            output = asyncio.ensure_future(self._stream(process, args[0], encoding, on_line, tail))
+        cancel_wait = asyncio.ensure_future(cancel_requested.wait())
+        try:
+            if token is not None:
+                token.add_callback(on_cancel)
+            await asyncio.wait({output, cancel_wait}, timeout=timeout,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            cancel_wait.cancel()
+            if token is not None:
+                token.remove_callback(on_cancel)
+
+        timed_out = cancelled = False
+        if not output.done():
+            cancelled = cancel_requested.is_set()
+            timed_out = not cancelled
+            await self._kill(process)
+            try:
+                await asyncio.wait_for(output, _DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                # 子进程仍持有输出管道时放弃剩余输出
+                pass
+        stdout, stderr = output.result() if not output.cancelled() else (b"", b"")
+        if on_line is not None:
+            # 流式读取时标准输出已逐行解码，只保留最后几行
+            stdout = "\n".join(tail)
+        elif stdout:
+            stdout = stdout.decode(encoding, errors='replace')
+
+        result = CommandResult(
+            args, process.returncode, stdout or "",
+            stderr.decode(encoding, errors='replace') if stderr else "",
+            time.monotonic() - started, timed_out, cancelled
+        )
+        if timed_out:
+            logger.error(f"Command timed out after {timeout}s: {args[0]}")
+        elif cancelled:
+            logger.warning(f"Command cancelled: {args[0]}")
+        else:
+            logger.info(f"Command {args[0]} exited with {result.returncode} "
+                        f"in {result.duration:.1f}s")
+        return result
+
+    async def _stream(self, process: asyncio.subprocess.Process, program: str, encoding: str,
+                      on_line: Callable[[str], Awaitable[None]],
+                      tail: Deque[str]) -> Tuple[bytes, bytes]:
+        """逐行读取标准输出，同时读取标准错误并等待进程结束"""
+        name = os.path.basename(program)
+
+        async def read_lines() -> bytes:
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            pending = ""
+            while True:
+                chunk = await process.stdout.read(_READ_SIZE)
+                pending += decoder.decode(chunk, final=not chunk)
+                if chunk and pending.endswith('\r'):
+                    # 回车可能是被分到两次读取中的\r\n的前半部分
+                    lines, pending = _LINE_END.split(pending[:-1]), '\r'
+                    pending = lines.pop() + pending
+                else:
+                    lines = _LINE_END.split(pending)
+                    pending = lines.pop()
+                if not chunk and pending:
+                    lines.append(pending)
+                for line in lines:
+                    tail.append(line)
+                    if line.strip():
+                        logger.info(f"[{name}] {line.rstrip()}")
+                    await on_line(line)
+                if not chunk:
+                    return b""
+
+        stdout, stderr, _ = await asyncio.gather(
+            read_lines(), process.stderr.read(), process.wait()
+        )
+        return stdout, stderr
+
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process) -> None:
+        """结束进程及其子进程"""
+        if process.returncode is not None:
+            return
+        if _IS_WINDOWS:
+            try:
+                killer = await asyncio.create_subprocess_exec(
+                    'taskkill', '/PID', str(process.pid), '/T', '/F',
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+                )
+                await killer.wait()
+            except OSError as e:
+                logger.error(f"taskkill failed for {process.pid}: {e}")
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+
+# 进程内共享的命令执行器
+_RUNNER: Optional[CommandRunner] = None
+_RUNNER_LOCK = threading.Lock()
+
+
+def get_runner() -> CommandRunner:
+    """获取共享的命令执行器"""
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is None:
+            _RUNNER = CommandRunner()
+        return _RUNNER
+
+
+def run_command(args: Sequence[str], timeout: Optional[float] = None,
+                token: Optional[CancellationToken] = None,
+                encoding: Optional[str] = None,
+                on_line: Optional[Callable[[str], None]] = None,
+                operation: Optional[str] = None) -> CommandResult:
+    """
+    使用共享的执行器执行命令并等待结果
+
+    给出operation（TimeoutConfig的操作名称）时，耗时记入本机的执行历史
+    """
+    result = get_runner().run(args, timeout, token, encoding, on_line=on_line)
+    if operation is not None:
+        get_runtime_history().record_result(operation, result)
+    return result
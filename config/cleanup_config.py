@@ -0,0 +1,44 @@
+"""清理配置模块，用于设置无用文件清理引擎的参数"""
+
+class CleanupConfig:
+    """清理配置类"""
+    
+    # 扫描并发设置
+    SCAN_MAX_WORKERS = 8  # 并行扫描的最大线程数
+    
+    # 增量扫描设置
+    INCREMENTAL_SCAN = True  # 使用扫描索引跳过未变化的目录
+    INDEX_FILESYSTEMS = ("NTFS", "ReFS")  # 能可靠维护目录修改时间的文件系统
+    
+    # 检查点设置
+    CHECKPOINT_INTERVAL = 15  # 完整清理期间保存进度的间隔（秒）
+    
+    # 进度设置
+    PROGRESS_LOG_INTERVAL = 5  # 清理进度写入日志的间隔（秒）
+    PROGRESS_UI_INTERVAL = 0.2  # 界面状态栏刷新进度的间隔（秒）
+    
+    # I/O限速设置，用于在生产主机上运行清理
+    THROTTLE_ENABLED = False  # 是否限制清理的I/O速率
+    THROTTLE_OPS_PER_SEC = 1000  # 每秒文件系统操作数（列出目录、删除文件）上限
+    THROTTLE_BYTES_PER_SEC = 200 * 1024 * 1024  # 每秒删除的字节数上限
+    THROTTLE_ADAPTIVE = True  # 操作延迟升高时自动降速
+    THROTTLE_TARGET_LATENCY = 0.02  # 自适应模式的单次操作目标延迟（秒）
+    THROTTLE_MIN_FRACTION = 0.1  # 自适应降速的下限，占配置上限的比例
+    
+    # 空间占用报告设置
+    REPORT_TOP_K = 50  # 报告中保留的最大文件和最大目录的数量
+    REPORT_DIR = "logs"  # 报告CSV文件的保存目录
+    
+    # 重复文件查找设置
+    DUPLICATE_MIN_SIZE = 1024 * 1024  # 参与比较的最小文件大小（字节）
+    DUPLICATE_HASH_WORKERS = 4  # 计算文件哈希的线程数
+    
+    # 隔离区设置
+    QUARANTINE_ENABLED = False  # 将候选文件移入隔离区而不是直接删除
+    QUARANTINE_DIR_NAME = "$SSTQuarantine"  # 每个驱动器根目录下的隔离目录名称
+    QUARANTINE_RETENTION_DAYS = 7  # 隔离文件的保留天数，完整清理时清除过期文件
+    
+    # 多用户清理设置，用于终端服务器等多人共用的主机
+    MULTI_PROFILE_CLEANUP = False  # 清理所有用户的临时目录和回收站，而不只是当前用户
+    PROFILES_ROOT = None  # 用户配置文件目录，None表示从注册表读取（通常为 C:\Users）
+    PROFILE_MAX_WORKERS = 4  # 同时清理的目录数量
@@ -0,0 +1,17 @@
+"""外部命令配置模块，用于设置sfc、DISM、chkdsk等外部命令的执行方式"""
+
+class CommandConfig:
+    """外部命令配置类"""
+    
+    # 多驱动器磁盘检查设置
+    CHKDSK_MAX_PARALLEL = 4  # 同时进行只读检查的驱动器数量上限，同一物理磁盘上的驱动器依次检查
+    
+    # PowerShell宿主池设置，Defender等cmdlet在常驻的PowerShell进程中执行
+    POWERSHELL_MAX_HOSTS = 2  # 同时存在的PowerShell进程数量上限
+    POWERSHELL_MAX_COMMANDS = 50  # 每个进程执行多少个命令后回收
+    POWERSHELL_IDLE_TIMEOUT = 300  # 空闲进程保留的时间（秒）
+    POWERSHELL_PRELOAD_MODULES = ("Defender",)  # 进程启动后预先导入的模块
+    
+    # DISM健康检查结果缓存，系统重启或安装更新后自动失效，执行修复后清空
+    HEALTH_CACHE_ENABLED = True  # 是否复用之前的ScanHealth/CheckHealth结果
+    HEALTH_CACHE_TTL = 12 * 3600  # 结果的有效期（秒）
@@ -25,16 +25,21 @@ class AppTools:
         SystemCheckFix.netsh_winsock_reset,
         CheckDriver().main,
         fix_boot,
-        virus_scan
+        virus_scan,
+        disk_space_report,
+        find_duplicate_files,
+        restore_quarantined_file,
+        plan_useless_files,
+        execute_cleanup_plan
     ]
     
     @staticmethod
     def get(choice: int, app=None) -> None:
         """执行选定的工具"""
-        if not 1 <= choice <= len(ApplyTools.tools):
+        if not 1 <= choice <= len(AppTools.tools):
             raise ValueError(f"无效的工具选择: {choice}")
             
-        tool_func = ApplyTools.tools[choice-1]
+        tool_func = AppTools.tools[choice-1]
         if hasattr(tool_func, "__wrapped__"):
             return tool_func.__wrapped__()
         else:
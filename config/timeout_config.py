@@ -1,4 +1,5 @@
 """超时配置模块，用于设置各种操作的超时值"""
+from commands.history import get_runtime_history
 
 class TimeoutConfig:
     """超时配置类"""
@@ -7,8 +8,8 @@ class TimeoutConfig:
     SFC_TIMEOUT = 3600  # 系统文件检查超时：1小时
     DISM_TIMEOUT = 3600  # DISM工具超时：1小时
     CHKDSK_TIMEOUT = 1800  # 磁盘检查超时：30分钟
-    BOOTREC_TIMEOUT = 300  # 引导修复超时：5分钟
-    NETSH_TIMEOUT = 60  # 网络重置超时：1分钟
+    BOOTREC_TIMEOUT = 60  # 引导修复超时：1分钟
+    NETSH_TIMEOUT = 30  # 网络重置超时：30秒
     GPU_INFO_TIMEOUT = 10  # GPU信息获取超时：10秒
     
     # 文件操作超时设置（秒）
@@ -25,9 +26,26 @@ class TimeoutConfig:
     UPDATE_DEFINITIONS_TIMEOUT = 300  # 5分钟
     REMOVE_THREATS_TIMEOUT = 300  # 5分钟
     
+    # 自适应超时设置，根据本机的历史耗时调整外部命令的超时，上面的值作为基准
+    ADAPTIVE_TIMEOUTS = True  # 是否根据历史耗时调整超时
+    ADAPTIVE_OPERATIONS = (  # 耗时相对稳定、可以自适应的操作
+        'sfc', 'dism', 'chkdsk', 'bootrec', 'netsh', 'gpu_info',
+        'quick_scan', 'full_scan', 'update_definitions', 'remove_threats',
+    )
+    ADAPTIVE_PERCENTILE = 0.95  # 使用最近耗时的百分位数
+    ADAPTIVE_MARGIN = 1.5  # 百分位数乘以的余量
+    ADAPTIVE_MIN_SAMPLES = 5  # 至少有多少次记录才开始调整
+    ADAPTIVE_MIN_FACTOR = 0.25  # 调整后的下限为基准值的倍数
+    ADAPTIVE_MAX_FACTOR = 4  # 调整后的上限为基准值的倍数
+    
     @classmethod
     def get_timeout(cls, operation_type):
-        """获取指定操作类型的超时值"""
+        """
+        获取指定操作类型的超时值，可自适应的操作按本机的历史耗时调整
+
+        operation_type也可以是带参数的操作键（见commands.history.operation_key），
+        如 "chkdsk c: /f"：基准值按第一个词取得，历史耗时按整个键查询
+        """
         timeout_map = {
             'sfc': cls.SFC_TIMEOUT,
             'dism': cls.DISM_TIMEOUT,
@@ -45,4 +63,15 @@ class TimeoutConfig:
             'remove_threats': cls.REMOVE_THREATS_TIMEOUT,
         }
         
-        return timeout_map.get(operation_type, 60)  # 默认60秒 
\ No newline at end of file
+        base_type = operation_type.split(' ', 1)[0]
+        timeout = timeout_map.get(base_type, 60)  # 默认60秒
+        if not cls.ADAPTIVE_TIMEOUTS or base_type not in cls.ADAPTIVE_OPERATIONS:
+            return timeout
+        return get_runtime_history().suggest_timeout(
+            operation_type, timeout,
+            q=cls.ADAPTIVE_PERCENTILE,
+            margin=cls.ADAPTIVE_MARGIN,
+            min_samples=cls.ADAPTIVE_MIN_SAMPLES,
+            min_factor=cls.ADAPTIVE_MIN_FACTOR,
+            max_factor=cls.ADAPTIVE_MAX_FACTOR
+        ) 
\ No newline at end of file
@@ -1,12 +1,33 @@
 import os
 import os
+import time
 import ctypes
+import win32api
 import win32file
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
 from pathlib import Path
 from log_utils import LogManager
+from cleanup import ExclusionTrie, ExtensionMatcher, FileRecord, ParallelScanner
+from cleanup.budget import ScanState
+from cleanup.cancellation import CancellationToken, OperationCancelled, get_active_token
+from cleanup.checkpoint import CleanupCheckpoint
+from cleanup.duplicates import DuplicateFinder, DuplicateGroup
+from cleanup.formatting import format_size
+from cleanup.index import ScanIndex
+from cleanup.profiles import (ProfileCleaner, ProfileTarget, default_profiles_root,
+                               profile_temp_targets, recycle_bin_targets)
+from cleanup.progress import ProgressSnapshot, ProgressTracker
+from cleanup.quarantine import Quarantine, QuarantineEntry
+from cleanup.removal import BottomUpRemover, RemovalStats
+from cleanup.report import SpaceReport
+from cleanup.rules import CleanupRules
+from cleanup.throttle import IOThrottle
+from cleanup.planner import PLAN_FILE, CleanupPlan, PlanEntry, PlanExecutor, PlanResult
+from config.cleanup_config import CleanupConfig
+from config.timeout_config import TimeoutConfig
 from languages.language_config import LanguageManager as lang
-import time
 
 # 获取日志记录器实例
 logger = LogManager().get_logger(__name__)
@@ -15,9 +36,36 @@ class DeleteUselessFile:
     """
     清理工具类，用于管理系统清理操作
     """
-    def __init__(self):
+    # cleanup_system的执行阶段，检查点记录当前所处的阶段
+    CLEANUP_STAGES = ("recycle_bin", "temp_files", "matching_files")
+
+    def __init__(self, token: Optional[CancellationToken] = None):
+        """
+        参数:
+            token: 取消令牌，默认使用界面为当前操作设置的令牌
+        """
         self.drive_letter = self._get_drive_letter()
         self.logger = LogManager().get_logger(__name__)
+        # 后缀配置在每次清理开始时加载一次，所有驱动器共用同一个查找表
+        self.extension_matcher = ExtensionMatcher.load()
+        # 按后缀、存在时间、大小和路径筛选的清理规则，未配置时只按后缀匹配
+        self.rules = CleanupRules.load(self.extension_matcher)
+        # 设置界面中排除的文件和文件夹，各驱动器的隔离目录始终排除在扫描之外
+        self.exclusions = ExclusionTrie.load()
+        for drive in self.drive_letter:
+            self.exclusions.add(f"{drive}\\{CleanupConfig.QUARANTINE_DIR_NAME}")
+        # 隔离模式下候选文件被移入隔离区，未启用时为None
+        self.quarantine = (Quarantine(CleanupConfig.QUARANTINE_DIR_NAME)
+                           if CleanupConfig.QUARANTINE_ENABLED else None)
+        # cleanup_system运行期间的检查点，其他入口不保存进度
+        self.checkpoint: Optional[CleanupCheckpoint] = None
+        # 当前操作的进度跟踪器，嵌套调用的操作共用外层的跟踪器
+        self.progress: Optional[ProgressTracker] = None
+        if token is None:
+            token = get_active_token() or CancellationToken()
+        self.token = token
+        # 扫描和删除共用同一个限速器，未启用限速时为None
+        self.throttle = self._create_throttle(token)
         self.logger.info(f"Init cleanup module: {self.drive_letter}")
 
     @staticmethod
@@ -54,81 +102,455 @@ class DeleteUselessFile:
             print(f"{lang.get_string('access_recycle_bin_error')}: {e} \n")
             return False
 
-    def delete_log_files(self) -> None:
-        """删除指定驱动器中的所有.log文件"""
+    def _get_scan_roots(self) -> List[str]:
+        """返回当前存在的驱动器根目录"""
+        drives = []
         for drive in self.drive_letter:
             drive_path = Path(f"{drive}\\")
-            if not drive_path.exists():
-                continue
-                
+            if drive_path.exists():
+                drives.append(str(drive_path))
+        return drives
+
+    @staticmethod
+    def _get_indexable_roots(roots: List[str]) -> List[str]:
+        """返回文件系统能可靠维护目录修改时间、可以使用扫描索引的驱动器"""
+        indexable = []
+        for root in roots:
             try:
-                # 添加超时机制
-                start_time = time.time()
-                timeout = 30  # 30秒超时
-                
-                for file_path in drive_path.rglob("*.log"):
-                    # 检查是否超时
-                    if time.time() - start_time > timeout:
-                        self.logger.warning(f"Operation timed out on drive {drive}")
-                        print(f"{lang.get_string('operation_timeout')}: {drive} \n")
-                        break
-                        
-                    try:
-                        # 针对具体的错误进行处理
-                        if not file_path.exists():
-                            self.logger.warning(f"File does not exist: {file_path}")
-                            continue
-                            
-                        if not os.access(file_path, os.W_OK):
-                            self.logger.warning(f"No write permission: {file_path}")
-                            print(f"{lang.get_string('no_write_permission')}: {file_path} \n")
-                            continue
-                            
-                        file_path.unlink()
-                        self.logger.info(f"Deleted: {file_path}")
-                        print(f"{lang.get_string('deleted')}: {file_path} \n")
-                        
-                    except PermissionError as e:
-                        self.logger.error(f"Permission error: {file_path} {e}")
-                        print(f"{lang.get_string('permission_error')}: {file_path} {e} \n")
-                    except FileNotFoundError as e:
-                        self.logger.error(f"File not found: {file_path} {e}")
-                        print(f"{lang.get_string('file_not_found')}: {file_path} {e} \n")
-                    except OSError as e:
-                        self.logger.error(f"OS error: {file_path} {e}")
-                        print(f"{lang.get_string('os_error')}: {file_path} {e} \n")
-                
-            except PermissionError as e:
+                filesystem = win32api.GetVolumeInformation(root)[4]
+            except Exception as e:
+                logger.warning(f"Cannot query file system of {root}: {e}")
+                continue
+            if filesystem in CleanupConfig.INDEX_FILESYSTEMS:
+                indexable.append(root)
+        return indexable
+
+    def _open_scan_index(self, roots: List[str]) -> Optional[ScanIndex]:
+        """打开增量扫描索引，失败时退回完整扫描"""
+        if not CleanupConfig.INCREMENTAL_SCAN:
+            return None
+        try:
+            signature = ScanIndex.make_signature(self.rules.name_filter.extensions)
+            return ScanIndex(signature=signature, prefixes=self._get_indexable_roots(roots))
+        except Exception as e:
+            self.logger.warning(f"Scan index unavailable, falling back to full scan: {e}")
+            return None
+
+    @staticmethod
+    def _create_throttle(token: Optional[CancellationToken] = None) -> Optional[IOThrottle]:
+        """按清理配置创建I/O限速器"""
+        if not CleanupConfig.THROTTLE_ENABLED:
+            return None
+        return IOThrottle(
+            ops_per_sec=CleanupConfig.THROTTLE_OPS_PER_SEC,
+            bytes_per_sec=CleanupConfig.THROTTLE_BYTES_PER_SEC,
+            adaptive=CleanupConfig.THROTTLE_ADAPTIVE,
+            target_latency=CleanupConfig.THROTTLE_TARGET_LATENCY,
+            min_fraction=CleanupConfig.THROTTLE_MIN_FRACTION,
+            token=token
+        )
+
+    def _log_progress(self, snapshot: ProgressSnapshot) -> None:
+        """按日志间隔记录清理进度"""
+        self.logger.info(
+            f"Cleanup progress [{snapshot.operation}]: scanned {snapshot.files_scanned} files "
+            f"({snapshot.scan_rate:.0f}/s), {snapshot.candidates} candidates, "
+            f"deleted {snapshot.files_deleted} ({format_size(snapshot.bytes_reclaimed)}), "
+            f"current {snapshot.current_directory or '-'}"
+            + (f", finished in {snapshot.elapsed:.1f}s" if snapshot.finished else "")
+        )
+
+    @contextmanager
+    def _track_progress(self, operation: str) -> Iterator[ProgressTracker]:
+        """为操作创建进度跟踪器，已有外层操作时沿用外层的跟踪器"""
+        if self.progress is not None:
+            yield self.progress
+            return
+        self.progress = ProgressTracker(
+            operation, [(self._log_progress, CleanupConfig.PROGRESS_LOG_INTERVAL)]
+        )
+        try:
+            yield self.progress
+        finally:
+            self.progress.finish()
+            self.progress = None
+            if self.quarantine is not None:
+                self.quarantine.close()
+
+    def _scan_candidates(self, roots: List[str], resumable: bool = True) -> Iterator[FileRecord]:
+        """
+        并行扫描驱动器，逐个返回匹配配置后缀的文件记录，结束后报告超时和错误
+
+        resumable为False时不使用扫描预算，也不读取或保存跨运行的扫描状态，
+        每次都完整扫描，用于生成清理计划等不应影响下次清理进度的操作
+        """
+        index = self._open_scan_index(roots)
+        state = ScanState.load() if resumable else ScanState()
+        if self.checkpoint is not None:
+            self.checkpoint.attach(state)
+
+        # 总扫描时间在所有驱动器的子目录之间分配，未扫描完的部分下次继续
+        scanner = ParallelScanner(
+            file_filter=self.rules.name_filter,
+            record_filter=self.rules.record_filter,
+            exclusions=self.exclusions,
+            index=index,
+            max_workers=CleanupConfig.SCAN_MAX_WORKERS,
+            budget=TimeoutConfig.get_timeout('file_scan') if resumable else None,
+            state=state,
+            on_checkpoint=self.checkpoint.maybe_save if self.checkpoint is not None else None,
+            progress=self.progress,
+            token=self.token,
+            throttle=self.throttle
+        )
+
+        try:
+            yield from scanner.scan(roots)
+        finally:
+            if resumable:
+                state.save()
+            if self.checkpoint is not None:
+                self.checkpoint.attach(None)
+            if index is not None:
+                index.close()
+                self.logger.info(f"Incremental scan skipped {index.skipped} unchanged directories")
+
+        for drive in sorted(scanner.timed_out_roots):
+            self.logger.warning(f"Operation timed out on drive {drive}")
+            print(f"{lang.get_string('operation_timeout')}: {drive} \n")
+        if scanner.timed_out_roots:
+            print(f"{lang.get_string('scan_budget_exhausted')}\n")
+
+        for drive, e in scanner.errors:
+            if isinstance(e, PermissionError):
                 self.logger.error(f"Permission error accessing drive: {drive} {e}")
                 print(f"{lang.get_string('permission_error_drive')}: {drive} {e} \n")
-            except OSError as e:
+            elif isinstance(e, OSError):
                 self.logger.error(f"OS error accessing drive: {drive} {e}")
                 print(f"{lang.get_string('os_error_drive')}: {drive} {e} \n")
-            except Exception as e:
+            else:
                 # 只用于捕获其他未预见的异常
                 self.logger.error(f"Unexpected error processing drive: {drive} {e}")
                 print(f"{lang.get_string('unexpected_error_drive')}: {drive} {e} \n")
 
+    def _delete_file(self, file_path: str, size: int = 0) -> bool:
+        """
+        删除单个文件
+
+        扫描记录来自刚完成的目录枚举，不再逐个重新检查存在性和权限，
+        文件消失或只读时由unlink抛出的异常处理。成功删除的文件不再逐个
+        输出，由进度跟踪器汇总。启用限速时按操作数和size计入限速器。
+        隔离模式下文件被移入所在驱动器的隔离目录而不是删除
+
+        返回值:
+            bool: 是否删除成功
+        """
+        try:
+            if self.throttle is not None:
+                self.throttle.acquire(1, size)
+                started = time.perf_counter()
+                self._remove(file_path, size)
+                self.throttle.observe(time.perf_counter() - started)
+            else:
+                self._remove(file_path, size)
+            return True
+            
+        except PermissionError as e:
+            self.logger.error(f"Permission error: {file_path} {e}")
+            print(f"{lang.get_string('permission_error')}: {file_path} {e} \n")
+        except FileNotFoundError as e:
+            self.logger.error(f"File not found: {file_path} {e}")
+            print(f"{lang.get_string('file_not_found')}: {file_path} {e} \n")
+        except OSError as e:
+            self.logger.error(f"OS error: {file_path} {e}")
+            print(f"{lang.get_string('os_error')}: {file_path} {e} \n")
+        return False
+
+    def _remove(self, file_path: str, size: int) -> None:
+        if self.quarantine is not None:
+            self.quarantine.move(file_path, size)
+        else:
+            os.unlink(file_path)
+
+    def restore_quarantined_file(self, file_path: str) -> Optional[QuarantineEntry]:
+        """按原路径从隔离区恢复最近一次隔离的文件"""
+        quarantine = self.quarantine or Quarantine(CleanupConfig.QUARANTINE_DIR_NAME)
+        try:
+            entry = quarantine.restore(file_path)
+        except FileNotFoundError:
+            self.logger.warning(f"File not found in quarantine: {file_path}")
+            print(f"{lang.get_string('quarantine_not_found')}: {file_path} \n")
+            return None
+        except FileExistsError:
+            self.logger.warning(f"Restore target already exists: {file_path}")
+            print(f"{lang.get_string('quarantine_target_exists')}: {file_path} \n")
+            return None
+        except OSError as e:
+            self.logger.error(f"Failed to restore {file_path}: {e}")
+            print(f"{lang.get_string('os_error')}: {file_path} {e} \n")
+            return None
+        finally:
+            quarantine.close()
+        print(f"{lang.get_string('quarantine_restored')}: {entry.path} "
+              f"({format_size(entry.size)}) \n")
+        return entry
+
+    def purge_quarantine(self) -> None:
+        """删除各驱动器隔离区中超过保留期限的文件，未启用隔离模式时也清除以前留下的文件"""
+        quarantine = self.quarantine or Quarantine(CleanupConfig.QUARANTINE_DIR_NAME)
+        max_age = CleanupConfig.QUARANTINE_RETENTION_DAYS * 86400
+        try:
+            purged, reclaimed = quarantine.purge(self._get_scan_roots(), max_age)
+        except OSError as e:
+            self.logger.error(f"Failed to purge quarantine: {e}")
+            return
+        finally:
+            quarantine.close()
+        if purged:
+            print(f"{lang.get_string('quarantine_purged')}: {purged} "
+                  f"({format_size(reclaimed)}) \n")
+
+    def delete_log_files(self) -> None:
+        """并行扫描所有驱动器，一次遍历删除所有匹配配置后缀的文件"""
+        with self._track_progress("delete_log_files") as progress:
+            for record in self._scan_candidates(self._get_scan_roots()):
+                self.token.raise_if_cancelled()
+                ok = self._delete_file(record.path, record.size)
+                if ok:
+                    progress.deleted(1, record.size)
+                if self.checkpoint is not None:
+                    self.checkpoint.record_deletion(record.size, ok)
+
+    def plan_cleanup(self, plan_file: Path = PLAN_FILE) -> Optional[CleanupPlan]:
+        """
+        生成清理计划而不删除任何文件
+
+        遍历一次所有驱动器，将候选文件及按后缀、目录汇总的大小保存到plan_file，
+        之后可通过execute_plan在维护窗口内直接执行。计划总是完整扫描，不受
+        扫描预算限制，也不改变完整清理的续扫状态；被取消时不保存计划
+        """
+        roots = self._get_scan_roots()
+        self.logger.info(f"Planning cleanup for: {roots}")
+        print(lang.get_string("planning_cleanup"), '\n')
+
+        try:
+            with self._track_progress("plan_cleanup"):
+                plan = CleanupPlan.from_records(
+                    self._scan_candidates(roots, resumable=False),
+                    self.rules.name_filter.match, roots
+                )
+        except OperationCancelled:
+            self.logger.warning("Cleanup planning cancelled, plan not saved")
+            print(lang.get_string("operation_cancelled"), '\n')
+            return None
+        plan.save(plan_file)
+
+        print(f"{lang.get_string('cleanup_plan_total')}: {len(plan)} "
+              f"({format_size(plan.total_bytes)}) \n")
+        print(f"{lang.get_string('cleanup_plan_by_extension')}:")
+        for extension, (files, size) in sorted(plan.by_extension.items(),
+                                               key=lambda item: item[1][1], reverse=True):
+            print(f"  {extension or '-'}: {files} ({format_size(size)})")
+        print(f"\n{lang.get_string('cleanup_plan_top_directories')}:")
+        for directory, files, size in plan.top_directories():
+            print(f"  {directory}: {files} ({format_size(size)})")
+        print(f"\n{lang.get_string('cleanup_plan_saved')}: {plan_file} \n")
+        return plan
+
+    def execute_plan(self, plan_file: Path = PLAN_FILE) -> Optional[PlanResult]:
+        """按已保存的清理计划删除文件，不重新扫描磁盘"""
+        try:
+            plan = CleanupPlan.load(plan_file)
+        except FileNotFoundError:
+            self.logger.error(f"Cleanup plan not found: {plan_file}")
+            print(f"{lang.get_string('cleanup_plan_not_found')}: {plan_file} \n")
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.error(f"Invalid cleanup plan {plan_file}: {e}")
+            print(f"{lang.get_string('cleanup_plan_invalid')}: {plan_file} {e} \n")
+            return None
+
+        self.logger.info(f"Executing cleanup plan {plan_file}: {len(plan)} files")
+
+        def on_skipped(entry: PlanEntry) -> None:
+            self.logger.warning(f"File changed since plan was created, skipped: {entry.path}")
+            print(f"{lang.get_string('cleanup_plan_file_changed')}: {entry.path} \n")
+
+        with self._track_progress("execute_plan") as progress:
+            result = PlanExecutor().execute(plan, self._delete_file, on_skipped,
+                                            progress, self.token)
+        if self.token.cancelled:
+            self.logger.warning("Cleanup plan execution cancelled")
+            print(lang.get_string("operation_cancelled"), '\n')
+        self.logger.info(f"Cleanup plan executed: {result}")
+        print(f"{lang.get_string('cleanup_plan_executed')}: {result.deleted} "
+              f"({format_size(result.bytes_reclaimed)}), "
+              f"{lang.get_string('skipped')}: {result.skipped}, "
+              f"{lang.get_string('failed')}: {result.failed} \n")
+        return result
+
+    def space_report(self, top_k: int = CleanupConfig.REPORT_TOP_K) -> Optional[SpaceReport]:
+        """
+        统计所有驱动器的空间占用，不删除任何文件
+
+        各驱动器并行遍历，输出最大的top_k个目录和文件，并将结果保存为
+        REPORT_DIR下的CSV文件
+        """
+        roots = self._get_scan_roots()
+        self.logger.info(f"Building space report for: {roots}")
+        print(lang.get_string("space_report_scanning"), '\n')
+
+        with self._track_progress("space_report") as progress:
+            report = SpaceReport(top_k, self.exclusions, progress, self.token, self.throttle)
+            if roots:
+                workers = min(len(roots), CleanupConfig.SCAN_MAX_WORKERS)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    list(executor.map(report.add_root, roots))
+        if self.token.cancelled:
+            self.logger.warning("Space report cancelled, report not saved")
+            print(lang.get_string("operation_cancelled"), '\n')
+            return None
+
+        for usage in sorted(report.roots, key=lambda u: u.path):
+            print(f"{usage.path} {usage.files} ({format_size(usage.size)})")
+        print(f"{lang.get_string('space_report_total')}: {report.total_files} "
+              f"({format_size(report.total_size)}) \n")
+        print(f"{lang.get_string('space_report_top_directories')}:")
+        for usage in report.largest_directories():
+            print(f"  {format_size(usage.size):>10}  {usage.path} ({usage.files})")
+        print(f"\n{lang.get_string('space_report_top_files')}:")
+        for record in report.largest_files():
+            print(f"  {format_size(record.size):>10}  {record.path}")
+
+        timestamp = time.strftime('%Y%m%d_%H%M%S')
+        csv_file = Path(CleanupConfig.REPORT_DIR) / f"space_report_{timestamp}.csv"
+        try:
+            report.write_csv(csv_file)
+            print(f"\n{lang.get_string('space_report_saved')}: {csv_file} \n")
+        except OSError as e:
+            self.logger.error(f"Failed to save space report {csv_file}: {e}")
+            print(f"\n{lang.get_string('os_error')}: {csv_file} {e} \n")
+        return report
+
+    def find_duplicates(self, min_size: int = CleanupConfig.DUPLICATE_MIN_SIZE
+                        ) -> Optional[List[DuplicateGroup]]:
+        """
+        查找所有驱动器上内容相同的文件，不删除任何文件
+
+        并行扫描得到的文件先按大小分组，只有大小相同的文件才读取首尾部分
+        计算哈希，部分哈希仍相同时才计算完整哈希。结果按可释放空间排序，
+        输出前REPORT_TOP_K组并将全部结果保存为REPORT_DIR下的CSV文件
+        """
+        roots = self._get_scan_roots()
+        self.logger.info(f"Searching duplicate files on: {roots}")
+        print(lang.get_string("duplicates_scanning"), '\n')
+
+        def on_error(path: str, e: OSError) -> None:
+            self.logger.warning(f"Failed to read file for duplicate check: {path} {e}")
+
+        try:
+            with self._track_progress("find_duplicates") as progress:
+                scanner = ParallelScanner(
+                    exclusions=self.exclusions,
+                    max_workers=CleanupConfig.SCAN_MAX_WORKERS,
+                    progress=progress,
+                    token=self.token,
+                    throttle=self.throttle,
+                    record_filter=lambda record: record.size >= min_size
+                )
+                finder = DuplicateFinder(min_size, CleanupConfig.DUPLICATE_HASH_WORKERS,
+                                         on_error, progress, self.token, self.throttle)
+                groups = finder.find(scanner.scan(roots))
+            for drive, e in scanner.errors:
+                self.logger.error(f"Error scanning drive for duplicates: {drive} {e}")
+        except OperationCancelled:
+            self.logger.warning("Duplicate search cancelled")
+            print(lang.get_string("operation_cancelled"), '\n')
+            return None
+
+        wasted = sum(group.wasted for group in groups)
+        print(f"{lang.get_string('duplicates_found')}: {len(groups)}, "
+              f"{lang.get_string('duplicates_wasted')}: {format_size(wasted)} \n")
+        print(f"{lang.get_string('duplicates_bytes_read')}: {format_size(finder.bytes_read)} / "
+              f"{format_size(finder.bytes_total)} \n")
+        for group in groups[:CleanupConfig.REPORT_TOP_K]:
+            print(f"{format_size(group.size)} x {len(group.paths)}:")
+            for path in group.paths:
+                print(f"  {path}")
+
+        if groups:
+            timestamp = time.strftime('%Y%m%d_%H%M%S')
+            csv_file = Path(CleanupConfig.REPORT_DIR) / f"duplicates_{timestamp}.csv"
+            try:
+                DuplicateFinder.write_csv(groups, csv_file)
+                print(f"\n{lang.get_string('duplicates_saved')}: {csv_file} \n")
+            except OSError as e:
+                self.logger.error(f"Failed to save duplicate report {csv_file}: {e}")
+                print(f"\n{lang.get_string('os_error')}: {csv_file} {e} \n")
+        return groups
+
     @staticmethod
-    def clean_temp_directory() -> None:
-        """根据系统环境变量清理临时目录"""
+    def clean_temp_directory(progress: Optional[ProgressTracker] = None,
+                             token: Optional[CancellationToken] = None,
+                             throttle: Optional[IOThrottle] = None) -> Optional[RemovalStats]:
+        """
+        根据系统环境变量清理临时目录，自底向上删除文件和已清空的目录
+
+        取消时停止清理并返回已完成部分的统计
+        """
         temp_dir = Path(os.getenv('TEMP', os.getenv('TMP', '/tmp')))
         
         if not temp_dir.exists() or not temp_dir.is_dir():
             logger.error(f"Invalid temp dir: {temp_dir}")
-            return
-            
-        for item in temp_dir.rglob("*"):
-            try:
-                if item.is_file():
-                    item.unlink()
-                elif item.is_dir():
-                    item.rmdir()
-                logger.info(f"Removed: {item}")
-                print(f"{lang.get_string('removed')}: {item} \n")
-            except (PermissionError, OSError) as e:
-                logger.error(f"Remove failed: {item} {e}")
-                print(f"{lang.get_string('remove_failed')}: {item} {e} \n")
+            return None
+
+        def on_error(item: str, e: OSError) -> None:
+            logger.error(f"Remove failed: {item} {e}")
+            print(f"{lang.get_string('remove_failed')}: {item} {e} \n")
+
+        remover = BottomUpRemover(exclusions=ExclusionTrie.load(), on_error=on_error,
+                                  progress=progress, token=token, throttle=throttle)
+        stats = remover.remove_contents(str(temp_dir))
+        logger.info(f"Temp directory cleaned: {stats}")
+        print(f"{lang.get_string('removed')}: {stats.files_removed} "
+              f"({format_size(stats.bytes_reclaimed)}), "
+              f"{lang.get_string('temp_dirs_removed')}: {stats.dirs_removed}, "
+              f"{lang.get_string('temp_items_in_use')}: {stats.pruned} \n")
+        return stats
+
+    def _clean_profile_targets(self, targets: List[ProfileTarget]) -> RemovalStats:
+        """并发清理多个用户的目录，输出每个用户的统计，返回合计"""
+        def on_error(item: str, e: OSError) -> None:
+            self.logger.error(f"Remove failed: {item} {e}")
+
+        cleaner = ProfileCleaner(self.exclusions, on_error, CleanupConfig.PROFILE_MAX_WORKERS,
+                                 self.progress, self.token, self.throttle)
+        results = cleaner.clean(targets)
+        for profile, stats in sorted(results.items()):
+            self.logger.info(f"Profile {profile} cleaned: {stats}")
+            print(f"  {profile}: {stats.files_removed} ({format_size(stats.bytes_reclaimed)}), "
+                  f"{lang.get_string('temp_dirs_removed')}: {stats.dirs_removed}, "
+                  f"{lang.get_string('temp_items_in_use')}: {stats.pruned}")
+        total = ProfileCleaner.total(results)
+        print(f"{lang.get_string('removed')}: {total.files_removed} "
+              f"({format_size(total.bytes_reclaimed)}), "
+              f"{lang.get_string('failed')}: {total.failed} \n")
+        return total
+
+    def clean_profile_temp_directories(self, profiles_root: Optional[str] = None) -> RemovalStats:
+        """清理所有用户配置文件中的临时目录，用于多人共用的主机"""
+        profiles_root = profiles_root or CleanupConfig.PROFILES_ROOT or default_profiles_root()
+        targets = profile_temp_targets(profiles_root)
+        self.logger.info(f"Cleaning temp directories of {len(targets)} profiles in {profiles_root}")
+        print(f"{lang.get_string('cleaning_profile_temp')}: {len(targets)} \n")
+        return self._clean_profile_targets(targets)
+
+    def clean_profile_recycle_bins(self) -> RemovalStats:
+        """清理各驱动器回收站中所有用户的文件"""
+        targets = recycle_bin_targets(self._get_scan_roots())
+        self.logger.info(f"Cleaning {len(targets)} recycle bin folders")
+        print(f"{lang.get_string('cleaning_profile_recycle_bins')}: {len(targets)} \n")
+        return self._clean_profile_targets(targets)
 
     @staticmethod
     def get_drive_letters_with_win32file():
@@ -159,26 +581,96 @@ class DeleteUselessFile:
             err = ctypes.get_last_error() 
             print(f"{lang.get_string('recycle_bin_clean_failed')}: {err} \n") 
 
-    def cleanup_system(self) -> None:
-        """执行完整的系统清理"""
+    @staticmethod
+    def has_checkpoint() -> bool:
+        """上次的完整清理是否被中断并留下了检查点"""
+        return CleanupCheckpoint.exists()
+
+    def cleanup_system(self, resume: bool = False) -> None:
+        """
+        执行完整的系统清理
+
+        参数:
+            resume: 是否从上次中断的检查点继续，跳过已完成的阶段
+        """
+        interval = CleanupConfig.CHECKPOINT_INTERVAL
+        checkpoint = CleanupCheckpoint.load(interval=interval) if resume else None
+        if checkpoint is not None:
+            self.logger.info(f"Resuming cleanup from stage {checkpoint.stage}: "
+                             f"{checkpoint.deleted} files already deleted")
+            print(f"{lang.get_string('resuming_cleanup')}: {checkpoint.deleted} "
+                  f"({format_size(checkpoint.bytes_reclaimed)}) \n")
+        else:
+            checkpoint = CleanupCheckpoint(interval=interval)
+        stages = self.CLEANUP_STAGES
+        start = stages.index(checkpoint.stage) if checkpoint.stage in stages else 0
+        self.checkpoint = checkpoint
+
         try:
-            if self.clean_recycle_bin():
-                self.logger.info("Recycle bin cleaned")
-                print(lang.get_string("recycle_bin_cleaned"), '\n')
-            else:
-                self.logger.warning("Recycle bin clean failed")
-                print(lang.get_string("recycle_bin_clean_failed"), '\n')
-
-            # 清理临时文件
-            print(lang.get_string("cleaning_temp_files"), '\n')
-            self.logger.info("Cleaning temp files")
-            self.clean_temp_directory()
-
-            # 清理日志文件
-            print(lang.get_string("cleaning_log_files"), '\n')
-            self.logger.info("Cleaning log files")
-            self.delete_log_files()
-            
+            with self._track_progress("cleanup_system"):
+                if start <= stages.index("recycle_bin"):
+                    checkpoint.enter_stage("recycle_bin")
+                    if CleanupConfig.MULTI_PROFILE_CLEANUP:
+                        # 直接清理各驱动器回收站中每个用户的子目录
+                        stats = self.clean_profile_recycle_bins()
+                        checkpoint.deleted += stats.files_removed
+                        checkpoint.bytes_reclaimed += stats.bytes_reclaimed
+                        checkpoint.failed += stats.failed
+                        self.token.raise_if_cancelled()
+                    elif self.clean_recycle_bin():
+                        self.logger.info("Recycle bin cleaned")
+                        print(lang.get_string("recycle_bin_cleaned"), '\n')
+                    else:
+                        self.logger.warning("Recycle bin clean failed")
+                        print(lang.get_string("recycle_bin_clean_failed"), '\n')
+
+                # 清理临时文件
+                if start <= stages.index("temp_files"):
+                    checkpoint.enter_stage("temp_files")
+                    print(lang.get_string("cleaning_temp_files"), '\n')
+                    self.logger.info("Cleaning temp files")
+                    if CleanupConfig.MULTI_PROFILE_CLEANUP:
+                        stats = self.clean_profile_temp_directories()
+                    else:
+                        stats = self.clean_temp_directory(self.progress, self.token,
+                                                          self.throttle)
+                    if stats is not None:
+                        checkpoint.deleted += stats.files_removed
+                        checkpoint.bytes_reclaimed += stats.bytes_reclaimed
+                        checkpoint.failed += stats.failed
+                    self.token.raise_if_cancelled()
+
+                # 清理匹配配置后缀的文件
+                checkpoint.enter_stage("matching_files")
+                extensions = ", ".join(sorted(self.rules.name_filter.extensions))
+                print(f"{lang.get_string('cleaning_matching_files')}: {extensions}", '\n')
+                self.logger.info(f"Cleaning files with extensions: {extensions}")
+                for rule in self.rules.rules:
+                    print(f"{lang.get_string('cleanup_rule')}: {rule.describe()}")
+                    self.logger.info(f"Cleanup rule: {rule.describe()}")
+                self.delete_log_files()
+                self.purge_quarantine()
+
+                self.logger.info(f"System cleanup complete: {checkpoint.deleted} files deleted, "
+                                 f"{checkpoint.bytes_reclaimed} bytes reclaimed")
+                print(f"{lang.get_string('cleanup_complete')}: {checkpoint.deleted} "
+                      f"({format_size(checkpoint.bytes_reclaimed)}), "
+                      f"{lang.get_string('failed')}: {checkpoint.failed} \n")
+                checkpoint.clear()
+
+        except OperationCancelled:
+            # 保留检查点，下次可以从中断处继续
+            checkpoint.save()
+            self.logger.warning(f"System cleanup cancelled at stage {checkpoint.stage}: "
+                                f"{checkpoint.deleted} files deleted, "
+                                f"{checkpoint.bytes_reclaimed} bytes reclaimed")
+            print(f"{lang.get_string('cleanup_cancelled')}: {checkpoint.deleted} "
+                  f"({format_size(checkpoint.bytes_reclaimed)}), "
+                  f"{lang.get_string('failed')}: {checkpoint.failed} \n")
         except Exception as e:
+            # 保留检查点，下次可以从中断处继续
+            checkpoint.save()
             self.logger.error(f"System cleanup error: {str(e)}")
             print(f"{lang.get_string('system_cleanup_error')}: {str(e)} \n")
+        finally:
+            self.checkpoint = None
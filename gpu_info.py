@@ -1,7 +1,10 @@
-import subprocess 
 import io_prompts as iop
 from languages.language_config import LanguageManager as lang
 from log_utils import LogManager
+from config.timeout_config import TimeoutConfig
+from commands import run_command
+from commands.parsers import (nvidia_smi_query_args, parse_nvidia_smi_csv,
+                              parse_wmic_video_controllers, wmic_video_controller_args)
 
 logger = LogManager().get_logger(__name__)
 
@@ -13,57 +16,49 @@ class GPUInfo:
         try:
             logger.info("Getting GPU info")
             try:
-                # 使用 cp936 编码处理 nvidia-smi 命令输出
-                process = subprocess.run(
-                    ['cmd.exe', '/c', 'nvidia-smi'], 
-                    shell=False, 
-                    check=True, 
-                    capture_output=True,  # 捕获输出
-                    encoding='cp936',     # 使用 Windows 中文编码
-                    errors='replace',     # 处理无法解码的字符
-                    timeout=10
-                )
-                print(process.stdout)
-                return 0
-                
-            except subprocess.TimeoutExpired:
+                process = run_command(nvidia_smi_query_args(),
+                                      timeout=TimeoutConfig.get_timeout('gpu_info'),
+                                      operation='gpu_info')
+            except FileNotFoundError:
+                # 没有安装NVIDIA驱动时没有nvidia-smi，同样回退到 wmic
+                logger.info("nvidia-smi not found")
+                process = None
+            if process is not None and process.timed_out:
                 self.running = False
                 logger.error("GPU info command timed out")
                 print(lang.get_string("gpu_command_timeout"))
                 return -1
-                
-            except subprocess.CalledProcessError as e: 
-                iop.clear_screen()
-                self.running = False    
-                logger.info("Getting GPU basic info")
 
-                try:
-                    # 使用 cp936 编码处理 wmic 命令输出
-                    result = subprocess.run(
-                        ['wmic', 'path', 'win32_VideoController', 'get', 'name'], 
-                        capture_output=True,
-                        encoding='cp936',  # 使用 Windows 中文编码
-                        errors='replace',   # 处理无法解码的字符
-                        timeout=5
-                    )
+            gpus = parse_nvidia_smi_csv(process.stdout) if process is not None and process.ok else []
+            if gpus:
+                for gpu in gpus:
+                    self._print_gpu_status(gpu)
+                return 0
+
+            # nvidia-smi 不可用时回退到 wmic 获取基本信息
+            iop.clear_screen()
+            self.running = False
+            logger.info("Getting GPU basic info")
 
-                    gpu_info = result.stdout.strip().split('\n')[1:]  
-                    gpu_info = [info for info in gpu_info if info.strip()]  
+            result = run_command(wmic_video_controller_args(), timeout=5)
+            if result.timed_out:
+                logger.error("GPU info command (wmic) timed out")
+                print(lang.get_string("gpu_command_timeout"))
+            else:
+                controllers = parse_wmic_video_controllers(result.stdout)
+                if controllers:
+                    logger.info("GPU info found")
+                    print(f"\n{lang.get_string('gpu_info')}:")
+                    for controller in controllers:
+                        print(f"- {controller.name} {lang.get_string('gpu_info_limited')}")
+                        if controller.driver_version:
+                            print(f"  {lang.get_string('gpu_driver_version')}: "
+                                  f"{controller.driver_version}")
+                else:
+                    logger.warning("No GPU info found")
+                    print(lang.get_string("gpu_not_found"))
 
-                    if gpu_info:
-                        logger.info("GPU info found")
-                        print(f"\n{lang.get_string('gpu_info')}:")
-                        for gpu in gpu_info:
-                            print(f"- {gpu.strip()} {lang.get_string('gpu_info_limited')}")
-                    else:
-                        logger.warning("No GPU info found")
-                        print(lang.get_string("gpu_not_found"))
-                            
-                except subprocess.TimeoutExpired:
-                    logger.error("GPU info command (wmic) timed out")
-                    print(lang.get_string("gpu_command_timeout"))
-                    
-                return e
+            return process.returncode if process is not None else -2
                 
         except FileNotFoundError:
             logger.error("GPU info command not found")
@@ -85,5 +80,21 @@ class GPUInfo:
             
         return 0
 
+    @staticmethod
+    def _print_gpu_status(gpu):
+        """输出一块GPU的状态，驱动不支持的项不显示"""
+        print(f"\nGPU {gpu.index}: {gpu.name}")
+        print(f"  {lang.get_string('gpu_driver_version')}: {gpu.driver_version}")
+        if gpu.temperature is not None:
+            print(f"  {lang.get_string('gpu_temperature')}: {gpu.temperature:.0f} °C")
+        if gpu.utilization is not None:
+            print(f"  {lang.get_string('gpu_utilization')}: {gpu.utilization:.0f}%")
+        if gpu.memory_percent is not None:
+            print(f"  {lang.get_string('gpu_memory')}: {gpu.memory_used:.0f} / "
+                  f"{gpu.memory_total:.0f} MiB ({gpu.memory_percent:.0f}%)")
+        if gpu.power_draw is not None:
+            limit = f" / {gpu.power_limit:.0f}" if gpu.power_limit is not None else ""
+            print(f"  {lang.get_string('gpu_power')}: {gpu.power_draw:.0f}{limit} W")
+
     def state(self):
         return self.running   
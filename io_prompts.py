@@ -29,6 +29,34 @@ def get_root_window():
     global ROOT_WINDOW
     return ROOT_WINDOW
 
+def call_in_ui_thread(func: Callable, *args, **kwargs) -> Any:
+    """
+    在界面线程中调用func并等待其返回
+
+    Tk的窗口和对话框只能在界面线程中创建，工具在后台线程中运行时通过
+    这个函数弹出对话框；已在界面线程中或没有主窗口时直接调用
+    """
+    root = get_root_window()
+    if root is None or threading.current_thread() is threading.main_thread():
+        return func(*args, **kwargs)
+
+    done = threading.Event()
+    outcome = {}
+
+    def invoke():
+        try:
+            outcome["value"] = func(*args, **kwargs)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    root.after(0, invoke)
+    done.wait()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("value")
+
 def confirm_action(prompt: str = None) -> bool:
     """获取用户对操作的确认"""
     global IN_GUI_MODE
@@ -270,7 +270,12 @@ def init_language_strings():
             "网络套接字重置", 
             "驱动器检查", 
             "修复引导", 
-            "病毒扫描"
+            "病毒扫描",
+            "空间占用报告",
+            "查找重复文件",
+            "从隔离区恢复",
+            "生成清理计划",
+            "执行清理计划"
         ],
         
         # Settings
@@ -331,6 +336,29 @@ def init_language_strings():
         "subprocess_error": "子进程错误",
         "chkdsk_timeout": "磁盘检查操作超时",
         "chkdsk_error": "磁盘检查错误",
+        "check_drives_title": "检查所有驱动器",
+        "chkdsk_drive_started": "开始检查驱动器",
+        "chkdsk_drive_finished": "驱动器检查结束",
+        "chkdsk_summary": "磁盘检查汇总",
+        "chkdsk_physical_disk": "物理磁盘",
+        "chkdsk_status_ok": "未发现问题",
+        "chkdsk_status_fixed": "已修复错误",
+        "chkdsk_status_cleanup": "已执行清理",
+        "chkdsk_status_errors": "发现错误，需要以修复模式检查",
+        "chkdsk_status_not_run": "未能检查",
+        "chkdsk_volume_in_use_schedule": "卷正在使用，未能检查。请在管理员命令提示符中运行 chkdsk {0} /f 并回答 Y，在下次重启时检查",
+        "chkdsk_volume_in_use_dismount": "卷正在被其他程序使用，未能检查。请关闭使用 {0} 的程序后重试",
+        "component_store_not_repairable": "组件存储无法修复，请使用Windows安装介质作为修复源",
+        "health_result_cached": "使用{0}前的检查结果",
+        "threats_resolved": "以下威胁已被处理",
+        "threat_detected_at": "检测时间",
+        "gpu_info": "显卡信息",
+        "gpu_info_limited": "（未安装NVIDIA驱动，信息有限）",
+        "gpu_driver_version": "驱动版本",
+        "gpu_temperature": "温度",
+        "gpu_utilization": "使用率",
+        "gpu_memory": "显存",
+        "gpu_power": "功耗",
         "bootrec_specify_action": "请指定bootrec操作（如/fixmbr, /fixboot, /rebuildbcd）",
         "bootrec_completed": "引导修复完成",
         "bootrec_error": "引导修复错误",
@@ -361,6 +389,54 @@ def init_language_strings():
         "access_recycle_bin_error": "访问回收站错误",
         "cleaning_temp_files": "正在清理临时文件",
         "cleaning_log_files": "正在清理日志文件",
+        "cleaning_matching_files": "正在清理以下后缀的文件",
+        "planning_cleanup": "正在生成清理计划（不会删除任何文件）...",
+        "cleanup_plan_total": "计划删除的文件",
+        "cleanup_plan_by_extension": "按后缀汇总",
+        "cleanup_plan_top_directories": "可释放空间最多的目录",
+        "cleanup_plan_saved": "清理计划已保存",
+        "space_report_scanning": "正在统计各驱动器的空间占用...",
+        "space_report_total": "合计",
+        "space_report_top_directories": "占用空间最大的目录",
+        "space_report_top_files": "最大的文件",
+        "space_report_saved": "空间占用报告已保存",
+        "duplicates_scanning": "正在查找重复文件...",
+        "duplicates_found": "重复文件组",
+        "duplicates_wasted": "可释放空间",
+        "duplicates_bytes_read": "已读取",
+        "duplicates_saved": "重复文件列表已保存",
+        "quarantine_restore_prompt": "输入要恢复的文件的原路径",
+        "quarantine_restored": "已从隔离区恢复",
+        "quarantine_not_found": "隔离区中没有该文件",
+        "quarantine_target_exists": "原路径已存在文件，未恢复",
+        "quarantine_purged": "已清除过期的隔离文件",
+        "cleaning_profile_temp": "正在清理所有用户的临时目录",
+        "cleaning_profile_recycle_bins": "正在清理所有用户的回收站",
+        "cleanup_plan_not_found": "未找到清理计划",
+        "cleanup_plan_invalid": "清理计划无效",
+        "cleanup_plan_file_changed": "文件在计划生成后已变化，已跳过",
+        "cleanup_plan_executed": "清理计划执行完成，已删除",
+        "skipped": "已跳过",
+        "failed": "失败",
+        "scan_budget_exhausted": "扫描时间预算已用完，下次运行将从中断处继续",
+        "cleanup_rule": "清理规则",
+        "cleanup_complete": "系统清理完成，已删除",
+        "resume_cleanup_title": "继续清理",
+        "resume_cleanup_prompt": "上次的清理未完成，是否从中断处继续？",
+        "resuming_cleanup": "从上次中断处继续清理，之前已删除",
+        "temp_dirs_removed": "删除的空目录",
+        "temp_items_in_use": "因正在使用而跳过的项目",
+        "progress_scanned": "已扫描",
+        "progress_candidates": "候选文件",
+        "progress_reclaimed": "已释放",
+        "progress_finished": "已完成",
+        "progress_failed": "失败",
+        "progress_cancelled": "已取消",
+        "progress_timed_out": "已超时",
+        "progress_eta": "剩余时间",
+        "cleanup_cancelled": "清理已取消，已删除",
+        "stop": "停止",
+        "stopping": "正在停止...",
         "running_sfc_scannow": "正在运行系统文件检查器(sfc /scannow)...",
         "please_wait": "请耐心等待，这可能需要一些时间...",
         "sfc_failed": "系统文件检查失败",
@@ -469,6 +545,57 @@ def init_language_strings():
         "sfc_failed": "System file check failed",
         "error_details": "Error Details",
         "removed": "Removed",
+        "remove_failed": "Remove failed",
+        "cleaning_temp_files": "Cleaning temporary files",
+        "cleaning_matching_files": "Cleaning files with extensions",
+        "planning_cleanup": "Building cleanup plan (no files will be deleted)...",
+        "cleanup_plan_total": "Files planned for deletion",
+        "cleanup_plan_by_extension": "Totals by extension",
+        "cleanup_plan_top_directories": "Directories with the most reclaimable space",
+        "cleanup_plan_saved": "Cleanup plan saved",
+        "space_report_scanning": "Measuring disk usage on all drives...",
+        "space_report_total": "Total",
+        "space_report_top_directories": "Largest directories",
+        "space_report_top_files": "Largest files",
+        "space_report_saved": "Space report saved",
+        "duplicates_scanning": "Searching for duplicate files...",
+        "duplicates_found": "Duplicate groups",
+        "duplicates_wasted": "Reclaimable space",
+        "duplicates_bytes_read": "Read",
+        "duplicates_saved": "Duplicate file list saved",
+        "quarantine_restore_prompt": "Enter the original path of the file to restore",
+        "quarantine_restored": "Restored from quarantine",
+        "quarantine_not_found": "File not found in quarantine",
+        "quarantine_target_exists": "A file already exists at the original path, not restored",
+        "quarantine_purged": "Expired quarantined files purged",
+        "cleaning_profile_temp": "Cleaning temp directories of all profiles",
+        "cleaning_profile_recycle_bins": "Cleaning recycle bins of all profiles",
+        "cleanup_plan_not_found": "Cleanup plan not found",
+        "cleanup_plan_invalid": "Invalid cleanup plan",
+        "cleanup_plan_file_changed": "File changed since the plan was created, skipped",
+        "cleanup_plan_executed": "Cleanup plan executed, deleted",
+        "skipped": "Skipped",
+        "failed": "Failed",
+        "scan_budget_exhausted": "Scan time budget used up, the next run will resume where this one stopped",
+        "cleanup_rule": "Cleanup rule",
+        "cleanup_complete": "System cleanup complete, deleted",
+        "resume_cleanup_title": "Resume Cleanup",
+        "resume_cleanup_prompt": "The last cleanup did not finish. Resume from where it stopped?",
+        "resuming_cleanup": "Resuming the interrupted cleanup, previously deleted",
+        "temp_dirs_removed": "Empty directories removed",
+        "temp_items_in_use": "Items skipped because they are in use",
+        "progress_scanned": "Scanned",
+        "progress_candidates": "Candidates",
+        "progress_reclaimed": "Reclaimed",
+        "progress_finished": "Finished",
+        "progress_failed": "Failed",
+        "progress_cancelled": "Cancelled",
+        "progress_timed_out": "Timed out",
+        "progress_eta": "ETA",
+        "cleanup_cancelled": "Cleanup cancelled, deleted",
+        "operation_cancelled": "Operation cancelled",
+        "stop": "Stop",
+        "stopping": "Stopping...",
         "confirm_action": "Confirm this action?",
         "current_language": "Current Language",
         "set_chinese": "Set to Chinese",
@@ -498,7 +625,12 @@ def init_language_strings():
             "Network Socket Reset", 
             "Drive Check", 
             "Boot Repair", 
-            "Virus Scan"
+            "Virus Scan",
+            "Disk Space Report",
+            "Find Duplicate Files",
+            "Restore From Quarantine",
+            "Plan Cleanup",
+            "Execute Cleanup Plan"
         ],
         
         # Settings
@@ -515,6 +647,30 @@ def init_language_strings():
         
         "press_esc_to_stop": "Press ESC to stop monitoring",
         "confirm_check_all_drives": "Confirm checking all drives? This may take a while.",
+        "check_drives_title": "Check All Drives",
+        "readonly_mode_prompt": "Check in read-only mode? (y/n)",
+        "chkdsk_drive_started": "Checking drive",
+        "chkdsk_drive_finished": "Finished checking drive",
+        "chkdsk_summary": "Disk check summary",
+        "chkdsk_physical_disk": "physical disk",
+        "chkdsk_status_ok": "No problems found",
+        "chkdsk_status_fixed": "Errors fixed",
+        "chkdsk_status_cleanup": "Cleanup performed",
+        "chkdsk_status_errors": "Errors found, run in repair mode",
+        "chkdsk_status_not_run": "Not checked",
+        "chkdsk_volume_in_use_schedule": "Volume in use, not checked. Run chkdsk {0} /f from an elevated command prompt and answer Y to check it at the next restart",
+        "chkdsk_volume_in_use_dismount": "Volume in use by other programs, not checked. Close the programs using {0} and try again",
+        "component_store_not_repairable": "The component store cannot be repaired, use Windows installation media as the repair source",
+        "health_result_cached": "Using the check result from {0} ago",
+        "threats_resolved": "These threats have already been handled",
+        "threat_detected_at": "Detected at",
+        "gpu_info": "Graphics adapters",
+        "gpu_info_limited": "(NVIDIA driver not available, limited information)",
+        "gpu_driver_version": "Driver version",
+        "gpu_temperature": "Temperature",
+        "gpu_utilization": "Utilization",
+        "gpu_memory": "Memory",
+        "gpu_power": "Power",
         "drive_check_cancelled": "Drive check cancelled",
         "select_language": "Select Language",
         "select_theme": "Select Theme",
@@ -1,16 +1,58 @@
 import os
 import time
-import subprocess
 from log_utils import LogManager
 from languages.language_config import LanguageManager
 from config.timeout_config import TimeoutConfig
+from config.command_config import CommandConfig
+from commands import run_command, operation_key, CommandProgressTracker
+from commands.progress import result_status
+from commands.chkdsk import (PROMPT_SCHEDULE, ChkdskOrchestrator, fixed_drives,
+                             volume_prompt)
+from commands.parsers import (HEALTH_NOT_REPAIRABLE, HEALTH_UNKNOWN, dism_health_args,
+                              parse_dism_health)
+from commands.health_cache import configure_health_cache, get_health_cache
+from cleanup.formatting import format_duration
 
 logger = LogManager().get_logger(__name__)
 
+# 有效期内、系统未重启且未安装更新时复用DISM的检查结果
+configure_health_cache(
+    ttl=CommandConfig.HEALTH_CACHE_TTL,
+    enabled=CommandConfig.HEALTH_CACHE_ENABLED
+)
+
 class SystemCheckFix:
     def __init__(self):
         pass
 
+    @staticmethod
+    def _print_line(line):
+        """逐行输出命令的执行过程，跳过空行"""
+        if line.strip():
+            print(line.rstrip(), flush=True)
+
+    @staticmethod
+    def _print_drive_line(drive, line):
+        """输出同时检查的某个驱动器的一行，以驱动器号开头以便区分"""
+        if line.strip():
+            print(f"[{drive}] {line.rstrip()}", flush=True)
+
+    @staticmethod
+    def _run_with_progress(args, timeout, operation=None):
+        """
+        执行命令，百分比进度发布给进度条，其余输出逐行打印
+
+        命令成功结束时进度条显示已完成，超时、取消、失败或未能启动时
+        显示相应的状态
+        """
+        tracker = CommandProgressTracker(args[0], on_output=SystemCheckFix._print_line)
+        result = None
+        try:
+            result = run_command(args, timeout=timeout, on_line=tracker.feed, operation=operation)
+            return result
+        finally:
+            tracker.finish(result_status(result))
+
     @staticmethod
     def sfc_scannow():
         """使用系统文件检查器扫描系统文件并修复问题"""
@@ -19,22 +61,25 @@ class SystemCheckFix:
             print(LanguageManager.get_string("running_sfc_scannow"))
             print(LanguageManager.get_string("please_wait"))
             
-            # 使用 subprocess.run 而不是 Popen，以简化实现
-            process = subprocess.run(
-                ['sfc', '/scannow'], 
-                shell=False,
-                capture_output=True,
-                encoding='cp936',
-                errors='replace',
-                timeout=3600  # 1小时超时
+            timeout = TimeoutConfig.get_timeout('sfc')
+            process = SystemCheckFix._run_with_progress(
+                ['sfc', '/scannow'], timeout=timeout, operation='sfc'
             )
             
             # 分析执行结果
-            if process.returncode == 0:
+            if process.timed_out:
+                logger.error(f"SFC operation timed out after {timeout:.0f}s")
+                print(f"{LanguageManager.get_string('subprocess_error')}: "
+                      f"{LanguageManager.get_string('operation_timeout')}")
+            elif process.cancelled:
+                print(LanguageManager.get_string("operation_cancelled"))
+            elif process.returncode == 0:
                 logger.info("System file checker completed successfully")
                 if "Windows Resource Protection did not find any integrity violations" in process.stdout:
                     print(LanguageManager.get_string("sfc_no_violations"))
                 else:
+                    # sfc修复了系统文件，之前的DISM检查结果不再有效
+                    get_health_cache().invalidate()
                     print(LanguageManager.get_string("sfc_completed_violations"))
                     choice = input(LanguageManager.get_string("fix_system_integrity")).lower()
                     if choice == "y":
@@ -45,17 +90,13 @@ class SystemCheckFix:
                 print(LanguageManager.get_string("sfc_failed"))
                 print(f"{LanguageManager.get_string('error_details')}: {process.stderr}")
                 
-        except subprocess.TimeoutExpired as e:
-            logger.error("SFC operation timed out after 1 hour")
-            print(f"{LanguageManager.get_string('subprocess_error')}: {str(e)}")
-                
         except FileNotFoundError:
             print(LanguageManager.get_string("sfc_not_found"))
             logger.error("SFC command not found")
         except PermissionError:
             print(LanguageManager.get_string("sfc_permission_denied"))
             logger.error("Permission denied executing SFC")
-        except subprocess.SubprocessError as e:
+        except OSError as e:
             print(f"{LanguageManager.get_string('subprocess_error')}: {e}")
             logger.error(f"Subprocess error: {e}")
         except Exception as e:
@@ -70,28 +111,105 @@ class SystemCheckFix:
             if action:
                 cmd.append(action)
             
-            process = subprocess.run(
-                cmd,
-                shell=False,
-                check=True,
-                capture_output=True,
-                encoding='cp936',
-                errors='replace',
-                timeout=TimeoutConfig.get_timeout('chkdsk')
+            operation = operation_key('chkdsk', drive, action)
+            process = SystemCheckFix._run_with_progress(
+                cmd, timeout=TimeoutConfig.get_timeout(operation), operation=operation
             )
-            print(process.stdout)
-            logger.info(f"Disk check completed for drive {drive}")
+            # 标准输入已关闭，卷正在使用时chkdsk的提问得不到回答
+            prompt = volume_prompt(process.stdout)
+            if process.timed_out:
+                logger.error(f"Disk check timed out for drive {drive}")
+                print(LanguageManager.get_string("chkdsk_timeout"))
+            elif process.cancelled:
+                print(LanguageManager.get_string("operation_cancelled"))
+            elif prompt:
+                logger.warning(f"Disk check of {drive} not run: volume in use ({prompt})")
+                print(SystemCheckFix._volume_in_use_message(drive, prompt))
+            elif process.returncode != 0:
+                logger.error(f"Disk check error: {process.stderr}")
+                print(f"{LanguageManager.get_string('chkdsk_error')}: {process.stderr}")
+            else:
+                logger.info(f"Disk check completed for drive {drive}")
             
-        except subprocess.TimeoutExpired:
-            logger.error(f"Disk check timed out for drive {drive}")
-            print(LanguageManager.get_string("chkdsk_timeout"))
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Disk check error: {e.stderr}")
-            print(f"{LanguageManager.get_string('chkdsk_error')}: {e.stderr}")
         except Exception as e:
             logger.error(f"Unexpected disk check error: {e}")
             print(f"{LanguageManager.get_string('unexpected_error')}: {e}")
 
+    @staticmethod
+    def chkdsk_all(drives, repair=False):
+        """
+        检查多个驱动器，只读模式下不同物理磁盘上的驱动器同时检查
+
+        参数:
+            drives: 驱动器列表，如 ['C:', 'D:']，非本地固定磁盘被跳过
+            repair: 是否以修复模式 (/f) 检查，修复模式依次检查
+        """
+        drives = fixed_drives(drives)
+        logger.info(f"Checking drives {drives}, repair={repair}")
+        print(f"{LanguageManager.get_string('checking_all_drives')}: {' '.join(drives)}")
+
+        def started(drive, disks):
+            disk_text = ','.join(str(disk) for disk in sorted(disks)) or '?'
+            print(f"{LanguageManager.get_string('chkdsk_drive_started')} {drive} "
+                  f"({LanguageManager.get_string('chkdsk_physical_disk')} {disk_text})", flush=True)
+
+        def finished(result):
+            print(f"{LanguageManager.get_string('chkdsk_drive_finished')} {result.drive}: "
+                  f"{SystemCheckFix._chkdsk_status(result)}", flush=True)
+
+        try:
+            orchestrator = ChkdskOrchestrator(
+                max_parallel=CommandConfig.CHKDSK_MAX_PARALLEL,
+                timeout=TimeoutConfig.get_timeout('chkdsk'),
+                on_started=started, on_finished=finished,
+                on_output=SystemCheckFix._print_drive_line, operation='chkdsk',
+                timeout_for=TimeoutConfig.get_timeout
+            )
+            results = orchestrator.check(drives, repair)
+        except Exception as e:
+            logger.error(f"Unexpected disk check error: {e}")
+            print(f"{LanguageManager.get_string('unexpected_error')}: {e}")
+            return []
+
+        print(f"\n{LanguageManager.get_string('chkdsk_summary')}:")
+        for result in results:
+            duration = f"{result.result.duration:.0f}s" if result.result is not None else "-"
+            print(f"  {result.drive:<4}{SystemCheckFix._chkdsk_status(result)} ({duration})")
+        logger.info("Disk check summary: " + ", ".join(
+            f"{result.drive}={SystemCheckFix._chkdsk_status(result)}" for result in results))
+        return results
+
+    @staticmethod
+    def _chkdsk_status(result):
+        """单个驱动器检查结果的说明文字"""
+        if result.result is None:
+            if result.error == "cancelled":
+                return LanguageManager.get_string("operation_cancelled")
+            return f"{LanguageManager.get_string('chkdsk_status_not_run')}: {result.error}"
+        if result.result.timed_out:
+            return LanguageManager.get_string("chkdsk_timeout")
+        if result.result.cancelled:
+            return LanguageManager.get_string("operation_cancelled")
+        if result.prompt:
+            return SystemCheckFix._volume_in_use_message(result.drive, result.prompt)
+        status_keys = {
+            0: "chkdsk_status_ok",
+            1: "chkdsk_status_fixed",
+            2: "chkdsk_status_cleanup",
+            3: "chkdsk_status_errors",
+        }
+        key = status_keys.get(result.result.returncode)
+        if key is None:
+            return f"{LanguageManager.get_string('chkdsk_error')}: {result.result.returncode}"
+        return LanguageManager.get_string(key)
+
+    @staticmethod
+    def _volume_in_use_message(drive, prompt):
+        """卷正在使用、chkdsk /f 未能进行时的说明"""
+        key = ("chkdsk_volume_in_use_schedule" if prompt == PROMPT_SCHEDULE
+               else "chkdsk_volume_in_use_dismount")
+        return LanguageManager.get_string(key).format(drive)
+
     @staticmethod
     def bootrec(action=''):
         """引导修复"""
@@ -103,21 +221,20 @@ class SystemCheckFix:
 
         try:
             logger.info(f"Running bootrec {action}")
-            process = subprocess.run(
-                ['bootrec', action], 
-                shell=False, 
-                check=True,
-                capture_output=True,
-                encoding='cp936',
-                errors='replace'
-            )
-            print(f"{LanguageManager.get_string('bootrec_completed')} \n")
-            logger.info(f"Bootrec {action} completed")
+            operation = operation_key('bootrec', action)
+            process = run_command(['bootrec', action],
+                                  timeout=TimeoutConfig.get_timeout(operation), operation=operation)
+            if process.ok:
+                print(f"{LanguageManager.get_string('bootrec_completed')} \n")
+                logger.info(f"Bootrec {action} completed")
+            elif process.cancelled:
+                print(f"{LanguageManager.get_string('operation_cancelled')} \n")
+            else:
+                error_msg = (f"{LanguageManager.get_string('bootrec_error')}: "
+                             f"{process.returncode} {process.stderr}")
+                print(f"{error_msg} \n")
+                logger.error(f"Bootrec error: {process.returncode} {process.stderr}")
 
-        except subprocess.CalledProcessError as e:
-            error_msg = f"{LanguageManager.get_string('bootrec_error')}: {e}"
-            print(f"{error_msg} \n")
-            logger.error(f"Bootrec error: {e}")
         except Exception as e:
             error_msg = f"{LanguageManager.get_string('unexpected_error')}: {e}"
             print(f"{error_msg} \n")
@@ -127,24 +244,25 @@ class SystemCheckFix:
     def dism_check_and_restore_health():
         """检查并修复系统映像"""
         try:
-            process = subprocess.run(
+            operation = operation_key('dism', '/RestoreHealth')
+            process = SystemCheckFix._run_with_progress(
                 ['DISM.exe', '/Online', '/Cleanup-Image', '/RestoreHealth'],
-                shell=False,
-                check=True,
-                capture_output=True,
-                encoding='cp936',
-                errors='replace',
-                timeout=TimeoutConfig.get_timeout('dism')
+                timeout=TimeoutConfig.get_timeout(operation), operation=operation
             )
-            print(LanguageManager.get_string("system_image_repair_complete"))
-            logger.info("System image repair completed")
+            # 修复可能改变组件存储，之前的检查结果不再有效
+            get_health_cache().invalidate()
+            if process.timed_out:
+                logger.error("DISM operation timed out")
+                print(LanguageManager.get_string("dism_timeout"))
+            elif process.cancelled:
+                print(LanguageManager.get_string("operation_cancelled"))
+            elif process.returncode != 0:
+                logger.error(f"DISM error: {process.stderr}")
+                print(f"{LanguageManager.get_string('dism_error')}: {process.stderr}")
+            else:
+                print(LanguageManager.get_string("system_image_repair_complete"))
+                logger.info("System image repair completed")
             
-        except subprocess.TimeoutExpired:
-            logger.error("DISM operation timed out")
-            print(LanguageManager.get_string("dism_timeout"))
-        except subprocess.CalledProcessError as e:
-            logger.error(f"DISM error: {e.stderr}")
-            print(f"{LanguageManager.get_string('dism_error')}: {e.stderr}")
         except Exception as e:
             logger.error(f"Unexpected DISM error: {e}")
             print(f"{LanguageManager.get_string('unexpected_error')}: {e}")
@@ -154,68 +272,99 @@ class SystemCheckFix:
         """自动检查系统健康状态"""
         try:
             # 扫描健康状态
-            subprocess.run(
-                ['DISM.exe', '/Online', '/Cleanup-Image', '/ScanHealth'], 
-                shell=False, 
-                check=True,
-                capture_output=True,
-                encoding='cp936',
-                errors='replace' 
-            )
+            health = SystemCheckFix._dism_health('/ScanHealth', with_progress=True)
+            if health is None:
+                return
             print(f"{LanguageManager.get_string('system_health_scan_complete')} \n")
-            logger.info("System health scan completed")
-
-            # 检查健康状态
-            result = subprocess.run(
-                ['DISM.exe', '/Online', '/Cleanup-Image', '/CheckHealth'], 
-                shell=False, 
-                check=True,
-                capture_output=True,
-                encoding='cp936',
-                errors='replace'
-            )
-            logger.info("System health check completed")
+            logger.info(f"System health scan completed: {health.state} {health.message}")
+
+            # 扫描输出中没有结论时，再读取CheckHealth记录的状态
+            if health.state == HEALTH_UNKNOWN:
+                health = SystemCheckFix._dism_health('/CheckHealth', with_progress=False)
+                if health is None:
+                    return
+                logger.info(f"System health check completed: {health.state} {health.message}")
 
             # 根据检查结果决定是否需要修复
-            if "未检测到组件存储损坏" not in result.stdout:
-                try:
-                    subprocess.run(
-                        ['DISM.exe', '/Online', '/Cleanup-Image', '/RestoreHealth'], 
-                        shell=False, 
-                        check=True,
-                        capture_output=True,
-                        encoding='cp936',
-                        errors='replace'
-                    )
+            if health.needs_repair:
+                operation = operation_key('dism', '/RestoreHealth')
+                result = SystemCheckFix._run_with_progress(
+                    ['DISM.exe', '/Online', '/Cleanup-Image', '/RestoreHealth'],
+                    timeout=TimeoutConfig.get_timeout(operation), operation=operation
+                )
+                get_health_cache().invalidate()
+                if result.ok:
                     print(f"{LanguageManager.get_string('system_image_repair_complete')} \n")
                     logger.info("System image repair completed")
-                except subprocess.CalledProcessError as e:
-                    print(f"{LanguageManager.get_string('system_image_repair_error')}: {e} \n")
-                    logger.error(f"System image repair error: {e}")
-                except Exception as e:
-                    print(f"{LanguageManager.get_string('unexpected_error')}: {e} \n")
-                    logger.error(f"System image repair error: {e}")
+                else:
+                    SystemCheckFix._report_dism_failure('system_image_repair_error', result)
+            elif health.state == HEALTH_NOT_REPAIRABLE:
+                print(f"{LanguageManager.get_string('component_store_not_repairable')} \n")
+                logger.error("Component store cannot be repaired")
             else:
                 print(f"{LanguageManager.get_string('no_corruption_detected')} \n")
 
-        except subprocess.CalledProcessError as e:
-            print(f"{LanguageManager.get_string('dism_health_check_error')}: {e} \n")
-            logger.error(f"Dism health check error: {e}")
         except Exception as e:
             print(f"{LanguageManager.get_string('unexpected_error')}: {e} \n")
             logger.error(f"Dism health check error: {e}")
 
+    @staticmethod
+    def _dism_health(operation, with_progress):
+        """
+        执行DISM健康检查并解析组件存储状态，失败时返回None
+
+        缓存中有仍然有效的结果时直接返回，不再执行DISM
+        """
+        args = dism_health_args(operation)
+        cache = get_health_cache()
+        cached = cache.get(args)
+        if cached is not None:
+            age = format_duration(cached.age)
+            logger.info(f"Using cached result of DISM {operation} from {age} ago: "
+                        f"{cached.health.state}")
+            print(f"{LanguageManager.get_string('health_result_cached').format(age)}: "
+                  f"{cached.health.message}")
+            return cached.health
+
+        operation = operation_key('dism', operation)
+        timeout = TimeoutConfig.get_timeout(operation)
+        if with_progress:
+            result = SystemCheckFix._run_with_progress(args, timeout=timeout, operation=operation)
+        else:
+            result = run_command(args, timeout=timeout, operation=operation)
+        if not result.ok:
+            SystemCheckFix._report_dism_failure('dism_health_check_error', result)
+            return None
+        health = parse_dism_health(result.stdout)
+        cache.put(args, health)
+        return health
+
+    @staticmethod
+    def _report_dism_failure(message_key, result):
+        """输出DISM失败、超时或被取消的原因"""
+        if result.cancelled:
+            print(f"{LanguageManager.get_string('operation_cancelled')} \n")
+            return
+        if result.timed_out:
+            detail = LanguageManager.get_string('operation_timeout')
+        else:
+            detail = f"{result.returncode} {result.stderr or result.stdout}".strip()
+        print(f"{LanguageManager.get_string(message_key)}: {detail} \n")
+        logger.error(f"DISM {' '.join(result.args[1:])} failed: {detail}")
+
     @staticmethod
     def netsh_winsock_reset():
         try:
             # 重置网络套接字目录
-            subprocess.run(['netsh', 'winsock', 'reset'], shell=False, check=True, text=True)
-            print("网络重置完成。 \n")
-            logger.info("Network reset completed")
-        except subprocess.CalledProcessError as e:
-            print(f"执行网络套接字重置时出错: {e} \n")
-            logger.error(f"Network reset error: {e}")
+            operation = operation_key('netsh', 'winsock', 'reset')
+            result = run_command(['netsh', 'winsock', 'reset'],
+                                 timeout=TimeoutConfig.get_timeout(operation), operation=operation)
+            if result.ok:
+                print("网络重置完成。 \n")
+                logger.info("Network reset completed")
+            else:
+                print(f"执行网络套接字重置时出错: {result.returncode} {result.stderr} \n")
+                logger.error(f"Network reset error: {result.returncode} {result.stderr}")
         except Exception as e:
             print(f"发生错误: {e} \n")
             logger.error(f"Network reset error: {e}")
-
@@ -0,0 +1,5 @@
+"""测试公共设置，使测试可以直接导入仓库根目录下的模块"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,50 @@
+"""
+PowerShell宿主的替身，使用与HOST_SCRIPT相同的协议，脚本按Python代码执行
+
+参数:
+    --startup-delay 秒数: 开始读取请求前等待的时间
+    --pid-file 路径: 启动后写入进程号
+"""
+import argparse
+import base64
+import contextlib
+import io
+import os
+import sys
+import time
+import traceback
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--startup-delay', type=float, default=0)
+parser.add_argument('--pid-file')
+options = parser.parse_args()
+if options.pid_file:
+    with open(options.pid_file, 'a') as f:
+        f.write(f"{os.getpid()}\n")
+time.sleep(options.startup_delay)
+
+stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', newline='')
+for line in sys.stdin:
+    request_id, payload = line.rstrip('\n').split(' ', 1)
+    script = base64.b64decode(payload).decode('utf-8')
+    status = 0
+    output = io.StringIO()
+    errors = io.StringIO()
+    if script == "'ok'":
+        # 宿主池的健康检查
+        output.write("ok\n")
+    else:
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+                exec(script, {})
+        except SystemExit as e:
+            status = e.code or 0
+        except Exception:
+            status = 1
+            errors.write(traceback.format_exc())
+    stdout.write(output.getvalue())
+    stdout.flush()
+    sys.stderr.write(errors.getvalue() + f"##SST-END {request_id}\n")
+    sys.stderr.flush()
+    stdout.write(f"\n##SST-END {request_id} {status}\n")
+    stdout.flush()
@@ -0,0 +1,130 @@
+"""commands.chkdsk 的测试，用录制的chkdsk输出代替真实的磁盘检查"""
+import os
+import sys
+
+import pytest
+
+from commands import chkdsk, progress
+from commands.chkdsk import (PROMPT_DISMOUNT, PROMPT_SCHEDULE, ChkdskOrchestrator,
+                             volume_prompt)
+from commands.progress import PROGRESS_FAILED, PROGRESS_FINISHED
+from commands.runner import CommandRunner
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class FixtureRunner(CommandRunner):
+    """按驱动器输出录制的内容并以给定的退出码结束，代替chkdsk"""
+
+    def __init__(self, outputs):
+        super().__init__(encoding='cp936')
+        self.outputs = outputs
+        self.commands = []
+
+    def submit(self, args, timeout=None, token=None, encoding=None, cwd=None, env=None,
+               on_line=None):
+        self.commands.append(list(args))
+        name, returncode = self.outputs[args[1]]
+        code = ("import sys\n"
+                f"sys.stdout.buffer.write(open({os.path.join(FIXTURES, name)!r}, 'rb').read())\n"
+                f"sys.exit({returncode})")
+        return super().submit([sys.executable, '-c', code], timeout, token, encoding, cwd, env,
+                              on_line)
+
+
+@pytest.fixture
+def published():
+    events = []
+    progress.add_listener(events.append)
+    yield events
+    progress.remove_listener(events.append)
+
+
+def check(outputs, drives, repair=False):
+    runner = FixtureRunner(outputs)
+    lines = []
+    orchestrator = ChkdskOrchestrator(runner=runner, on_output=lambda *line: lines.append(line),
+                                      disk_lookup=lambda drive: frozenset({ord(drive[0])}))
+    try:
+        return orchestrator.check(drives, repair), lines, runner.commands
+    finally:
+        runner.loop.call_soon_threadsafe(runner.loop.stop)
+
+
+def test_output_lines_are_forwarded_with_drive(published):
+    results, lines, commands = check({
+        "C:": ("progress/chkdsk_en.txt", 0),
+        "D:": ("progress/chkdsk_zh.txt", 0),
+    }, ["C:", "D:"])
+
+    assert commands == [["chkdsk", "C:"], ["chkdsk", "D:"]]
+    assert all(result.ok for result in results)
+    assert ("C:", "Stage 2: Examining file name linkage ...") in lines
+    assert ("C:", "Windows has scanned the file system and found no problems.") in lines
+    assert ("D:", "Windows 已扫描文件系统但没有发现问题。") in lines
+    # 进度行只更新进度条，不输出
+    assert not any(line.startswith(("Progress:", "进度:")) for _, line in lines)
+    assert published[-1].finished
+    assert published[-1].status == PROGRESS_FINISHED
+
+
+@pytest.mark.parametrize("name, prompt", [
+    ("chkdsk/in_use_schedule_en.txt", PROMPT_SCHEDULE),
+    ("chkdsk/in_use_schedule_zh.txt", PROMPT_SCHEDULE),
+    ("chkdsk/in_use_dismount_en.txt", PROMPT_DISMOUNT),
+    ("chkdsk/in_use_dismount_zh.txt", PROMPT_DISMOUNT),
+])
+def test_unanswered_prompt_is_reported(name, prompt, published):
+    results, lines, commands = check({"C:": (name, 3)}, ["C:"], repair=True)
+
+    assert commands == [["chkdsk", "C:", "/f"]]
+    result, = results
+    assert result.prompt == prompt
+    assert not result.ok
+    # 没有换行结尾的问题也会输出
+    assert lines[-1][1].rstrip().endswith("(Y/N)")
+    assert published[-1].status == PROGRESS_FAILED
+
+
+def test_bounded_output_keeps_every_line(monkeypatch):
+    outputs = {"C:": ("progress/chkdsk_en.txt", 0), "D:": ("progress/chkdsk_zh.txt", 0)}
+    _, expected, _ = check(outputs, ["C:", "D:"])
+
+    # 队列只能放一行时，读取等待调用线程取走，不丢行也不打乱顺序
+    monkeypatch.setattr(chkdsk, "STREAM_BUFFER_LINES", 1)
+    results, lines, _ = check(outputs, ["C:", "D:"])
+
+    assert all(result.ok for result in results)
+    for drive in ("C:", "D:"):
+        assert [line for d, line in lines if d == drive] == \
+            [line for d, line in expected if d == drive]
+
+
+def test_volume_prompt_in_full_output():
+    with open(os.path.join(FIXTURES, "chkdsk", "in_use_schedule_en.txt"), 'rb') as f:
+        assert volume_prompt(f.read().decode('ascii')) == PROMPT_SCHEDULE
+    with open(os.path.join(FIXTURES, "progress", "chkdsk_en.txt"), 'rb') as f:
+        assert volume_prompt(f.read().decode('ascii')) == ""
+
+
+def test_history_is_keyed_by_drive_and_repair(tmp_path, monkeypatch):
+    from commands import history as history_module
+    monkeypatch.setattr(history_module, "_HISTORY", None)
+    history = history_module.configure_runtime_history(history_file=tmp_path / "history.db",
+                                                       host="test-host")
+    runner = FixtureRunner({"C:": ("progress/chkdsk_en.txt", 0),
+                            "D:": ("progress/chkdsk_en.txt", 0)})
+    keys = []
+    orchestrator = ChkdskOrchestrator(runner=runner, operation="chkdsk",
+                                      timeout_for=lambda key: keys.append(key) or 30,
+                                      disk_lookup=lambda drive: frozenset())
+    try:
+        orchestrator.check(["C:", "D:"], repair=True)
+    finally:
+        runner.loop.call_soon_threadsafe(runner.loop.stop)
+        history.close()
+
+    assert keys == ["chkdsk c: /f", "chkdsk d: /f"]
+    assert len(history.samples("chkdsk c: /f")) == 1
+    assert len(history.samples("chkdsk d: /f")) == 1
+    assert history.samples("chkdsk") == []
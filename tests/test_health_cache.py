@@ -0,0 +1,155 @@
+"""commands.health_cache 的测试，系统标识和时间由测试控制"""
+import json
+
+import pytest
+
+from commands import health_cache
+from commands.health_cache import HEALTH_CACHE_VERSION, HealthCache, cache_key
+from commands.parsers import HEALTH_HEALTHY, HEALTH_REPAIRABLE, HEALTH_UNKNOWN, ImageHealth
+
+SCAN = ['DISM.exe', '/Online', '/Cleanup-Image', '/ScanHealth']
+CHECK = ['DISM.exe', '/Online', '/Cleanup-Image', '/CheckHealth']
+HEALTHY = ImageHealth(HEALTH_HEALTHY, "No component store corruption detected.")
+
+
+class Clock:
+    """代替time模块，只提供time()"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(health_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def fingerprint(monkeypatch):
+    state = {"value": "boot:1 packages:1 pending:0 reboot:0"}
+    monkeypatch.setattr(health_cache, "system_fingerprint", lambda: state["value"])
+    return state
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return tmp_path / "health_cache.json"
+
+
+@pytest.fixture
+def cache(cache_file, clock, fingerprint):
+    return HealthCache(cache_file, ttl=3600)
+
+
+def test_cache_key():
+    assert cache_key(SCAN) == "dism /online /cleanup-image /scanhealth"
+    assert cache_key([r"C:\Windows\System32\Dism.EXE"] + SCAN[1:]) == cache_key(SCAN)
+
+
+def test_entry_expires_after_ttl(cache, cache_file, clock):
+    cache.put(SCAN, HEALTHY)
+
+    clock.now += 3599
+    cached = cache.get(SCAN)
+    assert cached.health == HEALTHY
+    assert cached.age == 3599
+
+    # 重新加载文件后仍然有效
+    assert HealthCache(cache_file, ttl=3600).get(SCAN).health == HEALTHY
+
+    clock.now += 2
+    assert cache.get(SCAN) is None
+    assert HealthCache(cache_file, ttl=3600).get(SCAN) is None
+
+
+def test_entry_from_the_future_is_dropped(cache, clock):
+    cache.put(SCAN, HEALTHY)
+    clock.now -= 60
+    assert cache.get(SCAN) is None
+
+
+def test_entry_dropped_when_fingerprint_changes(cache, fingerprint):
+    cache.put(SCAN, HEALTHY)
+    fingerprint["value"] = "boot:2 packages:1 pending:0 reboot:0"
+    assert cache.get(SCAN) is None
+
+    fingerprint["value"] = "boot:1 packages:1 pending:0 reboot:0"
+    assert cache.get(SCAN) is None
+
+
+def test_invalidate_one_command(cache, cache_file):
+    cache.put(SCAN, HEALTHY)
+    cache.put(CHECK, ImageHealth(HEALTH_REPAIRABLE, "The component store is repairable."))
+
+    cache.invalidate(SCAN)
+
+    assert cache.get(SCAN) is None
+    assert cache.get(CHECK).health.state == HEALTH_REPAIRABLE
+    assert HealthCache(cache_file, ttl=3600).get(SCAN) is None
+
+
+def test_invalidate_all(cache, cache_file):
+    cache.put(SCAN, HEALTHY)
+    cache.put(CHECK, HEALTHY)
+
+    cache.invalidate()
+
+    assert cache.get(SCAN) is None
+    assert cache.get(CHECK) is None
+    assert json.loads(cache_file.read_text(encoding='utf-8'))["entries"] == {}
+
+
+def test_unknown_result_is_not_stored(cache, cache_file):
+    cache.put(SCAN, ImageHealth(HEALTH_UNKNOWN, ""))
+    assert cache.get(SCAN) is None
+    assert not cache_file.exists()
+
+
+def test_disabled_cache(cache_file, clock, fingerprint):
+    cache = HealthCache(cache_file, ttl=3600, enabled=False)
+    cache.put(SCAN, HEALTHY)
+    assert cache.get(SCAN) is None
+    assert not cache_file.exists()
+
+
+def write_cache(cache_file, version, entries):
+    cache_file.write_text(json.dumps({"version": version, "entries": entries}),
+                          encoding='utf-8')
+
+
+def stored_entry(clock, fingerprint):
+    return {"state": HEALTH_HEALTHY, "message": HEALTHY.message,
+            "checked_at": clock.now, "fingerprint": fingerprint["value"]}
+
+
+def test_wrong_version_is_ignored(cache_file, clock, fingerprint):
+    write_cache(cache_file, HEALTH_CACHE_VERSION + 1,
+                {cache_key(SCAN): stored_entry(clock, fingerprint)})
+    assert HealthCache(cache_file, ttl=3600).get(SCAN) is None
+
+
+def test_entries_missing_fields_are_ignored(cache_file, clock, fingerprint):
+    incomplete = stored_entry(clock, fingerprint)
+    del incomplete["fingerprint"]
+    write_cache(cache_file, HEALTH_CACHE_VERSION, {
+        cache_key(SCAN): incomplete,
+        cache_key(CHECK): stored_entry(clock, fingerprint),
+    })
+
+    cache = HealthCache(cache_file, ttl=3600)
+    assert cache.get(SCAN) is None
+    assert cache.get(CHECK).health == HEALTHY
+
+
+def test_unreadable_file_is_ignored(cache_file, clock, fingerprint):
+    cache_file.write_text("{not json", encoding='utf-8')
+    cache = HealthCache(cache_file, ttl=3600)
+    assert cache.get(SCAN) is None
+
+    cache.put(SCAN, HEALTHY)
+    assert HealthCache(cache_file, ttl=3600).get(SCAN).health == HEALTHY
@@ -0,0 +1,83 @@
+"""commands.history 的测试，使用临时目录中的历史数据库"""
+import pytest
+
+from commands.history import RuntimeHistory, operation_key, percentile
+from commands.runner import CommandResult
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = RuntimeHistory(tmp_path / "history.db", max_samples=10, host="test-host")
+    yield history
+    history.close()
+
+
+def record(history, operation, durations, timed_out=False):
+    for duration in durations:
+        history.record(operation, duration, timed_out)
+
+
+def test_operation_key():
+    assert operation_key("chkdsk", "C:", "/f") == "chkdsk c: /f"
+    assert operation_key("chkdsk", "D:", None) == "chkdsk d:"
+    assert operation_key("bootrec", "/FixMbr") == "bootrec /fixmbr"
+    assert operation_key("sfc") == "sfc"
+
+
+def test_percentile():
+    assert percentile([5, 1, 3, 2, 4], 0.95) == 5
+    assert percentile([5, 1, 3, 2, 4], 0.5) == 3
+    assert percentile([7], 0.95) == 7
+
+
+def test_default_until_enough_samples(history):
+    record(history, "chkdsk c:", [10] * 4)
+    assert history.suggest_timeout("chkdsk c:", 1800) == 1800
+
+
+def test_keys_are_kept_apart(history):
+    record(history, operation_key("chkdsk", "C:"), [100] * 5)
+    record(history, operation_key("chkdsk", "C:", "/f"), [1000] * 5)
+    assert history.suggest_timeout("chkdsk c:", 1800) == 450  # 下限为基准值的25%
+    assert history.suggest_timeout("chkdsk c: /f", 1800) == 1500
+    assert history.suggest_timeout("chkdsk d:", 1800) == 1800
+
+
+def test_floor_is_relative_to_default(history):
+    record(history, "netsh winsock reset", [1] * 5)
+    assert history.suggest_timeout("netsh winsock reset", 30) == 7.5
+    assert history.suggest_timeout("netsh winsock reset", 30, min_factor=0.5) == 15
+
+
+def test_ceiling_is_relative_to_default(history):
+    record(history, "dism /restorehealth", [5000] * 5)
+    assert history.suggest_timeout("dism /restorehealth", 1000) == 4000
+
+
+def test_latest_timeout_doubles(history):
+    record(history, "sfc", [100] * 5)
+    record(history, "sfc", [300], timed_out=True)
+    assert history.suggest_timeout("sfc", 3600) == 900
+    record(history, "sfc", [1000], timed_out=True)
+    assert history.suggest_timeout("sfc", 3600) == 2000
+
+
+def test_only_latest_samples_kept(history):
+    record(history, "sfc", range(1, 16))
+    samples = history.samples("sfc")
+    assert [sample.duration for sample in samples] == list(range(15, 5, -1))
+
+
+def test_cancelled_results_are_not_recorded(history):
+    history.record_result("sfc", CommandResult(("sfc",), None, "", "", 5.0, cancelled=True))
+    history.record_result("sfc", CommandResult(("sfc",), 0, "", "", 6.0))
+    assert [sample.duration for sample in history.samples("sfc")] == [6.0]
+
+
+def test_hosts_are_kept_apart(history, tmp_path):
+    record(history, "sfc", [100] * 5)
+    other = RuntimeHistory(tmp_path / "history.db", host="other-host")
+    try:
+        assert other.samples("sfc") == []
+    finally:
+        other.close()
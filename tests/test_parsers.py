@@ -0,0 +1,98 @@
+"""commands.parsers 的测试，使用 tests/fixtures/parsers 中录制的命令输出"""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from commands.parsers import (HEALTH_HEALTHY, HEALTH_NOT_REPAIRABLE, HEALTH_REPAIRABLE,
+                              HEALTH_UNKNOWN, GpuStatus, VideoController, parse_dism_health,
+                              parse_nvidia_smi_csv, parse_threat_detections,
+                              parse_wmic_video_controllers)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "parsers")
+
+
+def fixture_text(name, encoding='utf-8'):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read().decode(encoding)
+
+
+def test_defender_single_object():
+    detection, = parse_threat_detections(fixture_text("defender_single.json"))
+    assert detection.threat_id == "2147519003"
+    assert detection.name == "Trojan:Win32/Wacatac.B!ml"
+    assert detection.status == "Detected"
+    assert detection.active
+    assert not detection.action_success
+    assert detection.detected_at == datetime(2024, 3, 5, 10, 15, 30, 123456,
+                                             tzinfo=timezone(timedelta(hours=8)))
+    # 只有一个资源时PowerShell输出字符串而不是数组
+    assert detection.resources == (r"file:_C:\Users\alice\Downloads\setup.exe",)
+
+
+def test_defender_array():
+    quarantined, failed = parse_threat_detections(fixture_text("defender_array.json"))
+    assert quarantined.status == "Quarantined"
+    assert not quarantined.active
+    assert quarantined.detected_at == datetime(2024, 3, 5, 2, 15, 30, tzinfo=timezone.utc)
+    assert len(quarantined.resources) == 2
+    assert failed.status == "RemoveFailed"
+    assert failed.active
+    assert failed.name == ""
+    assert failed.detected_at is None
+    assert failed.resources == ()
+
+
+@pytest.mark.parametrize("text", ["", "\r\n", "   "])
+def test_defender_empty_output(text):
+    assert parse_threat_detections(text) == []
+
+
+def test_defender_invalid_output():
+    with pytest.raises(ValueError):
+        parse_threat_detections("Get-MpThreatDetection : 无法连接到服务")
+
+
+def test_nvidia_smi_with_unavailable_fields():
+    rtx, tesla = parse_nvidia_smi_csv(fixture_text("nvidia_smi.csv"))
+    assert rtx == GpuStatus(0, "NVIDIA GeForce RTX 3060", "546.33", 45.0, 3.0,
+                            1024.0, 12288.0, 18.52, 170.0)
+    assert rtx.memory_percent == pytest.approx(1024 * 100 / 12288)
+    assert tesla == GpuStatus(1, "Tesla T4", "535.104.05", None, None,
+                              0.0, 15360.0, None, None)
+    assert tesla.memory_percent == 0.0
+
+
+def test_nvidia_smi_skips_short_rows():
+    assert parse_nvidia_smi_csv("No devices were found\n") == []
+    assert parse_nvidia_smi_csv("") == []
+
+
+def test_wmic_csv_fallback():
+    assert parse_wmic_video_controllers(fixture_text("wmic_video.csv")) == [
+        VideoController("NVIDIA GeForce RTX 3060", "31.0.15.3623", 4293918720),
+        VideoController("Microsoft Basic Display Adapter", "10.0.19041.3636", None),
+    ]
+
+
+def test_wmic_empty_output():
+    assert parse_wmic_video_controllers("\r\r\n") == []
+
+
+@pytest.mark.parametrize("language, encoding", [("en", "ascii"), ("zh", "cp936")])
+@pytest.mark.parametrize("state, needs_repair", [
+    (HEALTH_HEALTHY, False),
+    (HEALTH_REPAIRABLE, True),
+    (HEALTH_NOT_REPAIRABLE, False),
+])
+def test_dism_health(language, encoding, state, needs_repair):
+    health = parse_dism_health(fixture_text(f"dism_{state}_{language}.txt", encoding))
+    assert health.state == state
+    assert health.needs_repair == needs_repair
+    assert health.message and not health.message.endswith("\r")
+
+
+def test_dism_health_unknown():
+    health = parse_dism_health("Error: 87\r\n\r\nThe parameter is incorrect.\r\n")
+    assert health.state == HEALTH_UNKNOWN
+    assert health.needs_repair
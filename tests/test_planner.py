@@ -0,0 +1,94 @@
+"""cleanup.planner 的测试，在临时目录中按计划删除文件"""
+import os
+import json
+
+import pytest
+
+from cleanup.planner import CleanupPlan, PlanExecutor, PlanResult
+from cleanup.quarantine import MANIFEST_NAME, Quarantine
+from cleanup.throttle import IOThrottle
+
+
+class RecordingThrottle(IOThrottle):
+    """记录每次acquire的操作数和字节数"""
+
+    def __init__(self):
+        super().__init__(ops_per_sec=None, bytes_per_sec=None)
+        self.acquired = []
+
+    def acquire(self, ops=1, size=0):
+        self.acquired.append((ops, size))
+        super().acquire(ops, size)
+
+
+@pytest.fixture
+def plan(tmp_path):
+    """两个文件的计划，大小分别为10和2048字节"""
+    plan = CleanupPlan([str(tmp_path)])
+    for name, size in (("a.log", 10), ("b.tmp", 2048)):
+        path = tmp_path / name
+        path.write_bytes(b'x' * size)
+        st = os.stat(str(path))
+        plan.add(str(path), st.st_size, st.st_mtime, lambda name: name.rsplit('.', 1)[-1])
+    return plan
+
+
+def test_plan_execution_charges_throttle(plan, tmp_path):
+    throttle = RecordingThrottle()
+
+    def delete(path, size):
+        # 与DeleteUselessFile._delete_file相同，按文件大小计入限速器
+        throttle.acquire(1, size)
+        os.unlink(path)
+        return True
+
+    result = PlanExecutor().execute(plan, delete)
+
+    assert result == PlanResult(2, 2058, 0, 0)
+    assert throttle.acquired == [(1, 10), (1, 2048)]
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_changed_file_is_skipped(plan, tmp_path):
+    (tmp_path / "b.tmp").write_bytes(b'y' * 10)
+    deleted = []
+    skipped = []
+
+    result = PlanExecutor().execute(plan, lambda path, size: deleted.append(path) or True,
+                                    skipped.append)
+
+    assert result == PlanResult(1, 10, 1, 0)
+    assert deleted == [str(tmp_path / "a.log")]
+    assert [entry.path for entry in skipped] == [str(tmp_path / "b.tmp")]
+
+
+def test_saved_plan_keeps_sizes(plan, tmp_path):
+    plan_file = tmp_path / "plan" / "cleanup_plan.json"
+    plan.save(plan_file)
+    sizes = []
+
+    PlanExecutor().execute(CleanupPlan.load(plan_file),
+                           lambda path, size: sizes.append(size) or True)
+
+    assert sizes == [10, 2048]
+
+
+def test_quarantined_plan_records_sizes(plan, tmp_path):
+    root = tmp_path / "volume"
+    quarantine = Quarantine()
+    quarantine.volume_root = lambda path: str(root)
+
+    def delete(path, size):
+        # 与DeleteUselessFile._remove相同，按计划中的大小写入隔离清单
+        quarantine.move(path, size)
+        return True
+
+    PlanExecutor().execute(plan, delete)
+    quarantine.close()
+
+    manifest = os.path.join(quarantine.directory_for(str(root)), MANIFEST_NAME)
+    with open(manifest, 'r', encoding='utf-8') as f:
+        items = [json.loads(line) for line in f]
+    assert sorted((os.path.basename(item["p"]), item["s"]) for item in items) == \
+        [("a.log", 10), ("b.tmp", 2048)]
+    assert Quarantine().purge([str(root)], -1) == (2, 2058)
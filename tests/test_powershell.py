@@ -0,0 +1,163 @@
+"""commands.powershell 的测试，以执行Python代码的替身进程代替PowerShell宿主"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from cleanup.cancellation import CancellationToken
+from commands.powershell import PowerShellHost, PowerShellPool
+from commands.runner import CommandRunner
+
+HOST = [sys.executable, os.path.join(os.path.dirname(__file__), "fixtures", "powershell_host.py")]
+
+PID = "import os; print(os.getpid())"
+
+
+@pytest.fixture(scope="module")
+def runner():
+    runner = CommandRunner()
+    yield runner
+    runner.loop.call_soon_threadsafe(runner.loop.stop)
+
+
+@pytest.fixture
+def make_pool(runner):
+    pools = []
+
+    def make_pool(*host_options, **options):
+        pool = PowerShellPool(host_args=HOST + list(host_options), runner=runner, **options)
+        pools.append(pool)
+        return pool
+
+    yield make_pool
+    for pool in pools:
+        asyncio.run_coroutine_threadsafe(pool.close(), runner.loop).result()
+
+
+def running(pid):
+    """进程是否仍在运行（已结束但未回收的僵尸进程视为已结束）"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            return "\nState:\tZ" not in f.read()
+    except FileNotFoundError:
+        return False
+
+
+def test_host_is_reused(make_pool):
+    pool = make_pool()
+    first = pool.run(PID)
+    assert first.ok
+    assert pool.run(PID).stdout == first.stdout
+
+
+def test_host_recycled_after_max_commands(make_pool):
+    pool = make_pool(max_commands=2)
+    pids = [pool.run(PID).stdout for _ in range(3)]
+    assert pids[0] == pids[1] != pids[2]
+
+
+def test_preload_runs_once_per_host(make_pool):
+    pool = make_pool(preload=["import builtins; builtins.preloaded = getattr(builtins, 'preloaded', 0) + 1"])
+    assert pool.run("import builtins; print(builtins.preloaded)").stdout == "1"
+    assert pool.run("import builtins; print(builtins.preloaded)").stdout == "1"
+
+
+def test_output_framing(make_pool):
+    pool = make_pool()
+    result = pool.run(
+        "import sys\n"
+        "print('第一行')\n"
+        "print('##SST-END 0123 5')\n"
+        "print('  indented  ')\n"
+        "sys.stdout.write('no newline')\n"
+        "sys.stderr.write('warning\\n')\n"
+        "raise SystemExit(7)"
+    )
+    # 其他编号的结束标记作为普通输出
+    assert result.stdout == "第一行\n##SST-END 0123 5\n  indented  \nno newline"
+    assert result.stderr == "warning"
+    assert result.returncode == 7
+    assert pool.run("pass").stdout == ""
+
+
+def test_script_error_sets_status(make_pool):
+    pool = make_pool()
+    result = pool.run("raise RuntimeError('boom')")
+    assert result.returncode == 1
+    assert "RuntimeError: boom" in result.stderr
+
+
+def test_timeout_kills_host(make_pool):
+    pool = make_pool()
+    pid = int(pool.run(PID).stdout)
+    started = time.monotonic()
+    result = pool.run("import time; time.sleep(30)", timeout=0.5)
+    assert result.timed_out
+    assert time.monotonic() - started < 5
+    assert not running(pid)
+    assert int(pool.run(PID).stdout) != pid
+
+
+def test_timeout_includes_host_startup(make_pool, tmp_path):
+    pid_file = tmp_path / "pids"
+    pool = make_pool("--startup-delay", "30", "--pid-file", str(pid_file))
+    started = time.monotonic()
+    result = pool.run("pass", timeout=0.5)
+    assert result.timed_out
+    assert time.monotonic() - started < 5
+    pid, = (int(line) for line in pid_file.read_text().split())
+    assert not running(pid)
+
+
+def test_timeout_includes_waiting_for_host(make_pool):
+    pool = make_pool(max_hosts=1)
+    busy = threading.Thread(target=pool.run, args=("import time; time.sleep(2)",))
+    busy.start()
+    time.sleep(0.5)
+    started = time.monotonic()
+    result = pool.run("pass", timeout=0.3)
+    elapsed = time.monotonic() - started
+    busy.join()
+    assert result.timed_out
+    assert elapsed < 1.5
+
+
+def test_cancellation(make_pool):
+    pool = make_pool()
+    token = CancellationToken()
+    threading.Timer(0.3, token.cancel).start()
+    result = pool.run("import time; time.sleep(30)", timeout=30, token=token)
+    assert result.cancelled
+    assert not result.timed_out
+    assert token._callbacks == []
+
+
+def test_recovers_from_host_crash(make_pool):
+    pool = make_pool()
+    pid = int(pool.run(PID).stdout)
+    result = pool.run("import os; os._exit(3)")
+    assert not result.ok
+    assert result.returncode == 3
+    assert "exited with 3" in result.stderr
+    assert int(pool.run(PID).stdout) != pid
+
+
+def test_dead_idle_host_is_replaced(make_pool):
+    pool = make_pool()
+    pid = int(pool.run(PID).stdout)
+    os.kill(pid, 9)
+    time.sleep(0.2)
+    assert int(pool.run(PID).stdout) != pid
+
+
+def test_oversized_line_discards_host(make_pool):
+    pool = make_pool()
+    pid = int(pool.run(PID).stdout)
+    result = pool.run(f"print('x' * {PowerShellHost.LINE_LIMIT + 1}, end='')")
+    assert not result.ok
+    assert "longer than" in result.stderr
+    assert not running(pid)
+    assert pool.run("print('after')").stdout == "after"
@@ -0,0 +1,83 @@
+"""cleanup.profiles 的测试，在临时目录中构造用户配置文件"""
+import os
+
+import pytest
+
+from cleanup.profiles import (
+    PROFILE_TEMP_DIRS, RECYCLE_BIN_DIR, ProfileCleaner, ProfileTarget,
+    profile_temp_targets, recycle_bin_targets
+)
+from cleanup.removal import RemovalStats
+
+TEMP_DIR = PROFILE_TEMP_DIRS[0]
+
+
+def _write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+
+
+@pytest.fixture
+def profiles_root(tmp_path):
+    """alice 和 bob 两个用户，以及系统配置文件和指向 Default 的联接"""
+    root = tmp_path / "Users"
+    _write(str(root / "alice" / TEMP_DIR / "a.tmp"), 10)
+    _write(str(root / "alice" / TEMP_DIR / "nested" / "b.tmp"), 20)
+    _write(str(root / "bob" / TEMP_DIR / "c.tmp"), 5)
+    _write(str(root / "Public" / TEMP_DIR / "public.tmp"), 1)
+    _write(str(root / "Default" / TEMP_DIR / "default.tmp"), 1)
+    # 没有临时目录的用户
+    (root / "carol" / "Documents").mkdir(parents=True)
+    os.symlink(str(root / "alice"), str(root / "alice-link"), target_is_directory=True)
+    return root
+
+
+def test_system_profiles_and_links_are_skipped(profiles_root):
+    targets = profile_temp_targets(str(profiles_root))
+    assert targets == [
+        ProfileTarget("alice", os.path.join(str(profiles_root), "alice", TEMP_DIR)),
+        ProfileTarget("bob", os.path.join(str(profiles_root), "bob", TEMP_DIR)),
+    ]
+
+
+def test_missing_profiles_root(tmp_path):
+    assert profile_temp_targets(str(tmp_path / "missing")) == []
+
+
+def test_totals_are_reported_per_profile(profiles_root, tmp_path):
+    drive = tmp_path / "drive"
+    _write(str(drive / RECYCLE_BIN_DIR / "S-1-5-21-1001" / "$RABC.txt"), 7)
+    targets = (profile_temp_targets(str(profiles_root))
+               + recycle_bin_targets([str(drive)], {"S-1-5-21-1001": "alice"}))
+
+    results = ProfileCleaner(max_workers=2).clean(targets)
+
+    assert results == {
+        "alice": RemovalStats(3, 1, 37, 0, 0),
+        "bob": RemovalStats(1, 0, 5, 0, 0),
+    }
+    assert ProfileCleaner.total(results) == RemovalStats(4, 1, 42, 0, 0)
+    for target in targets:
+        assert os.path.isdir(target.path)
+        assert os.listdir(target.path) == []
+    # 系统配置文件不受影响
+    assert os.path.exists(str(profiles_root / "Public" / TEMP_DIR / "public.tmp"))
+
+
+def test_recycle_bin_sids_map_to_names(tmp_path):
+    drives = [tmp_path / "C", tmp_path / "D", tmp_path / "E"]
+    for drive in drives[:2]:
+        (drive / RECYCLE_BIN_DIR / "S-1-5-21-1001").mkdir(parents=True)
+    (drives[1] / RECYCLE_BIN_DIR / "S-1-5-21-1002").mkdir()
+    _write(str(drives[0] / RECYCLE_BIN_DIR / "desktop.ini"), 1)
+
+    targets = recycle_bin_targets([str(drive) for drive in drives],
+                                  {"S-1-5-21-1001": "alice"})
+
+    assert targets == [
+        ProfileTarget("alice", os.path.join(str(drives[0]), RECYCLE_BIN_DIR, "S-1-5-21-1001")),
+        ProfileTarget("alice", os.path.join(str(drives[1]), RECYCLE_BIN_DIR, "S-1-5-21-1001")),
+        # 注册表中没有的SID保留原名
+        ProfileTarget("S-1-5-21-1002", os.path.join(str(drives[1]), RECYCLE_BIN_DIR, "S-1-5-21-1002")),
+    ]
@@ -0,0 +1,156 @@
+"""commands.progress 的测试，使用 tests/fixtures/progress 中录制的命令输出"""
+import os
+import sys
+
+import pytest
+
+from commands import progress
+from commands.progress import (PROGRESS_CANCELLED, PROGRESS_FAILED, PROGRESS_FINISHED,
+                               PROGRESS_TIMED_OUT, ChkdskProgressParser,
+                               CommandProgressTracker, ProgressParser, ProgressUpdate,
+                               parser_for, result_status)
+from commands.runner import _LINE_END, CommandResult, CommandRunner
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "progress")
+
+# 中文系统上命令输出使用的编码
+ENCODINGS = {"en": "ascii", "zh": "cp936"}
+
+
+def fixture_bytes(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def fixture_lines(name):
+    """按执行器的规则分行，回车和换行都结束一行"""
+    language = name.rsplit('_', 1)[-1].split('.')[0]
+    return _LINE_END.split(fixture_bytes(name).decode(ENCODINGS[language]))
+
+
+def updates(command, name):
+    parser = parser_for(command)
+    return [update for update in map(parser.parse, fixture_lines(name)) if update is not None]
+
+
+@pytest.mark.parametrize("name", ["sfc_en.txt", "sfc_zh.txt"])
+def test_sfc(name):
+    assert updates("sfc", name) == [
+        ProgressUpdate(percent, "verification") for percent in (1.0, 35.0, 78.0, 100.0)
+    ]
+
+
+@pytest.mark.parametrize("name", ["dism_en.txt", "dism_zh.txt"])
+def test_dism(name):
+    assert updates("DISM.exe", name) == [
+        ProgressUpdate(percent) for percent in (0.0, 24.5, 62.3, 100.0)
+    ]
+
+
+@pytest.mark.parametrize("name, stages", [
+    ("chkdsk_en.txt", ("1: Examining basic file system structure ...",
+                       "2: Examining file name linkage ...",
+                       "3: Examining security descriptors ...")),
+    ("chkdsk_zh.txt", ("1: 正在检查基本文件系统结构...",
+                       "2: 正在检查文件名链接...",
+                       "3: 正在检查安全描述符...")),
+])
+def test_chkdsk(name, stages):
+    first, second, third = stages
+    assert updates(r"C:\Windows\System32\chkdsk.exe", name) == [
+        ProgressUpdate(None, first),
+        ProgressUpdate(0.0, first, 310.0),
+        ProgressUpdate(16.0, first, 120.0),
+        ProgressUpdate(None, second),
+        ProgressUpdate(55.0, second, 40.0),
+        ProgressUpdate(None, third),
+        ProgressUpdate(100.0, third, 0.0),
+    ]
+
+
+@pytest.mark.parametrize("name", ["chkdsk_legacy_en.txt", "chkdsk_legacy_zh.txt"])
+def test_chkdsk_legacy(name):
+    assert updates("chkdsk", name) == [ProgressUpdate(12.0), ProgressUpdate(100.0)]
+
+
+def test_parser_for_unknown_command():
+    assert parser_for("bootrec") is None
+    assert isinstance(parser_for("CHKDSK.EXE"), ChkdskProgressParser)
+
+
+def test_parser_must_implement_parse():
+    with pytest.raises(TypeError):
+        ProgressParser()
+
+
+@pytest.fixture
+def published():
+    events = []
+    progress.add_listener(events.append)
+    yield events
+    progress.remove_listener(events.append)
+
+
+def test_tracker_separates_progress_from_output(published):
+    output = []
+    tracker = CommandProgressTracker("sfc", on_output=output.append, interval=0)
+    for line in fixture_lines("sfc_zh.txt"):
+        tracker.feed(line)
+    tracker.finish()
+
+    assert [event.percent for event in published] == [1.0, 35.0, 78.0, 100.0, 100.0]
+    assert [event.finished for event in published] == [False] * 4 + [True]
+    assert published[-1].status == PROGRESS_FINISHED
+    text = [line for line in output if line.strip()]
+    assert text == ["开始系统扫描。此过程将需要一些时间。", "开始系统扫描的验证阶段。",
+                    "Windows 资源保护未找到任何完整性冲突。"]
+
+
+def test_tracker_reports_stage_lines_as_output(published):
+    output = []
+    tracker = CommandProgressTracker("chkdsk", on_output=output.append, interval=0)
+    for line in fixture_lines("chkdsk_en.txt"):
+        tracker.feed(line)
+    assert "Stage 2: Examining file name linkage ..." in output
+    assert not any(line.startswith("Progress:") for line in output)
+    assert [(event.percent, event.eta) for event in published] == [
+        (0.0, 310.0), (16.0, 120.0), (55.0, 40.0), (100.0, 0.0)
+    ]
+
+
+def _result(returncode=0, timed_out=False, cancelled=False):
+    return CommandResult(("sfc",), returncode, "", "", 1.0, timed_out, cancelled)
+
+
+@pytest.mark.parametrize("result, status", [
+    (_result(), PROGRESS_FINISHED),
+    (_result(returncode=2), PROGRESS_FAILED),
+    (_result(returncode=None, timed_out=True), PROGRESS_TIMED_OUT),
+    (_result(returncode=None, cancelled=True), PROGRESS_CANCELLED),
+    (None, PROGRESS_FAILED),
+])
+def test_result_status(result, status):
+    assert result_status(result) == status
+
+
+@pytest.mark.parametrize("name", ["chkdsk_en.txt", "chkdsk_zh.txt"])
+def test_progress_through_runner(name, published):
+    # 每次只写出几个字节，回车、\r\n 和中文字符都可能被分到两次读取中
+    code = (
+        "import sys, time\n"
+        f"data = open({os.path.join(FIXTURES, name)!r}, 'rb').read()\n"
+        "for i in range(0, len(data), 7):\n"
+        "    sys.stdout.buffer.write(data[i:i + 7]); sys.stdout.buffer.flush()\n"
+        "    time.sleep(0.001)\n"
+    )
+    runner = CommandRunner(encoding='cp936')
+    try:
+        tracker = CommandProgressTracker("chkdsk", interval=0)
+        result = runner.run([sys.executable, '-c', code], timeout=30, on_line=tracker.feed)
+        tracker.finish(result_status(result))
+    finally:
+        runner.loop.call_soon_threadsafe(runner.loop.stop)
+
+    assert [event.percent for event in published] == [0.0, 16.0, 55.0, 100.0, 100.0]
+    assert published[-1].status == PROGRESS_FINISHED
+    assert published[-1].stage.startswith("3: ")
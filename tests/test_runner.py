@@ -0,0 +1,133 @@
+"""commands.runner 的测试，以当前Python解释器作为子进程"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from cleanup.cancellation import CancellationToken
+from commands.runner import STREAM_BUFFER_LINES, CommandRunner
+
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+
+@pytest.fixture(scope="module")
+def runner():
+    runner = CommandRunner(encoding='cp936')
+    yield runner
+    runner.loop.call_soon_threadsafe(runner.loop.stop)
+
+
+def test_output_and_returncode(runner):
+    result = runner.run(python("import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)"))
+    assert result.returncode == 3
+    assert result.stdout.strip() == "out"
+    assert result.stderr.strip() == "err"
+    assert not result.ok
+
+
+def test_timeout_kills_process(runner):
+    result = runner.run(python("import time; time.sleep(30)"), timeout=0.5)
+    assert result.timed_out
+    assert not result.cancelled
+    assert not result.ok
+    assert result.duration < 10
+
+
+def test_cancellation_stops_command_and_removes_callback(runner):
+    token = CancellationToken()
+    threading.Timer(0.3, token.cancel).start()
+    result = runner.run(python("import time; time.sleep(30)"), timeout=30, token=token)
+    assert result.cancelled
+    assert not result.timed_out
+    assert result.duration < 10
+
+
+def test_callback_removed_after_normal_exit(runner):
+    token = CancellationToken()
+    for _ in range(3):
+        assert runner.run(python("pass"), token=token).ok
+    assert token._callbacks == []
+
+
+def test_already_cancelled_token(runner):
+    token = CancellationToken()
+    token.cancel()
+    result = runner.run(python("import time; time.sleep(30)"), timeout=30, token=token)
+    assert result.cancelled
+
+
+def _stream(runner, code, **kwargs):
+    lines = []
+    result = runner.run(python(code), on_line=lines.append, **kwargs)
+    return lines, result
+
+
+def test_cr_and_crlf_split_lines(runner):
+    lines, result = _stream(runner, (
+        "import sys; out = sys.stdout.buffer\n"
+        "out.write(b'10%\\r20%\\r\\nline\\nlast'); out.flush()"
+    ))
+    assert result.ok
+    assert lines == ["10%", "20%", "line", "last"]
+
+
+def test_crlf_split_across_reads(runner):
+    # \r 和 \n 分两次写出，不应多出一个空行
+    lines, _ = _stream(runner, (
+        "import sys, time; out = sys.stdout.buffer\n"
+        "out.write(b'a\\r'); out.flush(); time.sleep(0.3)\n"
+        "out.write(b'\\nb\\r\\n'); out.flush()"
+    ))
+    assert lines == ["a", "b"]
+
+
+def test_cp936_output_decoded_with_replacement(runner):
+    code = ("import sys; out = sys.stdout.buffer\n"
+            "out.write('扫描完成'.encode('cp936') + b'\\xff\\n'); out.flush()")
+    result = runner.run(python(code))
+    assert result.stdout == "扫描完成�\n"
+    lines, _ = _stream(runner, code)
+    assert lines == ["扫描完成�"]
+
+
+def test_cp936_character_split_across_reads(runner):
+    data = '验证'.encode('cp936')
+    lines, _ = _stream(runner, (
+        "import sys, time; out = sys.stdout.buffer\n"
+        f"data = {data!r}\n"
+        "out.write(data[:1]); out.flush(); time.sleep(0.3)\n"
+        "out.write(data[1:] + b'\\n'); out.flush()"
+    ))
+    assert lines == ["验证"]
+
+
+def test_slow_consumer_pauses_command(runner, tmp_path):
+    # 输出远大于管道缓冲和行队列，读取暂停时子进程应停在写入处
+    marker = tmp_path / "done"
+    count = 20000
+    code = (
+        "import sys\n"
+        f"for i in range({count}): sys.stdout.write('%05d %s\\n' % (i, 'x' * 100))\n"
+        "sys.stdout.flush()\n"
+        f"open({str(marker)!r}, 'w').close()"
+    )
+    assert count > STREAM_BUFFER_LINES
+    received = []
+    finished_while_paused = []
+
+    def on_line(line):
+        if not received:
+            time.sleep(1)
+            finished_while_paused.append(os.path.exists(str(marker)))
+        received.append(line)
+
+    result = runner.run(python(code), on_line=on_line)
+    assert finished_while_paused == [False]
+    assert result.ok
+    assert len(received) == count
+    assert received[-1].startswith("%05d " % (count - 1))
+    assert marker.exists()
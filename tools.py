@@ -2,13 +2,14 @@ import time
 import msvcrt
 import delete_useless_file as DUF
 from system_check_fix import SystemCheckFix
+from config.timeout_config import TimeoutConfig
 import gpu_info as GI
 import io_prompts as op
 from log_utils import LogManager
 from languages.language_config import LanguageManager
-import subprocess
 import antivirus as AV
 import os
+from commands import run_command, operation_key
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 
@@ -33,8 +34,90 @@ def delete_useless_files():
     logger.info("Cleaning system")
     try:
         env = DUF.DeleteUselessFile()
-        logger.info("Cleaning system")
-        env.cleanup_system()
+        resume = False
+        if env.has_checkpoint():
+            # 工具在后台线程中运行，对话框交给界面线程弹出
+            resume = op.call_in_ui_thread(
+                messagebox.askyesno,
+                LanguageManager.get_string("resume_cleanup_title"),
+                LanguageManager.get_string("resume_cleanup_prompt"),
+                parent=op.get_root_window()
+            )
+        logger.info(f"Cleaning system (resume={resume})")
+        env.cleanup_system(resume=resume)
+        logger.info("Operation complete")
+    except Exception as e:
+        logger.error(f"Operation failed: {str(e)}", exc_info=True)
+        print(f"{LanguageManager.get_string('operation_failed')}: {str(e)}")
+
+def plan_useless_files():
+    """生成无用文件清理计划，只统计不删除"""
+    logger.info("Planning cleanup")
+    try:
+        env = DUF.DeleteUselessFile()
+        env.plan_cleanup()
+        logger.info("Operation complete")
+    except Exception as e:
+        logger.error(f"Operation failed: {str(e)}", exc_info=True)
+        print(f"{LanguageManager.get_string('operation_failed')}: {str(e)}")
+
+def execute_cleanup_plan():
+    """按已保存的清理计划删除文件"""
+    logger.info("Executing cleanup plan")
+    try:
+        env = DUF.DeleteUselessFile()
+        env.execute_plan()
+        logger.info("Operation complete")
+    except Exception as e:
+        logger.error(f"Operation failed: {str(e)}", exc_info=True)
+        print(f"{LanguageManager.get_string('operation_failed')}: {str(e)}")
+
+def disk_space_report():
+    """统计各驱动器占用空间最大的目录和文件，只统计不删除"""
+    logger.info("Building disk space report")
+    try:
+        env = DUF.DeleteUselessFile()
+        env.space_report()
+        logger.info("Operation complete")
+    except Exception as e:
+        logger.error(f"Operation failed: {str(e)}", exc_info=True)
+        print(f"{LanguageManager.get_string('operation_failed')}: {str(e)}")
+
+def find_duplicate_files():
+    """查找各驱动器上内容相同的文件，只列出不删除"""
+    logger.info("Searching duplicate files")
+    try:
+        env = DUF.DeleteUselessFile()
+        env.find_duplicates()
+        logger.info("Operation complete")
+    except Exception as e:
+        logger.error(f"Operation failed: {str(e)}", exc_info=True)
+        print(f"{LanguageManager.get_string('operation_failed')}: {str(e)}")
+
+def restore_quarantined_file():
+    """按原路径从隔离区恢复文件"""
+    logger.info("Restoring quarantined file")
+    try:
+        if hasattr(op, 'IN_GUI_MODE') and op.IN_GUI_MODE:
+            from user_interface import InputDialog
+
+            def ask_path():
+                # 对话框必须在界面线程中创建
+                dialog = InputDialog(
+                    op.get_root_window(),
+                    LanguageManager.get_string("menu_items")[11],
+                    LanguageManager.get_string("quarantine_restore_prompt")
+                )
+                return dialog.result
+
+            file_path = op.call_in_ui_thread(ask_path)
+        else:
+            file_path = input(LanguageManager.get_string("quarantine_restore_prompt")).strip()
+        if not file_path:
+            logger.info("Restore cancelled")
+            return
+        env = DUF.DeleteUselessFile()
+        env.restore_quarantined_file(file_path.strip().strip('"'))
         logger.info("Operation complete")
     except Exception as e:
         logger.error(f"Operation failed: {str(e)}", exc_info=True)
@@ -127,19 +210,21 @@ class CheckDriver:
         self.logger = LogManager().get_logger(__name__)
         self.logger.info(LanguageManager.get_string("driver_check_tool_init"))
 
-    def check_all_drive(self):
-        """检查所有驱动器"""
+    def check_all_drive(self, repair=None):
+        """
+        检查所有驱动器
+
+        参数:
+            repair: 是否以修复模式检查，为None时在开始前询问一次
+        """
         self.logger.info(LanguageManager.get_string("checking_all_drives"))
         try:
-            for i in self.env.drive_letter:
+            if repair is None:
                 print(f"{LanguageManager.get_string('readonly_mode_prompt')} \n")
-                if msvcrt.getch().decode().lower() == 'y':
-                    self.logger.info(f"{LanguageManager.get_string('readonly_mode_check')} {i}")
-                    SystemCheckFix.chkdsk(i.replace('\\', ''))
-                else:
-                    self.logger.info(f"{LanguageManager.get_string('repair_mode_check')} {i}")
-                    SystemCheckFix.chkdsk(i.replace('\\', ''), "/f")
-                time.sleep(5)
+                repair = msvcrt.getch().decode().lower() != 'y'
+            mode = 'repair_mode_check' if repair else 'readonly_mode_check'
+            self.logger.info(f"{LanguageManager.get_string(mode)} {self.env.drive_letter}")
+            SystemCheckFix.chkdsk_all(self.env.drive_letter, repair)
         except Exception as e:
             self.logger.error(f"{LanguageManager.get_string('operation_failed')}: {str(e)}", exc_info=True)
             print(f"{LanguageManager.get_string('error_occurred')}{str(e)} \n")
@@ -253,28 +338,25 @@ def netsh_winsock_reset():
             return
         
         # 使用超时机制执行网络重置
-        try:
-            process = subprocess.run(
-                ['netsh', 'winsock', 'reset'], 
-                shell=False, 
-                check=True, 
-                text=True, 
-                timeout=30  # 30秒超时
-            )
-            
+        operation = operation_key('netsh', 'winsock', 'reset')
+        process = run_command(['netsh', 'winsock', 'reset'],
+                              timeout=TimeoutConfig.get_timeout(operation), operation=operation)
+        
+        if process.timed_out:
+            logger.error("Network reset command timed out")
+            print(LanguageManager.get_string("network_reset_timeout"))
+        elif process.cancelled:
+            print(LanguageManager.get_string("operation_cancelled"))
+        elif process.returncode != 0:
+            logger.error(f"Network reset failed with code {process.returncode}")
+            logger.error(f"Error output: {process.stderr or 'No error output'}")
+            print(f"{LanguageManager.get_string('network_reset_failed')}: "
+                  f"{process.returncode} {process.stderr or process.stdout}")
+        else:
             logger.info("Network reset completed")
             print(LanguageManager.get_string("network_reset_completed"))
             print(LanguageManager.get_string("restart_required"))
-            
-        except subprocess.TimeoutExpired:
-            logger.error("Network reset command timed out")
-            print(LanguageManager.get_string("network_reset_timeout"))
-            
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Network reset failed with code {e.returncode}")
-            logger.error(f"Error output: {e.stderr if hasattr(e, 'stderr') else 'No error output'}")
-            print(f"{LanguageManager.get_string('network_reset_failed')}: {e}")
-            
+        
     except FileNotFoundError:
         logger.error("Network command not found")
         print(LanguageManager.get_string("network_command_not_found"))
@@ -7,7 +7,6 @@ import time
 from pathlib import Path
 import platform
 from PIL import Image, ImageTk  
-import subprocess
 import json
 
 from languages import LanguageManager, Language
@@ -15,6 +14,14 @@ from log_utils import LogManager
 from tools import *
 from config import AppTools, AppConfig
 from config import SettingsManager
+from cleanup import cancellation
+from cleanup import progress as cleanup_progress
+from cleanup.extensions import DEFAULT_EXTENSIONS
+from cleanup.formatting import format_size, format_duration
+from commands import run_command, operation_key
+from commands import progress as command_progress
+from config.timeout_config import TimeoutConfig
+from config.cleanup_config import CleanupConfig
 
 import io_prompts as op
 op.set_gui_mode(True)  # 设置为GUI模式
@@ -369,7 +376,7 @@ class FileExtensionSettingsDialog:
     def __init__(self, parent):
         self.parent = parent
         self.result = None
-        self.extensions = set([".log", ".tmp", ".temp", ".bak", ".old", ".dmp"])  # 默认后缀
+        self.extensions = set(DEFAULT_EXTENSIONS)  # 默认后缀
         
         # 从配置加载已保存的扩展名
         self.load_extensions()
@@ -526,7 +533,7 @@ class FileExtensionSettingsDialog:
     
     def reset_to_default_extensions(self):
         """重置为默认文件扩展名"""
-        self.extensions = set([".log", ".tmp", ".temp", ".bak", ".old", ".dmp"])
+        self.extensions = set(DEFAULT_EXTENSIONS)
         self.extensions_listbox.delete(0, tk.END)
         for ext in sorted(self.extensions):
             self.extensions_listbox.insert(tk.END, ext)
@@ -1184,11 +1191,55 @@ class SystemSafetyToolsGUI:
             )
             self.status_bar.pack(side=tk.LEFT, padx=5)
             
+            # 订阅清理引擎的进度，按固定间隔刷新状态栏
+            cleanup_progress.add_listener(self._on_cleanup_progress,
+                                          CleanupConfig.PROGRESS_UI_INTERVAL)
+            # 订阅sfc、DISM、chkdsk等外部命令的百分比进度
+            command_progress.add_listener(self._on_command_progress)
+            
             self.logger.info("Status bar created successfully")
             
         except Exception as e:
             self.logger.error(f"Error creating status bar: {str(e)}", exc_info=True)
 
+    def _on_cleanup_progress(self, snapshot):
+        """在状态栏显示清理进度，由清理线程调用，转到界面线程更新"""
+        text = (f"{LanguageManager.get_string('progress_scanned')}: {snapshot.files_scanned:,} "
+                f"({snapshot.scan_rate:,.0f}/s)  "
+                f"{LanguageManager.get_string('progress_candidates')}: {snapshot.candidates:,}  "
+                f"{LanguageManager.get_string('progress_reclaimed')}: "
+                f"{format_size(snapshot.bytes_reclaimed)}")
+        if snapshot.finished:
+            text += f"  {LanguageManager.get_string('progress_finished')}"
+        elif snapshot.current_directory:
+            directory = snapshot.current_directory
+            if len(directory) > 60:
+                directory = "..." + directory[-57:]
+            text += f"  {directory}"
+        self.root.after(0, lambda: self.status_bar.config(text=text))
+
+    def _on_command_progress(self, progress):
+        """在进度条和状态栏显示外部命令的进度，由工具线程调用，转到界面线程更新"""
+        text = f"{progress.command}: {progress.percent:.1f}%"
+        if progress.stage:
+            text += f"  {progress.stage}"
+        if progress.finished:
+            text += f"  {LanguageManager.get_string('progress_' + progress.status)}"
+        elif progress.eta is not None:
+            text += f"  {LanguageManager.get_string('progress_eta')}: {format_duration(progress.eta)}"
+
+        def update():
+            self.status_bar.config(text=text)
+            bar = getattr(self, 'tool_progress', None)
+            if bar is None or not bar.winfo_exists():
+                return
+            if str(bar.cget('mode')) != 'determinate':
+                bar.stop()
+                bar.configure(mode='determinate', maximum=100)
+            bar['value'] = progress.percent
+
+        self.root.after(0, update)
+
     def create_header(self):
         """创建标题栏"""
         self.logger.info("Creating header")
@@ -1313,7 +1364,12 @@ class SystemSafetyToolsGUI:
                 ('Secondary.TButton', 'network_reset'),
                 ('Info.TButton', 'drive_check'),
                 ('Warning.TButton', 'boot_repair'),
-                ('Primary.TButton', 'virus_scan')
+                ('Primary.TButton', 'virus_scan'),
+                ('Info.TButton', 'space_report'),
+                ('Secondary.TButton', 'duplicates'),
+                ('Warning.TButton', 'restore_quarantine'),
+                ('Info.TButton', 'plan_cleanup'),
+                ('Secondary.TButton', 'execute_plan')
             ]
             
             # 清空按钮列表
@@ -1499,50 +1555,7 @@ class SystemSafetyToolsGUI:
                 self.show_drive_check_dialog()
                 return
                 
-            # 对于其他工具，一个正在运行时不要启动新的
-            if hasattr(self, 'tool_running') and self.tool_running:
-                # 提示用户当前有工具正在运行
-                messagebox.showinfo(
-                    LanguageManager.get_string("information"),
-                    LanguageManager.get_string("tool_already_running"),
-                    parent=self.root
-                )
-                return
-            
-            # 设置工具运行状态
-            self.tool_running = True
-            
-            # 清空输出区域
-            self._clear_output()
-            
-            # 禁用按钮，防止重复点击
-            for button in self.buttons:
-                button.configure(state=tk.DISABLED)
-            
-            # 创建进度条
-            progress = ttk.Progressbar(self.main_frame, orient=tk.HORIZONTAL, mode='indeterminate')
-            progress.pack(fill=tk.X, padx=20, pady=5)
-            progress.start(10)
-            
-            # 在单独的线程中运行工具
-            def run_in_thread():
-                try:
-                    AppTools.get(tool_idx, self)
-                    
-                except Exception as e:
-                    self.logger.error(f"Error running tool {tool_idx}: {str(e)}")
-                    
-                    # 在UI线程中更新界面
-                    self.root.after(0, lambda: self._show_error(str(e)))
-                    
-                finally:
-                    # 在UI线程中恢复界面状态
-                    self.root.after(0, lambda: self._restore_ui(progress))
-            
-            # 启动线程
-            tool_thread = threading.Thread(target=run_in_thread)
-            tool_thread.daemon = True
-            tool_thread.start()
+            self._start_tool_thread(lambda: AppTools.get(tool_idx, self), f"tool {tool_idx}")
             
         except Exception as e:
             self.logger.error(f"Error preparing to run tool {tool_idx}: {str(e)}")
@@ -1557,6 +1570,65 @@ class SystemSafetyToolsGUI:
             for button in self.buttons:
                 button.configure(state=tk.NORMAL)
 
+    def _start_tool_thread(self, target, name):
+        """在后台线程中运行工具，显示进度条和停止按钮，结束后恢复界面"""
+        # 对于其他工具，一个正在运行时不要启动新的
+        if hasattr(self, 'tool_running') and self.tool_running:
+            # 提示用户当前有工具正在运行
+            messagebox.showinfo(
+                LanguageManager.get_string("information"),
+                LanguageManager.get_string("tool_already_running"),
+                parent=self.root
+            )
+            return
+        
+        # 设置工具运行状态
+        self.tool_running = True
+        
+        # 清空输出区域
+        self._clear_output()
+        
+        # 禁用按钮，防止重复点击
+        for button in self.buttons:
+            button.configure(state=tk.DISABLED)
+        
+        # 创建进度条，外部命令报告百分比进度后切换为确定模式
+        progress = ttk.Progressbar(self.main_frame, orient=tk.HORIZONTAL, mode='indeterminate')
+        progress.pack(fill=tk.X, padx=20, pady=5)
+        progress.start(10)
+        self.tool_progress = progress
+        
+        # 创建取消令牌和停止按钮，支持取消的工具在批次之间检查令牌
+        token = cancellation.CancellationToken()
+        cancellation.set_active_token(token)
+        stop_button = ttk.Button(
+            self.main_frame,
+            text=LanguageManager.get_string("stop"),
+            command=lambda: self._stop_tool(token, stop_button),
+            style='Secondary.TButton'
+        )
+        stop_button.pack(pady=5)
+        
+        # 在单独的线程中运行工具
+        def run_in_thread():
+            try:
+                target()
+                
+            except Exception as e:
+                self.logger.error(f"Error running {name}: {str(e)}")
+                
+                # 在UI线程中更新界面
+                self.root.after(0, lambda: self._show_error(str(e)))
+                
+            finally:
+                # 在UI线程中恢复界面状态
+                self.root.after(0, lambda: self._restore_ui(progress, stop_button))
+        
+        # 启动线程
+        tool_thread = threading.Thread(target=run_in_thread)
+        tool_thread.daemon = True
+        tool_thread.start()
+
     def _show_error(self, error_message):
         """显示错误消息对话框"""
         messagebox.showerror(
@@ -1565,11 +1637,24 @@ class SystemSafetyToolsGUI:
             parent=self.root
         )
 
-    def _restore_ui(self, progress_bar):
+    def _stop_tool(self, token, stop_button):
+        """请求停止正在运行的工具"""
+        self.logger.info("Stop requested by user")
+        token.cancel()
+        stop_button.configure(state=tk.DISABLED)
+        self.status_bar.config(text=LanguageManager.get_string("stopping"))
+
+    def _restore_ui(self, progress_bar, stop_button=None):
         """恢复UI状态"""
         # 停止并移除进度条
         progress_bar.stop()
         progress_bar.destroy()
+        self.tool_progress = None
+        
+        # 移除停止按钮，清除当前操作的取消令牌
+        if stop_button is not None:
+            stop_button.destroy()
+        cancellation.set_active_token(None)
         
         # 恢复按钮状态
         for button in self.buttons:
@@ -1831,7 +1916,7 @@ class SystemSafetyToolsGUI:
         """创建文件扩展名设置界面"""
         try:
             # 加载文件扩展名
-            self.extensions = set([".log", ".tmp", ".temp", ".bak", ".old", ".dmp"])
+            self.extensions = set(DEFAULT_EXTENSIONS)
             config_file = Path("config/file_extensions.txt")
             if config_file.exists():
                 with open(config_file, 'r', encoding='utf-8') as f:
@@ -1933,7 +2018,7 @@ class SystemSafetyToolsGUI:
     
     def reset_to_default_extensions(self):
         """重置为默认文件扩展名"""
-        self.extensions = set([".log", ".tmp", ".temp", ".bak", ".old", ".dmp"])
+        self.extensions = set(DEFAULT_EXTENSIONS)
         self.extensions_listbox.delete(0, tk.END)
         for ext in sorted(self.extensions):
             self.extensions_listbox.insert(tk.END, ext)
@@ -2284,8 +2369,13 @@ class SystemSafetyToolsGUI:
             # 获取驱动器检查类实例
             driver_checker = CheckDriver()
             
-            # 执行所有驱动器检查
-            driver_checker.check_all_drive()
+            # 开始前统一询问一次检查模式，然后执行所有驱动器检查
+            readonly = messagebox.askyesno(
+                LanguageManager.get_string("check_drives_title"),
+                LanguageManager.get_string("readonly_mode_prompt"),
+                parent=self.root
+            )
+            driver_checker.check_all_drive(repair=not readonly)
             
             # 更新状态
             self.status_bar.config(text=LanguageManager.get_string('completed'))
@@ -2415,7 +2505,7 @@ class SystemSafetyToolsGUI:
                 progress.start(10)
                 
                 # 执行工具
-                ApplTools.get(tool_idx)
+                AppTools.get(tool_idx)
                 
                 # 停止进度条
                 progress.stop()
@@ -2914,12 +3004,13 @@ class SystemSafetyToolsGUI:
                 return
             
             # 执行选定的DISM选项
+            # 在后台线程中执行选定的DISM选项，以便显示进度
             if dialog.result == 0:  # 自动修复
                 self.logger.info("DISM auto option selected")
-                SystemCheckFix.auto_dism_check_and_restore_health()
+                self._start_tool_thread(SystemCheckFix.auto_dism_check_and_restore_health, "DISM")
             else:  # 手动修复
                 self.logger.info("DISM manual option selected")
-                SystemCheckFix.dism_check_and_restore_health()
+                self._start_tool_thread(SystemCheckFix.dism_check_and_restore_health, "DISM")
                 
         except Exception as e:
             self.logger.error(f"Error showing DISM options: {str(e)}")
@@ -2951,7 +3042,9 @@ class SystemSafetyToolsGUI:
             # 执行选定的驱动器检查选项
             if dialog.result == 0:  # 检查单个驱动器
                 self.logger.info("Check single drive selected")
-                check_one_drive_gui(self.root)  # 使用GUI版本的驱动器检查
+                # 使用GUI版本的驱动器检查，chkdsk在后台线程中执行
+                check_one_drive_gui(self.root,
+                                    lambda target: self._start_tool_thread(target, "chkdsk"))
             else:  # 检查所有驱动器
                 self.logger.info("Check all drives selected")
                 
@@ -2963,7 +3056,14 @@ class SystemSafetyToolsGUI:
                 )
                 
                 if confirm:
-                    env.check_all_drive()
+                    # 开始前统一询问一次检查模式，各驱动器在后台并发检查
+                    readonly = messagebox.askyesno(
+                        LanguageManager.get_string("check_drives_title"),
+                        LanguageManager.get_string("readonly_mode_prompt"),
+                        parent=self.root
+                    )
+                    self._start_tool_thread(
+                        lambda: env.check_all_drive(repair=not readonly), "chkdsk")
                 else:
                     print(LanguageManager.get_string("operation_cancelled"))
                     
@@ -3373,7 +3473,6 @@ class SystemSafetyToolsGUI:
 
     def _execute_boot_repair(self, command, parent_window):
         """执行引导修复命令"""
-        import subprocess
         import threading
         
         if not command:
@@ -3453,20 +3552,19 @@ class SystemSafetyToolsGUI:
         def execute_thread():
             try:
                 # 执行bootrec命令
-                process = subprocess.run(
-                    ['bootrec', command], 
-                    shell=False,
-                    capture_output=True,
-                    encoding='cp936',
-                    errors='replace',
-                    timeout=60
+                operation = operation_key('bootrec', command)
+                process = run_command(
+                    ['bootrec', command],
+                    timeout=TimeoutConfig.get_timeout(operation),
+                    operation=operation
                 )
                 
                 # 在UI线程中更新结果
-                parent_window.after(0, lambda: update_result(process))
+                if process.timed_out:
+                    parent_window.after(0, lambda: update_result(None, timeout=True))
+                else:
+                    parent_window.after(0, lambda: update_result(process))
                 
-            except subprocess.TimeoutExpired:
-                parent_window.after(0, lambda: update_result(None, timeout=True))
             except Exception as e:
                 parent_window.after(0, lambda: update_result(None, error=str(e)))
         
@@ -3973,8 +4071,15 @@ class OptionDialog:
         self.result = None
         self.dialog.destroy()
 
-def check_one_drive_gui(parent):
-    """GUI版本的单驱动器检查"""
+def check_one_drive_gui(parent, run_in_background=None):
+    """
+    GUI版本的单驱动器检查
+
+    参数:
+        parent: 父窗口
+        run_in_background: 可选，接收无参函数并在后台线程中执行，
+            对话框仍在界面线程中显示
+    """
     logger = LogManager().get_logger(__name__)
     try:
         # 获取驱动器盘符
@@ -4000,10 +4105,15 @@ def check_one_drive_gui(parent):
         
         if readonly_mode:
             logger.info(f"Readonly mode check {drive}")
-            SystemCheckFix.chkdsk(drive)
+            check = lambda: SystemCheckFix.chkdsk(drive)
         else:
             logger.info(f"Repair mode check {drive}")
-            SystemCheckFix.chkdsk(drive, "/f")
+            check = lambda: SystemCheckFix.chkdsk(drive, "/f")
+        
+        if run_in_background is not None:
+            run_in_background(check)
+        else:
+            check()
             
     except Exception as e:
         logger.error(f"Operation failed: {str(e)}", exc_info=True)